@@ -0,0 +1,100 @@
+"""
+Submission response compression benchmark
+Sizes and compression times of GET /api/submissions bodies (a page with
+answers, and the whole list with the admin list fields) at several gzip
+levels and Brotli qualities, then the per-poll cost through
+CompressionMiddleware with the store unchanged (compressed once, then served
+from its cache) and changing between polls.
+
+Usage: python benchmarks/bench_compression.py [--submissions 10000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import compression  # noqa: E402
+from grading import Grader  # noqa: E402
+from submission_store import create_store, query_submissions_json  # noqa: E402
+
+from bench_submission_memory import make_submissions  # noqa: E402
+
+LIST_FIELDS = "id,user_id,user_email,username,score,passed,status,created_at,updated_at"
+BODIES = (
+    ("page with answers (200)", {"limit": 200}),
+    ("whole list, list fields", {"fields": LIST_FIELDS}),
+)
+SETTINGS = [("gzip", level) for level in (1, 6, 9)]
+if compression.brotli is not None:
+    SETTINGS += [("br", quality) for quality in (1, 5, 11)]
+
+
+def compress_with(body: bytes, coding: str, level: int) -> bytes:
+    return compression.compress(body, coding, gzip_level=level, brotli_quality=level)
+
+
+def poll_ms(store, body_query: dict, coding: str, repeat: int, change: bool) -> float:
+    """Mean time for one poll through the middleware, from request to sent body"""
+    async def app(scope, receive, send):
+        etag = f'"{store.version:x}"'
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"etag", etag.encode())]})
+        await send({"type": "http.response.body", "body": query_submissions_json(store, **body_query)})
+
+    middleware = compression.CompressionMiddleware(app)
+    scope = {"type": "http", "method": "GET", "path": "/api/submissions", "query_string": b"",
+             "headers": [(b"accept-encoding", coding.encode())]}
+    ids = [s["id"] for s in store.list()[:repeat + 1]]
+
+    async def send(message):
+        pass
+
+    async def run():
+        start = time.perf_counter()
+        for i in range(repeat):
+            if change:
+                store.update(ids[i], status="accepted")
+            await middleware(scope, None, send)
+        return (time.perf_counter() - start) / repeat * 1000
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    store = create_store("memory")
+    for submission in make_submissions(Grader.from_file(), args.submissions, random.Random(args.seed)):
+        store.add(submission)
+
+    print(f"{args.submissions} submissions")
+    for name, query in BODIES:
+        body = query_submissions_json(store, **query)
+        print(f"  {name}: {len(body) / 1024:,.0f} KB")
+        print(f"    {'coding':8s} {'KB':>8s} {'ratio':>6s} {'ms':>8s}")
+        for coding, level in SETTINGS:
+            start = time.perf_counter()
+            encoded = compress_with(body, coding, level)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"    {coding + ' ' + str(level):8s} {len(encoded) / 1024:8,.1f} "
+                  f"{len(body) / len(encoded):5.1f}x {elapsed:8.2f}")
+
+    coding = "br" if compression.brotli is not None else "gzip"
+    print(f"  poll through CompressionMiddleware ({coding}), ms per request")
+    for name, query in BODIES:
+        unchanged = poll_ms(store, query, coding, args.repeat, change=False)
+        changing = poll_ms(store, query, coding, args.repeat, change=True)
+        print(f"    {name:25s} unchanged {unchanged:8.2f}   changed every poll {changing:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Outbound HTTP client benchmark
+Posts to a local stub server (standing in for discord.com / the bot API),
+once with a new httpx.AsyncClient per call as the servers used to, and once
+through the shared pooled client from http_client. With --tls the stub
+serves HTTPS with a throwaway self-signed certificate (needs the openssl
+CLI), which is where per-call handshakes cost the most.
+
+Usage: python benchmarks/bench_http_client.py [--requests 500] [--tls]
+"""
+
+import argparse
+import asyncio
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx  # noqa: E402
+
+import http_client  # noqa: E402
+
+PAYLOAD = {"embeds": [{"title": "benchmark", "fields": [{"name": "Score", "value": "80%"}]}]}
+
+
+async def stub_handler(request):
+    await request.read()
+    return web.Response(status=204)
+
+
+def self_signed_context(workdir: str) -> ssl.SSLContext:
+    cert, key = os.path.join(workdir, "cert.pem"), os.path.join(workdir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+async def per_call(url: str, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        async with httpx.AsyncClient(verify=False) as client:
+            await client.post(url, json=PAYLOAD, timeout=10.0)
+    return time.perf_counter() - start
+
+
+async def pooled(url: str, n: int) -> float:
+    # verify=False only so the benchmark trusts the self-signed stub certificate
+    client = http_client.create_client(verify=False)
+    start = time.perf_counter()
+    for _ in range(n):
+        await client.post(url, json=PAYLOAD, timeout=10.0)
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--tls", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    app = web.Application()
+    app.router.add_post("/webhook", stub_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    with tempfile.TemporaryDirectory() as workdir:
+        ssl_context = self_signed_context(workdir) if args.tls else None
+        await web.TCPSite(runner, "127.0.0.1", args.port, ssl_context=ssl_context).start()
+        url = f"{'https' if args.tls else 'http'}://127.0.0.1:{args.port}/webhook"
+
+        await pooled(url, 10)  # warm-up
+        fresh = await per_call(url, args.requests)
+        shared = await pooled(url, args.requests)
+        await runner.cleanup()
+
+    n = args.requests
+    print(f"{n} sequential POSTs to {url}")
+    print(f"  new client per call: {fresh:7.3f}s  ({fresh / n * 1000:6.2f} ms/request)")
+    print(f"  shared pooled client: {shared:7.3f}s  ({shared / n * 1000:6.2f} ms/request)")
+    print(f"  speedup: {fresh / shared:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Submission list serialization benchmark
+Times building the GET /api/submissions response body the way FastAPI did
+by default (store.list/page dicts, jsonable_encoder, json.dumps via
+JSONResponse) against the encoded path (query_submissions_json: orjson,
+per-record cached list-view JSON in the memory store, answers spliced in as
+stored text by the SQLite store). Checks both produce the same JSON.
+
+Usage: python benchmarks/bench_json_responses.py [--submissions 10000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import fast_json  # noqa: E402
+from grading import Grader  # noqa: E402
+from submission_store import (  # noqa: E402
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, create_store, parse_fields, project, query_submissions_json,
+)
+
+from bench_submission_memory import make_submissions  # noqa: E402
+
+LIST_FIELDS = "id,user_id,user_email,username,score,passed,status,created_at,updated_at"
+QUERIES = (
+    ("admin list page (50)", {"limit": 50, "fields": LIST_FIELDS}),
+    ("page with answers (200)", {"limit": 200}),
+    ("whole list, list fields", {"fields": LIST_FIELDS}),
+)
+
+
+def query_submissions(store, status=None, limit=None, cursor=None, fields=None):
+    """The GET /api/submissions result as dicts, as the endpoint built it before encoding moved into the stores"""
+    projection = parse_fields(fields)
+    if limit is None and cursor is None:
+        return project(store.list(status=status), projection)
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    submissions, next_cursor = store.page(limit, cursor, status=status, fields=projection)
+    return {"submissions": submissions, "next_cursor": next_cursor}
+
+
+def per_call_ms(fn, repeat: int) -> float:
+    fn()  # warm caches, as a poll after the first one would find them
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    submissions = make_submissions(Grader.from_file(), args.submissions, random.Random(args.seed))
+    data_dir = tempfile.mkdtemp(prefix="bench-json-")
+    print(f"{args.submissions} submissions; response body build time in ms "
+          f"({'orjson' if fast_json.orjson is not None else 'json'})")
+    print(f"  {'store':7s} {'query':25s} {'default':>9s} {'encoded':>9s} {'speedup':>8s}")
+    for backend in ("memory", "sqlite"):
+        store = create_store(backend, os.path.join(data_dir, "submissions.db"))
+        if backend == "sqlite":
+            store.add_many(submissions)
+        else:
+            for submission in submissions:
+                store.add(submission)
+        for name, query in QUERIES:
+            def default():
+                return JSONResponse(jsonable_encoder(query_submissions(store, **query))).body
+
+            def encoded():
+                return query_submissions_json(store, **query)
+
+            if json.loads(default()) != json.loads(encoded()):
+                sys.exit(f"{backend} {name}: encoded response differs")
+            old, new = per_call_ms(default, args.repeat), per_call_ms(encoded, args.repeat)
+            print(f"  {backend:7s} {name:25s} {old:9.2f} {new:9.2f} {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Load test harness
+Starts the API (serve.py, with fresh SQLite databases in a temporary
+directory) against the fake Discord server, which plays both the webhook
+and the bot's role API with configurable latency and injected 429s, and
+drives it through these scenarios in order:
+
+    submit   a storm of submissions from distinct users
+    approve  every submission approved several times at once, half from the
+             admin panel and half from Discord buttons
+    poll     admin list and stats polling, as open admin tabs do
+
+Each scenario reports throughput and p50/p95/p99 latency, plus the peak
+resident memory of the server processes while it ran. Afterwards the
+outbound job queue is drained and the harness checks that every submission
+reached the webhook and every approved user got the role exactly once
+(exit status 1 otherwise). --json writes the numbers for comparing runs.
+
+Usage: python benchmarks/bench_load.py [--submissions 100] [--concurrency 20] [--workers 1]
+       [--approvals 3] [--polls 500] [--latency 0.05] [--error-rate 0.05] [--json FILE]
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND)
+
+import httpx  # noqa: E402
+
+from grading import Grader  # noqa: E402
+
+from fake_discord import FakeDiscord  # noqa: E402
+
+LIST_FIELDS = "id,user_id,user_email,username,score,passed,status,created_at,updated_at"
+Request = Tuple[str, str, dict]  # method, path, httpx keyword arguments
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+
+def rss_bytes(root: int) -> Optional[int]:
+    """Resident memory of a process and all its descendants (Linux /proc), or None"""
+    children: Dict[int, List[int]] = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    except OSError:
+        return None
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return total
+
+
+class MemorySampler:
+    """Tracks the peak RSS of the server's process tree while running"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _sample(self):
+        rss = rss_bytes(self.pid)
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+
+    async def _run(self):
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = None
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+        self._sample()
+
+
+async def run_requests(client: httpx.AsyncClient, requests: Iterable[Request], concurrency: int,
+                       on_response: Optional[Callable[[httpx.Response], None]] = None) -> dict:
+    """Send requests from a pool of concurrency workers; returns latency and status numbers"""
+    pending = iter(requests)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker():
+        for method, path, kwargs in pending:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError:
+                response, status = None, "error"
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if response is not None and on_response is not None:
+                on_response(response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status != "error" and status < 400)
+    return {
+        "requests": len(latencies),
+        "ok": ok,
+        "errors": len(latencies) - ok,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def submission_requests(grader: Grader, count: int, rng: random.Random) -> List[Request]:
+    requests = []
+    for i in range(count):
+        answers = []
+        for number, question in enumerate(grader.questions, start=1):
+            keywords = rng.sample(question["keywords"], k=rng.randint(0, len(question["keywords"])))
+            answers.append({"question_number": number, "question": question["question"],
+                            "user_answer": " and ".join(keywords) or "not sure"})
+        requests.append(("POST", "/api/submissions", {"json": {
+            "user_id": str(100000000000000000 + i),
+            "user_email": f"load{i}@example.com",
+            "username": f"load{i}",
+            "answers": answers,
+        }}))
+    return requests
+
+
+def approval_requests(submission_ids: List[str], repeats: int) -> List[Request]:
+    requests = []
+    for submission_id in submission_ids:
+        for n in range(repeats):
+            if n % 2 == 0:
+                requests.append(("POST", "/api/admin/action",
+                                 {"json": {"submission_id": submission_id, "action": "accepted"}}))
+            else:
+                requests.append(("POST", "/api/webhook/action",
+                                 {"json": {"submission_id": submission_id, "action": "approve"}}))
+    return requests
+
+
+def poll_requests(count: int) -> List[Request]:
+    views = [
+        ("GET", "/api/submissions", {"params": {"limit": 50, "fields": LIST_FIELDS}}),
+        ("GET", "/api/submissions", {"params": {"status": "pending", "limit": 50, "fields": LIST_FIELDS}}),
+        ("GET", "/api/admin/stats", {}),
+    ]
+    return [views[i % len(views)] for i in range(count)]
+
+
+async def wait_until_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def drain(client: httpx.AsyncClient, timeout: float) -> dict:
+    """Wait for the outbound job queue to empty"""
+    start = time.perf_counter()
+    while True:
+        jobs = (await client.get("/api/admin/jobs", params={"limit": 0})).json()
+        if not jobs["queued"] and not jobs["running"]:
+            break
+        if time.perf_counter() - start > timeout:
+            break
+        await asyncio.sleep(0.25)
+    return {"drained": not jobs["queued"] and not jobs["running"], "drain_s": round(time.perf_counter() - start, 2),
+            "queued": jobs["queued"], "dead": jobs["dead"], "coalesced": jobs.get("coalesced_total", 0)}
+
+
+def start_server(args, fake: FakeDiscord, webhook_url: str, data_dir: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "PORT": str(args.port),
+        "WEB_CONCURRENCY": str(args.workers),
+        "RUN_DISCORD_BOT": "0",
+        "SUBMISSION_STORE": "sqlite",
+        "SUBMISSION_DB_PATH": os.path.join(data_dir, "submissions.db"),
+        "JOB_QUEUE_DB": os.path.join(data_dir, "jobs.db"),
+        "SUBMISSION_GUARD_DB": os.path.join(data_dir, "guard.db"),
+        "DISCORD_WEBHOOK_URL": webhook_url,
+        "DISCORD_BOT_URL": fake.bot_url,
+    })
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    if args.job_rate is not None:
+        env["JOB_QUEUE_RATE"] = str(args.job_rate)
+    log = open(os.path.join(data_dir, "server.log"), "w")
+    return subprocess.Popen([sys.executable, "serve.py"], cwd=BACKEND, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def print_row(name: str, result: dict):
+    peak = result.get("peak_rss_mb")
+    print(f"  {name:8s} {result['requests']:7d} {result['errors']:6d} {result['throughput_rps']:9.1f} "
+          f"{result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['p99_ms']:8.1f} "
+          f"{'%9.1f' % peak if peak is not None else '      n/a'}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=100)
+    parser.add_argument("--approvals", type=int, default=3, help="concurrent approvals per submission")
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="API worker processes (WEB_CONCURRENCY)")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Discord/bot response delay (s)")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of Discord/bot calls given a 429")
+    parser.add_argument("--limit", type=int, default=5, help="fake webhook rate limit per window")
+    parser.add_argument("--window", type=float, default=2.0)
+    parser.add_argument("--job-rate", type=float, default=None, help="JOB_QUEUE_RATE for the server")
+    parser.add_argument("--drain-timeout", type=float, default=180.0)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--fake-port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grader = Grader.from_file()
+    fake = FakeDiscord(limit=args.limit, window=args.window, latency=args.latency,
+                       error_rate=args.error_rate, seed=args.seed)
+    webhook_url = await fake.start(port=args.fake_port)
+    data_dir = tempfile.mkdtemp(prefix="bench-load-")
+    server = start_server(args, fake, webhook_url, data_dir)
+    report = {"config": vars(args), "scenarios": {}}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits,
+                                     timeout=60.0) as client:
+            await wait_until_ready(client, server)
+            idle = rss_bytes(server.pid)
+            report["idle_rss_mb"] = round(idle / 2**20, 1) if idle is not None else None
+            print(f"API on port {args.port} with {args.workers} worker(s); fake Discord latency "
+                  f"{args.latency * 1000:.0f} ms, {args.error_rate:.0%} injected 429s, webhook limit "
+                  f"{args.limit}/{args.window}s")
+            print(f"  {'scenario':8s} {'requests':>7s} {'errors':>6s} {'req/s':>9s} {'p50 ms':>8s} "
+                  f"{'p95 ms':>8s} {'p99 ms':>8s} {'peak MB':>9s}")
+
+            async def scenario(name: str, requests: List[Request],
+                               on_response: Optional[Callable[[httpx.Response], None]] = None):
+                with MemorySampler(server.pid) as memory:
+                    result = await run_requests(client, requests, args.concurrency, on_response)
+                result["peak_rss_mb"] = round(memory.peak / 2**20, 1) if memory.peak is not None else None
+                report["scenarios"][name] = result
+                print_row(name, result)
+
+            created: List[str] = []
+            changed = Counter()
+
+            def record_created(response: httpx.Response):
+                if response.status_code == 200:
+                    created.append(response.json()["submission"]["id"])
+
+            def record_changed(response: httpx.Response):
+                if response.status_code == 200:
+                    changed[response.json().get("changed", True)] += 1
+
+            await scenario("submit", submission_requests(grader, args.submissions, rng), record_created)
+            approvals = approval_requests(created, args.approvals)
+            rng.shuffle(approvals)
+            await scenario("approve", approvals, record_changed)
+            await scenario("poll", poll_requests(args.polls))
+
+            report["approvals_changed"] = changed[True]
+            report["queue"] = await drain(client, args.drain_timeout)
+    finally:
+        server.terminate()
+        try:
+            server.wait(15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        await fake.stop()
+
+    report["discord"] = {
+        "embeds_delivered": len(fake.embeds),
+        "webhook_messages": len(fake.messages),
+        "rate_limited": fake.rejected,
+        "injected_429s": fake.injected,
+        "role_requests": fake.role_requests,
+        "role_assignments": fake.role_assignments,
+        "users_with_role": len(fake.roles),
+    }
+    queue, discord = report["queue"], report["discord"]
+    print(f"  idle RSS {report['idle_rss_mb']} MB; queue drained in {queue['drain_s']}s "
+          f"({queue['dead']} dead, {queue['coalesced']} coalesced)")
+    print(f"  webhook: {discord['embeds_delivered']}/{len(created)} embeds in {discord['webhook_messages']} "
+          f"messages, {discord['rate_limited']} rate limited, {discord['injected_429s']} injected 429s")
+    print(f"  roles: {discord['users_with_role']}/{report['approvals_changed']} approved users in "
+          f"{discord['role_requests']} bot calls ({discord['role_assignments']} assignments)")
+    print(f"  server log: {os.path.join(data_dir, 'server.log')}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    problems = []
+    if not queue["drained"]:
+        problems.append("job queue did not drain")
+    if discord["embeds_delivered"] != len(created):
+        problems.append("notifications lost or duplicated")
+    if report["approvals_changed"] != len(created) or discord["role_assignments"] != len(created):
+        problems.append("approvals not applied exactly once per submission")
+    if problems:
+        sys.exit("; ".join(problems))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
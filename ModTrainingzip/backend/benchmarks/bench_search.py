@@ -0,0 +1,106 @@
+"""
+Submission search benchmark
+Loads N generated submissions into the in-memory store (SearchIndex) and the
+SQLite store (FTS5), then times GET /api/submissions/search queries: rare
+and common words, prefixes, phrases and status/passed filters, first page
+of 50 with the admin list fields. Also checks both backends return the same
+submissions.
+
+Usage: python benchmarks/bench_search.py [--submissions 100000] [--repeat 50]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from grading import Grader  # noqa: E402
+from submission_record import SubmissionRecord  # noqa: E402
+from submission_search import SearchIndex  # noqa: E402
+from submission_store import SubmissionStore, create_store, query_search_json  # noqa: E402
+
+from bench_submission_memory import make_submissions  # noqa: E402
+
+LIST_FIELDS = "id,user_id,user_email,username,score,passed,status,created_at,updated_at"
+
+
+def queries(n: int):
+    user = n // 2
+    return (
+        ("rare word", {"q": f"user{user}"}),
+        ("email", {"q": f"user{user}@example.com"}),
+        ("prefix", {"q": f"user{user // 100}*"}),
+        ("common word", {"q": "tracker"}),
+        ("two common words", {"q": "verification staff"}),
+        ("phrase", {"q": '"fortnite tracker"'}),
+        ("common prefix", {"q": "ver*"}),
+        ("word + status", {"q": "roster", "status": "denied"}),
+        ("phrase + passed", {"q": '"staff review"', "passed": True}),
+        ("prefix + both", {"q": "track*", "status": "pending", "passed": False}),
+    )
+
+
+def timed_ms(fn, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    submissions = make_submissions(Grader.from_file(), args.submissions, random.Random(args.seed))
+    stores = {}
+
+    start = time.perf_counter()
+    stores["memory"] = SubmissionStore(submissions)
+    load = time.perf_counter() - start
+    tracemalloc.start()
+    index = SearchIndex()
+    for submission in submissions:
+        index.add(submission["id"], SubmissionRecord(submission).search_fields())
+    index_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    del index
+    print(f"{args.submissions} submissions")
+    print(f"  memory: loaded and indexed in {load:.1f}s, SearchIndex {index_mb:.0f} MB "
+          f"({len(stores['memory']._search._postings)} distinct words)")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-search-"), "submissions.db")
+    store = create_store("sqlite", path)
+    start = time.perf_counter()
+    store.add_many(submissions)
+    print(f"  sqlite: inserted and indexed in {time.perf_counter() - start:.1f}s, "
+          f"database {os.path.getsize(path) / 2**20:.0f} MB")
+    stores["sqlite"] = store
+
+    print(f"  {'query':18s} {'matches':>8s}   {'memory p50/max ms':>18s}   {'sqlite p50/max ms':>18s}")
+    for name, query in queries(args.submissions):
+        results, cells = [], []
+        for backend, store in stores.items():
+            def search():
+                return query_search_json(store, fields=LIST_FIELDS, limit=50, **query)
+            results.append([s["id"] for s in json.loads(search())["submissions"]])
+            p50, worst = timed_ms(search, args.repeat)
+            cells.append(f"{p50:8.2f} /{worst:8.2f}")
+        if results[0] != results[1]:
+            sys.exit(f"{name}: backends returned different submissions")
+        print(f"  {name:18s} {len(results[0]):8d}   {cells[0]:>18s}   {cells[1]:>18s}")
+
+
+if __name__ == "__main__":
+    main()
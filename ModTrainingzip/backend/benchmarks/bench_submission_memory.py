@@ -0,0 +1,110 @@
+"""
+Submission memory benchmark
+Measures with tracemalloc everything N graded submissions keep allocated
+(strings included), held as plain dicts and as SubmissionRecords:
+
+    from JSON  loaded from a JSON dump (journal snapshot, import), where every
+               answer carries its own copy of the question text
+    graded     built by the grader, question strings shared with the bank
+
+plus the in-memory SubmissionStore (records and indexes) loaded from JSON,
+and the cost of expanding records back into dicts for reads.
+
+Usage: python benchmarks/bench_submission_memory.py [--submissions 100000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from grading import Grader  # noqa: E402
+from submission_record import SubmissionRecord  # noqa: E402
+from submission_store import SubmissionStore  # noqa: E402
+
+
+def make_submissions(grader: Grader, count: int, rng: random.Random):
+    submissions = []
+    for i in range(count):
+        texts = []
+        for question in grader.questions:
+            words = rng.sample(question["keywords"], k=rng.randint(0, len(question["keywords"])))
+            texts.append(" ".join(words + ["thanks"]))
+        graded = grader.result(texts, [grader.check_answer(q["id"], t) for q, t in zip(grader.questions, texts)])
+        created = f"2026-01-{i % 28 + 1:02d}T{i % 24:02d}:00:00.{i:06d}"
+        submissions.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": str(100000000000000000 + i),
+            "user_email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "answers": graded["answers"],
+            "score": graded["score"],
+            "passed": graded["passed"],
+            "status": rng.choice(["pending", "accepted", "denied"]),
+            "created_at": created,
+            "updated_at": created,
+        })
+    return submissions
+
+
+def measure(build):
+    """(result, bytes still allocated by build)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    grader = Grader.from_file()
+    n = args.submissions
+    blob = json.dumps(make_submissions(grader, n, random.Random(args.seed)))
+
+    dict_json, dict_json_bytes = measure(lambda: json.loads(blob))
+    del dict_json
+    records, record_json_bytes = measure(lambda: [SubmissionRecord(s) for s in json.loads(blob)])
+    store, store_bytes = measure(lambda: SubmissionStore(json.loads(blob)))
+    del store
+    graded, dict_graded_bytes = measure(lambda: make_submissions(grader, n, random.Random(args.seed)))
+    del graded
+    _, record_graded_bytes = measure(
+        lambda: [SubmissionRecord(s) for s in make_submissions(grader, n, random.Random(args.seed))]
+    )
+
+    print(f"{n} submissions of {len(grader.questions)} answers")
+    print(f"  {'':24s} {'dicts MB':>9s} {'records MB':>11s} {'bytes/submission':>20s} {'saved':>6s}")
+    for name, dict_bytes, record_bytes in (
+        ("from JSON", dict_json_bytes, record_json_bytes),
+        ("graded", dict_graded_bytes, record_graded_bytes),
+    ):
+        print(f"  {name:24s} {dict_bytes / 2**20:9.1f} {record_bytes / 2**20:11.1f} "
+              f"{dict_bytes / n:9,.0f} -> {record_bytes / n:6,.0f} {1 - record_bytes / dict_bytes:6.0%}")
+    print(f"  SubmissionStore from JSON (records + indexes): {store_bytes / 2**20:.1f} MB")
+
+    sample = random.Random(args.seed).sample(records, min(n, 20_000))
+    for name, expand in (("to_dict()", lambda r: r.to_dict()),
+                         ("to_dict(list fields)", lambda r: r.to_dict(("id", "username", "status", "score")))):
+        start = time.perf_counter()
+        for record in sample:
+            expand(record)
+        print(f"  {name:22s} {(time.perf_counter() - start) / len(sample) * 1e6:6.2f} us/record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Submission store benchmark
+Compares the old linear scan over a list with SubmissionStore lookups,
+status filters and deletes as the number of stored submissions grows
+
+Usage: python benchmarks/bench_submission_store.py [sizes...]
+"""
+
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from submission_store import SubmissionStore  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000, 100_000]
+LOOKUPS = 2_000
+
+
+def make_submission(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": str(100000000000000000 + i % 5000),
+        "user_email": f"user{i}@example.com",
+        "username": f"user{i}",
+        "answers": [],
+        "score": 50.0,
+        "passed": i % 2 == 0,
+        "status": random.choice(["pending", "accepted", "denied"]),
+        "created_at": f"2026-01-01T00:00:{i % 60:02d}",
+        "updated_at": f"2026-01-01T00:00:{i % 60:02d}",
+    }
+
+
+def per_op_us(fn, ids) -> float:
+    start = time.perf_counter()
+    for sid in ids:
+        fn(sid)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def linear_find(db, submission_id):
+    for sub in db:
+        if sub["id"] == submission_id:
+            return sub
+    return None
+
+
+def run(size: int):
+    submissions = [make_submission(i) for i in range(size)]
+    ids = [random.choice(submissions)["id"] for _ in range(LOOKUPS)]
+    store = SubmissionStore([dict(s) for s in submissions])
+
+    # The linear scan is slow enough that a handful of lookups is representative
+    linear_ids = ids[:max(20, LOOKUPS * 1_000 // size)]
+    linear_lookup = per_op_us(lambda sid: linear_find(submissions, sid), linear_ids)
+    store_lookup = per_op_us(store.get, ids)
+    store_update = per_op_us(lambda sid: store.update(sid, status="accepted"), ids)
+
+    start = time.perf_counter()
+    store.count("pending")
+    store_count = (time.perf_counter() - start) * 1e6
+
+    delete_ids = list(dict.fromkeys(ids))
+    store_delete = per_op_us(store.delete, delete_ids)
+
+    print(f"{size:>8} | {linear_lookup:>12.2f} | {store_lookup:>10.3f} | "
+          f"{store_update:>10.3f} | {store_delete:>10.3f} | {store_count:>10.3f}")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    random.seed(1)
+    print("Per-operation latency in microseconds")
+    print(f"{'size':>8} | {'linear find':>12} | {'get':>10} | {'update':>10} | {'delete':>10} | {'count':>10}")
+    for size in sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
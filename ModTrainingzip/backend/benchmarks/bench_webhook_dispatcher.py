@@ -0,0 +1,88 @@
+"""
+Webhook dispatcher harness
+Fires a burst of submission notifications at the fake Discord server (which
+enforces a per-webhook rate limit), once posting one embed per request the
+way send_discord_webhook used to and once through WebhookDispatcher. Reports
+how many embeds arrived, how many requests were rejected with 429 and how
+many messages were needed, and exits non-zero if the dispatcher lost any.
+
+Usage: python benchmarks/bench_webhook_dispatcher.py [--burst 50] [--limit 5] [--window 2]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import http_client  # noqa: E402
+from discord_dispatcher import WebhookDispatcher  # noqa: E402
+
+from fake_discord import FakeDiscord  # noqa: E402
+
+
+def notification(n: int):
+    embed = {"title": "🎯 New Mod Training Submission", "fields": [{"name": "Username", "value": f"user{n}"}],
+             "footer": {"text": f"Submission ID: {n}"}}
+    buttons = [
+        {"type": 2, "style": 3, "label": "✅ Approve", "custom_id": f"approve_{n}"},
+        {"type": 2, "style": 4, "label": "❌ Deny", "custom_id": f"deny_{n}"},
+    ]
+    return embed, buttons
+
+
+async def naive(url: str, burst: int) -> dict:
+    client = http_client.get_client()
+
+    async def post(n):
+        embed, buttons = notification(n)
+        response = await client.post(url, json={"embeds": [embed], "components": [{"type": 1, "components": buttons}]})
+        return response.status_code
+
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*(post(n) for n in range(burst)))
+    return {"elapsed": time.perf_counter() - start, "failed": sum(1 for s in statuses if s not in (200, 204))}
+
+
+async def dispatched(url: str, burst: int) -> dict:
+    dispatcher = WebhookDispatcher(url, http_client.get_client,
+                                   link_button={"type": 2, "style": 5, "label": "View Admin Panel",
+                                                "url": "http://localhost:3000/admin"})
+    await dispatcher.start()
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(dispatcher.send(*notification(n), label=f"user{n}") for n in range(burst)), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - start
+    await dispatcher.stop()
+    return {"elapsed": elapsed, "failed": sum(1 for r in results if isinstance(r, Exception)),
+            "rate_limited": dispatcher.rate_limited}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--window", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    await http_client.start()
+    print(f"Burst of {args.burst} notifications, fake Discord allows {args.limit} requests / {args.window}s")
+    for name, run in (("one embed per request", naive), ("dispatcher", dispatched)):
+        fake = FakeDiscord(limit=args.limit, window=args.window)
+        url = await fake.start(port=args.port)
+        result = await run(url, args.burst)
+        await fake.stop()
+        print(f"  {name:22s} delivered {len(fake.embeds):4d}/{args.burst}  lost {result['failed']:4d}  "
+              f"429s {fake.rejected:4d}  messages {len(fake.messages):4d}  {result['elapsed']:6.2f}s")
+    await http_client.stop()
+
+    if result["failed"] or len(fake.embeds) != args.burst:
+        sys.exit("dispatcher lost notifications")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+"""
+Fake Discord webhook server
+A local aiohttp stand-in for discord.com's webhook route that enforces a
+fixed-window rate limit per webhook and answers with the same X-RateLimit-*
+headers and 429 body Discord sends. Used by the dispatcher harness and load
+tests; it records every accepted message so callers can check for losses.
+
+It also stands in for the bot's role API (/api/assign-role and
+/api/assign-roles), recording which users got the role. Both sides can add
+a fixed latency and answer a random fraction (error_rate) of requests with
+an injected 429 on top of the real rate limit.
+
+Usage (standalone): python benchmarks/fake_discord.py [--port 8766] [--limit 5] [--window 2]
+                    [--latency 0] [--error-rate 0]
+"""
+
+from typing import Dict, List, Set
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+
+class FakeDiscord:
+    def __init__(self, limit: int = 5, window: float = 2.0, latency: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 1):
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.error_rate = error_rate
+        self.messages: List[dict] = []
+        self.rejected = 0
+        self.injected = 0
+        self.role_requests = 0
+        self.role_assignments = 0
+        self.roles: Set[str] = set()
+        self._windows: Dict[str, List[float]] = {}  # webhook id -> [window start, used]
+        self._random = random.Random(seed)
+        self.app = web.Application()
+        self.app.router.add_post("/api/webhooks/{webhook_id}/{token}", self.execute_webhook)
+        self.app.router.add_post("/api/assign-role", self.assign_role)
+        self.app.router.add_post("/api/assign-roles", self.assign_roles)
+        self._runner = None
+        self._base_url = None
+
+    @property
+    def embeds(self) -> List[dict]:
+        return [embed for message in self.messages for embed in message.get("embeds", [])]
+
+    def _inject_429(self):
+        """A 429 for error_rate of the requests, or None"""
+        if not self.error_rate or self._random.random() >= self.error_rate:
+            return None
+        self.injected += 1
+        retry_after = round(self._random.uniform(0.05, 0.5), 3)
+        return web.json_response(
+            {"message": "You are being rate limited.", "retry_after": retry_after, "global": False},
+            status=429, headers={"Retry-After": str(retry_after)},
+        )
+
+    async def execute_webhook(self, request: web.Request) -> web.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        injected = self._inject_429()
+        if injected is not None:
+            return injected
+        webhook_id = request.match_info["webhook_id"]
+        now = time.monotonic()
+        window = self._windows.get(webhook_id)
+        if window is None or now - window[0] >= self.window:
+            window = self._windows[webhook_id] = [now, 0]
+        reset_after = max(0.0, self.window - (now - window[0]))
+        headers = {
+            "X-RateLimit-Bucket": f"webhook-{webhook_id}",
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+        }
+
+        if window[1] >= self.limit:
+            self.rejected += 1
+            headers["X-RateLimit-Remaining"] = "0"
+            headers["X-RateLimit-Scope"] = "user"
+            headers["Retry-After"] = f"{reset_after:.3f}"
+            body = {"message": "You are being rate limited.", "retry_after": reset_after, "global": False}
+            return web.json_response(body, status=429, headers=headers)
+
+        window[1] += 1
+        headers["X-RateLimit-Remaining"] = str(self.limit - window[1])
+        message = await request.json()
+        if len(message.get("embeds", [])) > 10 or len(message.get("components", [])) > 5:
+            return web.json_response({"message": "Invalid Form Body"}, status=400, headers=headers)
+        self.messages.append(message)
+        return web.Response(status=204, headers=headers)
+
+    def _grant(self, user_id) -> dict:
+        self.role_assignments += 1
+        already = str(user_id) in self.roles
+        self.roles.add(str(user_id))
+        return {"success": True, "already_had_role": already}
+
+    async def assign_role(self, request: web.Request) -> web.Response:
+        self.role_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        injected = self._inject_429()
+        if injected is not None:
+            return injected
+        data = await request.json()
+        return web.json_response(self._grant(data["user_id"]))
+
+    async def assign_roles(self, request: web.Request) -> web.Response:
+        self.role_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        injected = self._inject_429()
+        if injected is not None:
+            return injected
+        data = await request.json()
+        results = [{"user_id": str(user_id), "status": 200, **self._grant(user_id)}
+                   for user_id in dict.fromkeys(data["user_ids"])]
+        return web.json_response({"success": True, "succeeded": len(results), "failed": 0, "results": results})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8766) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self._base_url = f"http://{host}:{port}"
+        return f"{self._base_url}/api/webhooks/1234/fake-token"
+
+    @property
+    def bot_url(self) -> str:
+        """Base URL to use as DISCORD_BOT_URL once started"""
+        return self._base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--window", type=float, default=2.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    fake = FakeDiscord(limit=args.limit, window=args.window, latency=args.latency, error_rate=args.error_rate)
+    url = await fake.start(port=args.port)
+    print(f"Fake Discord webhook listening on {url} ({args.limit} requests / {args.window}s)")
+    print(f"Fake bot role API at {fake.bot_url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(json.dumps({"messages": len(fake.messages), "embeds": len(fake.embeds),
+                              "rejected": fake.rejected, "injected": fake.injected,
+                              "roles": len(fake.roles)}))
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
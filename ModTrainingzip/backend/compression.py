@@ -0,0 +1,213 @@
+"""
+Negotiated response compression for the API
+Submission lists repeat the same question texts and near-identical answers,
+so they shrink several-fold with gzip and further with Brotli.
+CompressionMiddleware picks br or gzip from Accept-Encoding (br only when
+the brotli package is installed). It leaves alone bodies under
+COMPRESSION_MIN_SIZE, streamed responses (the SSE feed) and responses that
+are already encoded.
+
+Responses with an ETag (submission list, detail and stats, see
+unified_server.store_etag) are compressed once per store version: the
+compressed body is kept in a small LRU keyed by path, ETag and coding, so
+every later 200 for the same version reuses it. Each coding gets its own
+strong ETag ("<etag>-br", "<etag>-gzip"). The suffix is taken off
+If-None-Match before the app sees it and put back on the 304, so
+conditional requests work unchanged.
+
+Tuning (environment): COMPRESSION_MIN_SIZE (bytes), GZIP_LEVEL (1-9),
+BROTLI_QUALITY (0-11), COMPRESSION_CACHE_BYTES (LRU size).
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import gzip
+import os
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from metrics import track
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "5"))
+COMPRESSION_CACHE_BYTES = int(os.environ.get("COMPRESSION_CACHE_BYTES", str(16 * 2**20)))
+OFFLOAD_SIZE = 256 * 1024  # bodies at least this large are compressed off the event loop
+SKIP_TYPES = ("text/event-stream", "image/", "audio/", "video/", "application/gzip", "application/zip")
+CODING_SUFFIXES = ('-br"', '-gzip"')
+
+CacheKey = Tuple[str, bytes, str, str]  # (path, query string, ETag, coding)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """"br", "gzip" or None for an Accept-Encoding header; br wins ties"""
+    offered: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        offered[coding.strip()] = quality
+    best, best_quality = None, 0.0
+    for coding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        quality = offered.get(coding, offered.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, coding: str, gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY) -> bytes:
+    with track(f"compress_{coding}"):
+        if coding == "br":
+            return brotli.compress(body, quality=brotli_quality, mode=brotli.MODE_TEXT)
+        # mtime=0 keeps the output identical for identical bodies, as a strong ETag promises
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def coded_etag(etag: str, coding: str) -> str:
+    return f'{etag[:-1]}-{coding}"' if etag.endswith('"') else etag
+
+
+class CompressedCache:
+    """LRU of compressed bodies, bounded by their total size"""
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: CacheKey, body: bytes):
+        if len(body) > self.max_bytes // 4 or key in self._entries:
+            return
+        self._entries[key] = body
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses for clients that accept br or gzip
+
+    Runs only on the event loop, so the cache needs no lock
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, gzip_level: int = GZIP_LEVEL,
+                 brotli_quality: int = BROTLI_QUALITY, cache_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = CompressedCache(cache_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        coding = negotiate(headers.get("accept-encoding", ""))
+        # If-None-Match tags of compressed copies, keyed by the ETag the app knows
+        client_etags: Dict[str, str] = {}
+        if "if-none-match" in headers:
+            tags = []
+            for tag in headers["if-none-match"].split(","):
+                tag = tag.strip()
+                for suffix in CODING_SUFFIXES:
+                    if tag.endswith(suffix):
+                        client_etags[tag[:-len(suffix)] + '"'] = tag
+                        tag = tag[:-len(suffix)] + '"'
+                        break
+                tags.append(tag)
+            scope = dict(scope)
+            scope["headers"] = [(k, v) for k, v in scope["headers"] if k != b"if-none-match"]
+            scope["headers"].append((b"if-none-match", ", ".join(tags).encode("latin-1")))
+        await self.app(scope, receive, _Responder(self, scope, send, coding, client_etags))
+
+    async def compressed(self, scope, etag: Optional[str], body: bytes, coding: str) -> bytes:
+        key = (scope["path"], scope.get("query_string", b""), etag, coding) if etag else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        if len(body) >= OFFLOAD_SIZE:
+            encoded = await run_in_threadpool(compress, body, coding, self.gzip_level, self.brotli_quality)
+        else:
+            encoded = compress(body, coding, self.gzip_level, self.brotli_quality)
+        if key is not None:
+            self.cache.put(key, encoded)
+        return encoded
+
+
+class _Responder:
+    """The send() of one request: holds the response start until the body shows whether to compress"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope, send, coding: Optional[str],
+                 client_etags: Dict[str, str]):
+        self.middleware = middleware
+        self.scope = scope
+        self.downstream = send
+        self.coding = coding
+        self.client_etags = client_etags
+        self.start = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if self.passthrough:
+            await self.downstream(message)
+            return
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or content_type.startswith(SKIP_TYPES):
+                self.passthrough = True
+                await self.downstream(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if message["status"] == 304:
+                etag = headers.get("etag")
+                if etag in self.client_etags:
+                    headers["ETag"] = self.client_etags[etag]
+                self.passthrough = True
+                await self.downstream(message)
+                return
+            self.start = message
+            return
+
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            # Streamed: sent as it comes, uncompressed
+            self.passthrough = True
+            await self.downstream(self.start)
+            await self.downstream(message)
+            return
+        if self.coding is not None and len(body) >= self.middleware.minimum_size:
+            headers = MutableHeaders(raw=self.start["headers"])
+            etag = headers.get("etag") if self.start["status"] == 200 else None
+            body = await self.middleware.compressed(self.scope, etag, body, self.coding)
+            headers["Content-Encoding"] = self.coding
+            headers["Content-Length"] = str(len(body))
+            if "etag" in headers:
+                headers["ETag"] = coded_etag(headers["etag"], self.coding)
+            message = {**message, "body": body}
+        await self.downstream(self.start)
+        await self.downstream(message)
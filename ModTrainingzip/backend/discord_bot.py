@@ -4,9 +4,13 @@ import os
 from dotenv import load_dotenv
 import asyncio
 import logging
+import time
+from collections import OrderedDict
 from aiohttp import web
 import json
 
+import metrics
+
 load_dotenv()
 
 BOT_TOKEN = os.environ.get('DISCORD_BOT_TOKEN')
@@ -16,119 +20,266 @@ intents = discord.Intents.default()
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Calls to the Discord API are timed into /metrics by host and status
+bot = commands.Bot(command_prefix='!', intents=intents, http_trace=metrics.aiohttp_trace())
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Member lookups that missed the gateway cache are kept for a while, and users
+# who are not in the guild are remembered too, so retried and repeated
+# assignments do not go back to the REST API
+MEMBER_CACHE_SIZE = int(os.environ.get('MEMBER_CACHE_SIZE', '1000'))
+MEMBER_CACHE_TTL = float(os.environ.get('MEMBER_CACHE_TTL', '300'))
+MEMBER_NEGATIVE_TTL = float(os.environ.get('MEMBER_NEGATIVE_TTL', '60'))
+
+class TTLCache:
+    """Small LRU cache whose entries expire after a per-entry TTL"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+NOT_IN_GUILD = object()  # negative cache marker
+member_cache = TTLCache(MEMBER_CACHE_SIZE)
+metrics.register_gauge('bot_member_cache_entries', 'Members (and known non-members) cached', lambda: len(member_cache))
+
+# Role name -> id per guild; dropped by the role events below
+role_ids = {}
+role_create_lock = asyncio.Lock()
+
 @bot.event
 async def on_ready():
     logger.info(f'{bot.user} has connected to Discord!')
     logger.info(f'Bot is in {len(bot.guilds)} guilds')
 
-async def handle_role_request(request):
-    try:
-        data = await request.json()
-        user_id = data.get('user_id')
-        role_name = data.get('role_name', 'Verified Staff')
-        
-        if not user_id:
-            return web.json_response({'error': 'user_id is required'}, status=400)
-        
-        guild = bot.get_guild(SERVER_ID)
-        if not guild:
-            logger.error(f'Guild {SERVER_ID} not found')
-            return web.json_response({
-                'error': 'Guild not found',
-                'message': 'Bot is not connected to the specified server'
-            }, status=404)
-        
-        # Try to get member from cache first
-        member = guild.get_member(int(user_id))
-        
-        # If not in cache, try to fetch from API
-        if not member:
-            try:
-                member = await guild.fetch_member(int(user_id))
-            except discord.NotFound:
-                logger.warning(f'Member {user_id} not found in guild {guild.name}')
-                return web.json_response({
-                    'error': 'Member not found',
-                    'message': 'User is not a member of the server. Please ensure they have joined the Discord server first.'
-                }, status=404)
-            except discord.HTTPException as e:
-                logger.error(f'HTTP error fetching member {user_id}: {e}')
-                return web.json_response({
-                    'error': 'Failed to fetch member',
-                    'message': str(e)
-                }, status=500)
-        
-        # Get or create role
+def forget_role(role):
+    role_ids.pop((role.guild.id, role.name), None)
+
+@bot.event
+async def on_guild_role_create(role):
+    forget_role(role)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    forget_role(before)
+    forget_role(after)
+
+@bot.event
+async def on_guild_role_delete(role):
+    forget_role(role)
+
+@bot.event
+async def on_member_join(member):
+    member_cache.pop((member.guild.id, member.id))
+
+@bot.event
+async def on_member_update(before, after):
+    # Keep cached members' roles current so "already has role" stays accurate
+    if (after.guild.id, after.id) in member_cache:
+        member_cache.set((after.guild.id, after.id), after, MEMBER_CACHE_TTL)
+
+@bot.event
+async def on_member_remove(member):
+    member_cache.pop((member.guild.id, member.id))
+
+# Role assignments run concurrently in bulk requests; discord.py already
+# queues on per-route rate limits, this keeps a backlog from flooding them
+ROLE_ASSIGN_CONCURRENCY = int(os.environ.get('ROLE_ASSIGN_CONCURRENCY', '5'))
+MAX_BULK_USERS = 100
+
+class RoleRequestError(Exception):
+    """An error response for a role request, as (status, body)"""
+
+    def __init__(self, status, body):
+        super().__init__(body.get('message') or body.get('error'))
+        self.status = status
+        self.body = body
+
+def get_guild():
+    guild = bot.get_guild(SERVER_ID)
+    if not guild:
+        logger.error(f'Guild {SERVER_ID} not found')
+        raise RoleRequestError(404, {
+            'error': 'Guild not found',
+            'message': 'Bot is not connected to the specified server'
+        })
+    return guild
+
+def find_role(guild, role_name):
+    role_id = role_ids.get((guild.id, role_name))
+    role = guild.get_role(role_id) if role_id else None
+    if role is None or role.name != role_name:
         role = discord.utils.get(guild.roles, name=role_name)
-        if not role:
-            try:
-                role = await guild.create_role(
-                    name=role_name,
-                    color=discord.Color.green(),
-                    reason='Auto-created for mod training verification'
-                )
-                logger.info(f'Created new role: {role_name}')
-            except discord.Forbidden:
-                logger.error('Bot lacks permission to create roles')
-                return web.json_response({
-                    'error': 'Permission denied',
-                    'message': 'Bot does not have permission to create roles'
-                }, status=403)
+        if role:
+            role_ids[(guild.id, role_name)] = role.id
+    return role
+
+async def get_or_create_role(guild, role_name):
+    role = find_role(guild, role_name)
+    if role:
+        return role
+    # Concurrent requests must not each create the missing role
+    async with role_create_lock:
+        role = find_role(guild, role_name)
+        if role:
+            return role
+        try:
+            role = await guild.create_role(
+                name=role_name,
+                color=discord.Color.green(),
+                reason='Auto-created for mod training verification'
+            )
+            logger.info(f'Created new role: {role_name}')
+        except discord.Forbidden:
+            logger.error('Bot lacks permission to create roles')
+            raise RoleRequestError(403, {
+                'error': 'Permission denied',
+                'message': 'Bot does not have permission to create roles'
+            })
+    role_ids[(guild.id, role_name)] = role.id
+    return role
+
+def member_not_found(guild, user_id):
+    logger.warning(f'Member {user_id} not found in guild {guild.name}')
+    return RoleRequestError(404, {
+        'error': 'Member not found',
+        'message': 'User is not a member of the server. Please ensure they have joined the Discord server first.'
+    })
+
+async def get_member(guild, user_id):
+    try:
+        member_id = int(user_id)
+    except (TypeError, ValueError) as e:
+        logger.error(f'Invalid user_id format: {e}')
+        raise RoleRequestError(400, {
+            'error': 'Invalid user_id',
+            'message': 'user_id must be a valid Discord user ID (numeric)'
+        })
+    
+    # Try to get member from cache first
+    member = guild.get_member(member_id) or member_cache.get((guild.id, member_id))
+    if member is NOT_IN_GUILD:
+        raise member_not_found(guild, user_id)
+    if member:
+        return member
+    
+    # If not in cache, try to fetch from API
+    try:
+        member = await guild.fetch_member(member_id)
+        member_cache.set((guild.id, member_id), member, MEMBER_CACHE_TTL)
+        return member
+    except discord.NotFound:
+        member_cache.set((guild.id, member_id), NOT_IN_GUILD, MEMBER_NEGATIVE_TTL)
+        raise member_not_found(guild, user_id)
+    except discord.HTTPException as e:
+        logger.error(f'HTTP error fetching member {user_id}: {e}')
+        raise RoleRequestError(500, {
+            'error': 'Failed to fetch member',
+            'message': str(e)
+        })
+
+@metrics.timed('assign_role')
+async def assign_role(guild, role, user_id):
+    """Give one user the role and DM them; returns (status, body)"""
+    try:
+        member = await get_member(guild, user_id)
         
         # Check if member already has the role
         if role in member.roles:
-            logger.info(f'Member {member.name} already has role {role_name}')
-            return web.json_response({
+            logger.info(f'Member {member.name} already has role {role.name}')
+            return 200, {
                 'success': True,
-                'message': f'Member {member.name} already has role {role_name}',
+                'message': f'Member {member.name} already has role {role.name}',
                 'already_had_role': True
-            })
+            }
         
         # Add role to member
         try:
             await member.add_roles(role, reason='Passed mod training assessment')
-            logger.info(f'Successfully added role {role_name} to {member.name} ({member.id})')
-            
-            # Try to send DM to user
-            try:
-                await member.send(
-                    f'🎉 Congratulations! You have been verified as a staff member and received the **{role_name}** role in {guild.name}!'
-                )
-            except discord.Forbidden:
-                logger.warning(f'Could not send DM to {member.name} (DMs disabled or blocked)')
-            
-            return web.json_response({
-                'success': True,
-                'message': f'Role {role_name} successfully added to {member.name}',
-                'user': {
-                    'id': str(member.id),
-                    'name': member.name,
-                    'discriminator': member.discriminator,
-                    'display_name': member.display_name
-                },
-                'role': {
-                    'id': str(role.id),
-                    'name': role.name
-                }
-            })
         except discord.Forbidden:
             logger.error(f'Bot lacks permission to add roles to {member.name}')
-            return web.json_response({
+            return 403, {
                 'error': 'Permission denied',
                 'message': 'Bot does not have permission to add roles to members'
-            }, status=403)
-            
-    except ValueError as e:
-        logger.error(f'Invalid user_id format: {e}')
-        return web.json_response({
-            'error': 'Invalid user_id',
-            'message': 'user_id must be a valid Discord user ID (numeric)'
-        }, status=400)
+            }
+        logger.info(f'Successfully added role {role.name} to {member.name} ({member.id})')
+        # A REST-fetched member keeps the roles it was fetched with; drop it so a
+        # repeat assignment refetches it and sees the role instead of adding it (and DMing) again
+        member_cache.pop((guild.id, member.id))
+
+        # Try to send DM to user
+        try:
+            await member.send(
+                f'🎉 Congratulations! You have been verified as a staff member and received the **{role.name}** role in {guild.name}!'
+            )
+        except discord.Forbidden:
+            logger.warning(f'Could not send DM to {member.name} (DMs disabled or blocked)')
+        
+        return 200, {
+            'success': True,
+            'message': f'Role {role.name} successfully added to {member.name}',
+            'user': {
+                'id': str(member.id),
+                'name': member.name,
+                'discriminator': member.discriminator,
+                'display_name': member.display_name
+            },
+            'role': {
+                'id': str(role.id),
+                'name': role.name
+            }
+        }
+    except RoleRequestError as e:
+        return e.status, e.body
+    except discord.HTTPException as e:
+        logger.error(f'Discord error assigning role to {user_id}: {e}')
+        status = 429 if e.status == 429 else 500
+        return status, {'error': 'Discord API error', 'message': str(e)}
+
+async def handle_role_request(request):
+    try:
+        data = await request.json()
+        user_id = data.get('user_id')
+        role_name = data.get('role_name', 'Verified Staff')
+        
+        if not user_id:
+            return web.json_response({'error': 'user_id is required'}, status=400)
+        
+        guild = get_guild()
+        role = await get_or_create_role(guild, role_name)
+        status, body = await assign_role(guild, role, user_id)
+        return web.json_response(body, status=status)
+    except RoleRequestError as e:
+        return web.json_response(e.body, status=e.status)
     except Exception as e:
         logger.error(f'Error handling role request: {e}', exc_info=True)
         return web.json_response({
@@ -136,9 +287,57 @@ async def handle_role_request(request):
             'message': str(e)
         }, status=500)
 
+async def handle_bulk_role_request(request):
+    """Assign one role to many users: the guild and role are resolved once
+    
+    Body: {"user_ids": [...], "role_name": "Verified Staff"}. Each user gets
+    a result with the status code the single-user endpoint would have
+    returned, so callers can retry only the ones that failed.
+    """
+    try:
+        data = await request.json()
+        user_ids = data.get('user_ids')
+        role_name = data.get('role_name', 'Verified Staff')
+        
+        if not isinstance(user_ids, list) or not user_ids:
+            return web.json_response({'error': 'user_ids must be a non-empty list'}, status=400)
+        if len(user_ids) > MAX_BULK_USERS:
+            return web.json_response({'error': f'At most {MAX_BULK_USERS} user_ids per request'}, status=400)
+        
+        guild = get_guild()
+        role = await get_or_create_role(guild, role_name)
+        
+        semaphore = asyncio.Semaphore(ROLE_ASSIGN_CONCURRENCY)
+        
+        async def assign(user_id):
+            async with semaphore:
+                status, body = await assign_role(guild, role, user_id)
+            return {'user_id': str(user_id), 'status': status, **body}
+        
+        # Duplicates in one batch would race each other for the same member
+        results = await asyncio.gather(*(assign(user_id) for user_id in dict.fromkeys(user_ids)))
+        succeeded = sum(1 for result in results if result['status'] == 200)
+        logger.info(f'Bulk role request: {succeeded}/{len(results)} assigned {role_name}')
+        return web.json_response({
+            'success': succeeded == len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        })
+    except RoleRequestError as e:
+        return web.json_response(e.body, status=e.status)
+    except Exception as e:
+        logger.error(f'Error handling bulk role request: {e}', exc_info=True)
+        return web.json_response({
+            'error': 'Internal server error',
+            'message': str(e)
+        }, status=500)
+
 async def start_web_server():
-    app = web.Application()
+    app = web.Application(middlewares=[metrics.aiohttp_middleware()])
     app.router.add_post('/api/assign-role', handle_role_request)
+    app.router.add_post('/api/assign-roles', handle_bulk_role_request)
+    app.router.add_get('/metrics', metrics.aiohttp_handler)
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, '0.0.0.0', 8003)
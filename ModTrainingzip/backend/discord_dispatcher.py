@@ -0,0 +1,289 @@
+"""
+Rate-limit-aware Discord webhook dispatcher
+Tracks Discord's per-route rate-limit buckets from the X-RateLimit-* response
+headers and schedules webhook posts so they stay inside them instead of
+running into 429s. While a bucket is exhausted, queued notifications pile up
+and are then sent together: up to 10 embeds per message, with each
+submission's Approve/Deny buttons packed two submissions per action row.
+When Discord rejects a batched message, its embeds are re-sent one per
+message so only the embed at fault fails.
+"""
+
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+import httpx
+
+from job_queue import retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_ACTION_ROWS = 5
+MAX_BUTTONS_PER_ROW = 5
+MAX_429_RETRIES = 5
+MAX_FIELD_VALUE = 1024
+EMPTY_FIELD_VALUE = "\u2014"
+
+
+class WebhookDeliveryError(Exception):
+    """A webhook post failed with a non rate-limit error; carries the response"""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"Webhook post failed: {response.status_code} - {response.text}")
+        self.response = response
+
+
+def embed_field(name: str, value, inline: bool = False) -> dict:
+    """An embed field Discord accepts: values must be 1-1024 characters"""
+    value = str(value) if value is not None else ""
+    if not value.strip():
+        value = EMPTY_FIELD_VALUE
+    elif len(value) > MAX_FIELD_VALUE:
+        value = value[:MAX_FIELD_VALUE - 1] + "\u2026"
+    return {"name": name, "value": value, "inline": inline}
+
+
+class RateLimitBucket:
+    __slots__ = ("limit", "remaining", "reset_at")
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0  # time.monotonic() when the bucket refills
+
+
+class RateLimiter:
+    """Per-route bucket state learned from Discord's rate-limit headers"""
+
+    def __init__(self):
+        self._route_buckets: Dict[str, str] = {}
+        self._buckets: Dict[str, RateLimitBucket] = {}
+        self._global_reset_at = 0.0
+
+    def _bucket(self, route: str) -> RateLimitBucket:
+        key = self._route_buckets.get(route, route)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = RateLimitBucket()
+        return bucket
+
+    def delay(self, route: str) -> float:
+        """Seconds to wait before the next request on this route may be sent"""
+        now = time.monotonic()
+        wait = max(0.0, self._global_reset_at - now)
+        bucket = self._bucket(route)
+        if bucket.remaining is not None and bucket.remaining <= 0 and bucket.reset_at > now:
+            wait = max(wait, bucket.reset_at - now)
+        return wait
+
+    def consume(self, route: str):
+        """Count a request against the bucket before its response headers arrive"""
+        bucket = self._bucket(route)
+        if bucket.remaining is not None:
+            if bucket.reset_at <= time.monotonic() and bucket.limit is not None:
+                bucket.remaining = bucket.limit
+            bucket.remaining -= 1
+
+    def update(self, route: str, response: httpx.Response):
+        headers = response.headers
+        now = time.monotonic()
+        bucket_hash = headers.get("X-RateLimit-Bucket")
+        if bucket_hash:
+            self._route_buckets[route] = bucket_hash
+        bucket = self._bucket(route)
+        try:
+            if "X-RateLimit-Limit" in headers:
+                bucket.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                bucket.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset-After" in headers:
+                bucket.reset_at = now + float(headers["X-RateLimit-Reset-After"])
+        except ValueError:
+            logger.warning(f"Ignoring malformed rate-limit headers for {route}")
+
+        if response.status_code == 429:
+            retry_after = retry_after_seconds(response) or 1.0
+            if headers.get("X-RateLimit-Global", "").lower() == "true" or headers.get("X-RateLimit-Scope") == "global":
+                self._global_reset_at = now + retry_after
+            else:
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+
+
+class _Pending:
+    __slots__ = ("embed", "buttons", "label", "future", "attempts", "alone")
+
+    def __init__(self, embed: dict, buttons: List[dict], label: str, future: asyncio.Future):
+        self.embed = embed
+        self.buttons = buttons
+        self.label = label
+        self.future = future
+        self.attempts = 0
+        self.alone = False  # set once a batch it was in was rejected
+
+
+def _short_label(label: str, name: str) -> str:
+    # Discord caps button labels at 80 characters
+    return f"{label} {name}"[:80]
+
+
+def build_message(items: List[_Pending], link_button: Optional[dict] = None) -> dict:
+    """One webhook message for a batch of notifications"""
+    if len(items) == 1:
+        row = list(items[0].buttons)
+        if link_button:
+            row.append(link_button)
+        components = [{"type": 1, "components": row}] if row else []
+        return {"embeds": [items[0].embed], "components": components}
+
+    # Batched: relabel each submission's buttons with its name and pack two
+    # submissions (four buttons) per row, leaving room for the link button
+    buttons = []
+    for item in items:
+        for button in item.buttons:
+            buttons.append({**button, "label": _short_label(button["label"], item.label)})
+    rows = [buttons[i:i + 4] for i in range(0, len(buttons), 4)]
+    if link_button and rows and len(rows[-1]) < MAX_BUTTONS_PER_ROW:
+        rows[-1].append(link_button)
+    return {
+        "embeds": [item.embed for item in items],
+        "components": [{"type": 1, "components": row} for row in rows[:MAX_ACTION_ROWS]],
+    }
+
+
+class WebhookDispatcher:
+    """Serialises posts to one webhook URL, honouring its rate-limit bucket"""
+
+    def __init__(self, url: str, get_client: Callable[[], httpx.AsyncClient],
+                 link_button: Optional[dict] = None, linger: float = 0.05,
+                 max_embeds: int = MAX_EMBEDS_PER_MESSAGE):
+        self.url = url
+        self.route = f"POST {url.split('?')[0]}"
+        self.get_client = get_client
+        self.link_button = link_button
+        self.linger = linger
+        self.max_embeds = max_embeds
+        self.limiter = RateLimiter()
+        self._queue: List[_Pending] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.messages_sent = 0
+        self.embeds_sent = 0
+        self.rate_limited = 0
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for item in self._queue:
+            if not item.future.done():
+                item.future.set_exception(RuntimeError("Webhook dispatcher stopped"))
+        self._queue = []
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    async def send(self, embed: dict, buttons: Optional[List[dict]] = None, label: str = ""):
+        """Queue an embed (and its buttons) and wait until Discord has accepted it"""
+        if self._task is None or self._task.done():
+            # Not started yet, or the loop died: start a fresh one
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(_Pending(embed, buttons or [], label, future))
+        self._wakeup.set()
+        await future
+
+    def _take_batch(self) -> List[_Pending]:
+        # Every submission carries two buttons, so at most 10 fit in 5 rows of 4
+        limit = self.max_embeds
+        if any(item.buttons for item in self._queue[:limit]):
+            limit = min(limit, MAX_ACTION_ROWS * 2)
+        # Senders that gave up (cancelled) no longer want their embed posted
+        self._queue = [item for item in self._queue if not item.future.done()]
+        # Items from a rejected batch go out on their own
+        if self._queue and self._queue[0].alone:
+            limit = 1
+        else:
+            limit = next((i for i, item in enumerate(self._queue[:limit]) if item.alone), limit)
+        batch, self._queue = self._queue[:limit], self._queue[limit:]
+        return batch
+
+    async def _run(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # Give a burst a moment to accumulate, and wait out an exhausted bucket
+            await asyncio.sleep(self.linger)
+            delay = self.limiter.delay(self.route)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            batch = self._take_batch()
+            if batch:
+                try:
+                    await self._deliver(batch)
+                except Exception as e:
+                    # Fail this batch but keep the loop alive for everyone queued after it
+                    logger.exception("Webhook dispatcher failed delivering a batch")
+                    for item in batch:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+
+    async def _deliver(self, batch: List[_Pending]):
+        message = build_message(batch, self.link_button)
+        self.limiter.consume(self.route)
+        try:
+            response = await self.get_client().post(self.url, json=message, timeout=10.0)
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        self.limiter.update(self.route, response)
+
+        if response.status_code in (200, 204):
+            self.messages_sent += 1
+            self.embeds_sent += len(batch)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_result(None)
+            return
+
+        if response.status_code == 429:
+            self.rate_limited += 1
+            logger.warning(f"Discord webhook rate limited, retrying {len(batch)} embeds in "
+                           f"{self.limiter.delay(self.route):.2f}s")
+            retry = []
+            for item in batch:
+                item.attempts += 1
+                if item.attempts >= MAX_429_RETRIES:
+                    if not item.future.done():
+                        item.future.set_exception(WebhookDeliveryError(response))
+                else:
+                    retry.append(item)
+            # Back to the front of the queue so ordering is preserved
+            self._queue[:0] = retry
+            return
+
+        if len(batch) > 1 and 400 <= response.status_code < 500:
+            # One bad embed fails the whole message: find it by re-sending them one by one
+            logger.warning(f"Discord rejected a batch of {len(batch)} embeds "
+                           f"({response.status_code}), re-sending them separately")
+            for item in batch:
+                item.alone = True
+            self._queue[:0] = batch
+            return
+
+        error = WebhookDeliveryError(response)
+        for item in batch:
+            if not item.future.done():
+                item.future.set_exception(error)
@@ -2,14 +2,30 @@
 Discord Interaction Handler
 This script listens for Discord button interactions via webhooks
 and forwards them to the backend API for processing
+
+Button clicks are acknowledged with a deferred response straight away, so
+Discord's 3 second deadline never depends on the backend. The action is then
+processed in the background and the deferred reply is edited with the
+outcome through the interaction's followup webhook.
+
+Every request is checked against Discord's Ed25519 signature
+(X-Signature-Ed25519 over X-Signature-Timestamp + raw body) before its JSON
+is parsed; the application public key is loaded once at startup.
 """
 
 from aiohttp import web
-import httpx
+import asyncio
 import os
 from dotenv import load_dotenv
 import logging
 import json
+import time
+
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+
+import http_client
+import metrics
 
 load_dotenv()
 
@@ -17,13 +33,128 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BACKEND_API_URL = os.environ.get('BACKEND_API_URL', 'http://localhost:8080')
+DISCORD_API_BASE = os.environ.get('DISCORD_API_BASE', 'https://discord.com/api/v10')
+
+# Application public key from the Discord developer portal
+DISCORD_PUBLIC_KEY = os.environ.get('DISCORD_PUBLIC_KEY', '')
+# Log full interaction payloads (they contain user data, so off by default)
+INTERACTIONS_DEBUG = os.environ.get('INTERACTIONS_DEBUG', '0') == '1'
+# Reject signed requests whose timestamp is older than this (replays)
+MAX_SIGNATURE_AGE = 300
+
+def load_verify_key(public_key):
+    try:
+        return VerifyKey(bytes.fromhex(public_key))
+    except Exception:
+        logger.error("DISCORD_PUBLIC_KEY is missing or invalid; all interactions will be rejected")
+        return None
+
+verify_key = load_verify_key(DISCORD_PUBLIC_KEY)
+
+def is_valid_signature(signature, timestamp, body):
+    """Check Discord's Ed25519 signature over timestamp + raw body"""
+    if verify_key is None or not signature or not timestamp:
+        return False
+    # Cheap shape checks first: a 64-byte hex signature and a recent timestamp
+    if len(signature) != 128 or not timestamp.isdigit():
+        return False
+    if abs(time.time() - int(timestamp)) > MAX_SIGNATURE_AGE:
+        return False
+    try:
+        verify_key.verify(timestamp.encode() + body, bytes.fromhex(signature))
+        return True
+    except (BadSignatureError, ValueError):
+        return False
+
+# Backend calls are retried on connection errors and 5xx (e.g. a cold start);
+# the interaction token stays valid for 15 minutes
+BACKEND_ATTEMPTS = 4
+BACKEND_RETRY_DELAY = 2.0
+
+# Background tasks are referenced here so they are not garbage collected mid-flight
+pending_tasks = set()
+metrics.register_gauge('interaction_background_tasks', 'Button clicks still being processed', lambda: len(pending_tasks))
+
+@metrics.timed('forward_action')
+async def forward_action(submission_id, action, admin_user_id):
+    """POST the action to the backend; returns the message for the admin"""
+    client = http_client.get_client()
+    for attempt in range(1, BACKEND_ATTEMPTS + 1):
+        try:
+            response = await client.post(
+                f"{BACKEND_API_URL}/api/webhook/action",
+                json={
+                    'submission_id': submission_id,
+                    'action': action,
+                    'admin_user_id': admin_user_id
+                },
+                timeout=30.0
+            )
+        except Exception as e:
+            logger.warning(f"Backend call for {submission_id} failed (attempt {attempt}): {e}")
+            response = None
+        
+        if response is not None and response.status_code == 200:
+            result = response.json()
+            username = result["submission"]["username"]
+            if not result.get("changed", True):
+                # Someone else decided it first (here or in the admin panel)
+                return f'ℹ️ Submission for **{username}** was already {result["submission"]["status"]}'
+            action_text = "✅ Approved" if action == "approve" else "❌ Denied"
+            return f'{action_text} submission for **{username}**'
+        if response is not None and response.status_code < 500:
+            try:
+                detail = response.json().get("detail", "Unknown error")
+            except ValueError:
+                detail = response.text or "Unknown error"
+            return f'❌ Error: {detail}'
+        if attempt < BACKEND_ATTEMPTS:
+            await asyncio.sleep(BACKEND_RETRY_DELAY * attempt)
+    
+    return '❌ Error: the backend did not respond, please try again or use the admin panel'
+
+async def edit_original_response(data, content):
+    """Replace the deferred "thinking" reply with the final message"""
+    client = http_client.get_client()
+    url = f"{DISCORD_API_BASE}/webhooks/{data['application_id']}/{data['token']}/messages/@original"
+    response = await client.patch(url, json={'content': content}, timeout=10.0)
+    if response.status_code != 200:
+        logger.error(f"Failed to edit interaction response: {response.status_code} - {response.text}")
+
+async def process_button(data, action, submission_id, admin_user_id):
+    try:
+        content = await forward_action(submission_id, action, admin_user_id)
+    except Exception as e:
+        logger.error(f"Error processing interaction: {str(e)}", exc_info=True)
+        content = f'❌ Error processing interaction: {str(e)}'
+    try:
+        await edit_original_response(data, content)
+    except Exception as e:
+        logger.error(f"Error sending interaction followup: {str(e)}", exc_info=True)
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    pending_tasks.add(task)
+    task.add_done_callback(pending_tasks.discard)
 
 async def handle_interaction(request):
     """Handle Discord button interaction"""
+    body = await request.read()
+    if not is_valid_signature(
+        request.headers.get('X-Signature-Ed25519'),
+        request.headers.get('X-Signature-Timestamp'),
+        body
+    ):
+        return web.Response(status=401, text='invalid request signature')
+    
     try:
-        data = await request.json()
+        data = json.loads(body)
         
-        logger.info(f"Received Discord interaction: {json.dumps(data, indent=2)}")
+        if INTERACTIONS_DEBUG:
+            logger.info(f"Received Discord interaction: {json.dumps(data, indent=2)}")
+        else:
+            logger.info(f"Received Discord interaction type {data.get('type')} "
+                        f"({(data.get('data') or {}).get('custom_id', '-')})")
         
         # Extract interaction data
         interaction_type = data.get('type')
@@ -46,39 +177,13 @@ async def handle_interaction(request):
             
             action, submission_id = parts
             
-            # Forward to backend API
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{BACKEND_API_URL}/api/webhook/action",
-                    json={
-                        'submission_id': submission_id,
-                        'action': action,
-                        'admin_user_id': user['id']
-                    },
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    action_text = "✅ Approved" if action == "approve" else "❌ Denied"
-                    
-                    # Send acknowledgment response
-                    return web.json_response({
-                        'type': 4,
-                        'data': {
-                            'content': f'{action_text} submission for **{result["submission"]["username"]}**',
-                            'flags': 64  # Ephemeral
-                        }
-                    })
-                else:
-                    error_data = response.json()
-                    return web.json_response({
-                        'type': 4,
-                        'data': {
-                            'content': f'❌ Error: {error_data.get("detail", "Unknown error")}',
-                            'flags': 64
-                        }
-                    })
+            # Acknowledge now with an ephemeral "thinking" reply and finish in
+            # the background, so a slow backend cannot miss Discord's deadline
+            run_in_background(process_button(data, action, submission_id, user['id']))
+            return web.json_response({
+                'type': 5,  # DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+                'data': {'flags': 64}  # Ephemeral
+            })
         
         # Type 1 = PING (verification)
         elif interaction_type == 1:
@@ -105,9 +210,18 @@ async def handle_interaction(request):
 async def health_check(request):
     return web.json_response({'status': 'healthy'})
 
-app = web.Application()
+async def finish_pending(app):
+    # Let in-flight followups complete before the client is closed
+    if pending_tasks:
+        await asyncio.wait(set(pending_tasks), timeout=10)
+
+app = web.Application(middlewares=[metrics.aiohttp_middleware()])
+app.on_startup.append(http_client.aiohttp_startup)
+app.on_shutdown.append(finish_pending)
+app.on_cleanup.append(http_client.aiohttp_cleanup)
 app.router.add_post('/interactions', handle_interaction)
 app.router.add_get('/health', health_check)
+app.router.add_get('/metrics', metrics.aiohttp_handler)
 
 if __name__ == '__main__':
     port = int(os.environ.get('INTERACTION_PORT', 8004))
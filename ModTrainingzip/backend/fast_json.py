@@ -0,0 +1,69 @@
+"""
+Fast JSON encoding for API responses
+orjson 3.9+ when it is installed (the standard json module otherwise), a
+response class that renders with it, and helpers to assemble list responses
+from already-encoded records: a JSON array is just the records' bytes joined
+with commas, so a poll over unchanged submissions re-encodes nothing.
+
+Endpoints that return dicts still go through FastAPI's jsonable_encoder
+before rendering; the hot submission endpoints return JSONBytes instead,
+built from the stores' *_json methods.
+"""
+
+from typing import Any, Iterable, List, Optional
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+# fragment() needs orjson.Fragment (3.9); an older orjson gets the json path too
+if orjson is not None and not hasattr(orjson, "Fragment"):
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def fragment(raw: str) -> Any:
+    """Embed text that is already JSON as a value in an object passed to dumps"""
+    if orjson is not None:
+        return orjson.Fragment(raw)
+    return json.loads(raw)
+
+
+def array(items: Iterable[bytes]) -> bytes:
+    """A JSON array from encoded items"""
+    return b"[" + b",".join(items) + b"]"
+
+
+def page(items: Iterable[bytes], next_cursor: Optional[str]) -> bytes:
+    """The {"submissions": [...], "next_cursor": ...} body of a keyset page"""
+    return b'{"submissions":' + array(items) + b',"next_cursor":' + dumps(next_cursor) + b"}"
+
+
+def changes(version: int, items: Optional[Iterable[bytes]], deleted: Optional[List[str]]) -> bytes:
+    """The body of a since=<version> delta; items None means the client has to reset"""
+    if items is None:
+        return b'{"version":' + dumps(version) + b',"reset":true}'
+    return (b'{"version":' + dumps(version) + b',"reset":false,"submissions":' + array(items)
+            + b',"deleted":' + dumps(deleted) + b"}")
+
+
+class FastJSONResponse(JSONResponse):
+    """App-wide default response class"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class JSONBytes(JSONResponse):
+    """A response whose body is already encoded JSON"""
+
+    def render(self, content: bytes) -> bytes:
+        return content
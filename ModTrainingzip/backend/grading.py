@@ -0,0 +1,150 @@
+"""
+Server-side answer grading
+Grades test answers with the same question bank the frontend shows
+(frontend/src/lib/testQuestions.json), so a submission's is_correct, score
+and passed are computed here rather than trusted from the browser.
+
+The rule matches the frontend's checkAnswer: an answer is correct when at
+least matchThreshold percent of the question's keywords occur in it as
+case-insensitive substrings. Keywords are lowercased once when the bank is
+loaded and each question knows how many hits it needs, so grading an answer
+is one lower() plus substring searches that stop as soon as the verdict is
+settled.
+"""
+
+from typing import Dict, Iterable, List, Optional
+import json
+import os
+
+from metrics import timed
+
+QUESTIONS_PATH = os.environ.get(
+    "QUESTIONS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "src", "lib", "testQuestions.json"),
+)
+
+
+class QuestionMatcher:
+    """One question's keywords, prepared for repeated grading"""
+
+    __slots__ = ("keywords", "needed")
+
+    def __init__(self, keywords: List[str], match_threshold: float):
+        self.keywords = tuple(keyword.lower() for keyword in keywords)
+        n = len(self.keywords)
+        # Fewest hits that reach the threshold, using the frontend's arithmetic
+        self.needed = next((k for k in range(n + 1) if n and k / n * 100 >= match_threshold), n + 1)
+
+    def matches(self, answer: str) -> List[int]:
+        """Indexes of the keywords found in the answer"""
+        answer = answer.lower()
+        return [i for i, keyword in enumerate(self.keywords) if keyword in answer]
+
+    def is_correct(self, answer: str) -> bool:
+        answer = answer.lower()
+        needed = self.needed
+        remaining = len(self.keywords)
+        for keyword in self.keywords:
+            if keyword in answer:
+                needed -= 1
+                if needed <= 0:
+                    return True
+            remaining -= 1
+            if remaining < needed:
+                return False
+        return needed <= 0
+
+
+class Grader:
+    def __init__(self, questions: List[dict], match_threshold: float = 30, pass_score: float = 80):
+        self.questions = questions
+        self.match_threshold = match_threshold
+        self.pass_score = pass_score
+        self.matchers: Dict[int, QuestionMatcher] = {
+            question["id"]: QuestionMatcher(question["keywords"], match_threshold) for question in questions
+        }
+
+    @classmethod
+    def from_file(cls, path: str = QUESTIONS_PATH) -> "Grader":
+        with open(path, encoding="utf-8") as f:
+            bank = json.load(f)
+        return cls(bank["questions"], bank.get("matchThreshold", 30), bank.get("passScore", 80))
+
+    def check_answer(self, question_id: int, answer: str) -> bool:
+        matcher = self.matchers.get(question_id)
+        if matcher is None:
+            return False
+        return matcher.is_correct(answer or "")
+
+    def grade(self, answers: Iterable[dict]) -> dict:
+        """Grade submitted answers; returns answers, score and passed
+
+        Answers are matched to questions by question_number (1-based, in bank
+        order); questions without an answer count as incorrect, and the
+        question text always comes from the bank.
+        """
+        texts = self.answer_texts(answers)
+        verdicts = [self.check_answer(q["id"], text) for q, text in zip(self.questions, texts)]
+        return self.result(texts, verdicts)
+
+    def answer_texts(self, answers: Iterable[dict]) -> List[str]:
+        """The submitted answer to each bank question, in bank order ("" if missing)"""
+        by_number = {}
+        for answer in answers:
+            by_number[int(answer["question_number"])] = answer.get("user_answer") or ""
+        return [by_number.get(number, "") for number in range(1, len(self.questions) + 1)]
+
+    def result(self, texts: List[str], verdicts: List[bool]) -> dict:
+        """Stored answers, score and passed for per-question verdicts"""
+        graded = [
+            {
+                "question_number": number,
+                "question": question["question"],
+                "user_answer": text,
+                "is_correct": bool(verdict),
+            }
+            for number, (question, text, verdict) in enumerate(zip(self.questions, texts, verdicts), start=1)
+        ]
+        score = self.score(sum(1 for verdict in verdicts if verdict))
+        return {"answers": graded, "score": score, "passed": score >= self.pass_score}
+
+    def score(self, correct: int) -> float:
+        return correct / len(self.questions) * 100 if self.questions else 0.0
+
+
+_grader: Optional[Grader] = None
+_grader_mtime: Optional[float] = None
+
+
+def _bank_mtime() -> Optional[float]:
+    try:
+        return os.stat(QUESTIONS_PATH).st_mtime
+    except OSError:
+        return None
+
+
+def get_grader() -> Grader:
+    """The process-wide grader, loaded from QUESTIONS_PATH on first use
+
+    Reloaded when the file changes, so every server process picks up an
+    edited bank (e.g. after another process ran a re-grade)
+    """
+    global _grader, _grader_mtime
+    mtime = _bank_mtime()
+    if _grader is None or mtime != _grader_mtime:
+        _grader = Grader.from_file()
+        _grader_mtime = mtime
+    return _grader
+
+
+def reload_grader() -> Grader:
+    """Re-read the question bank, e.g. after its keywords were edited"""
+    global _grader, _grader_mtime
+    _grader_mtime = _bank_mtime()
+    _grader = Grader.from_file()
+    return _grader
+
+
+@timed("grade_submission")
+def grade_answers(answers: Iterable[dict]) -> dict:
+    return get_grader().grade(answers)
@@ -0,0 +1,105 @@
+"""
+Shared outbound HTTP client
+One httpx.AsyncClient per process for every call to Discord and the bot API,
+so connections (and their TCP/TLS handshakes) are reused via keep-alive
+instead of being set up for each request. Created and closed by the app's
+lifespan; HTTP/2 is used when the h2 package is installed.
+
+Tuning (environment):
+    HTTP_MAX_CONNECTIONS      total pooled connections (default 100)
+    HTTP_MAX_KEEPALIVE        idle connections kept open (default 20)
+    HTTP_KEEPALIVE_EXPIRY     seconds an idle connection is kept (default 30)
+    HTTP_CONNECT_TIMEOUT      connect timeout in seconds (default 5)
+    HTTP_TIMEOUT              default read/write/pool timeout in seconds (default 15)
+    HTTP2                     set to 0 to disable HTTP/2
+"""
+
+from contextlib import asynccontextmanager
+from typing import Optional
+import logging
+import os
+
+import httpx
+
+from metrics import InstrumentedTransport
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "15"))
+
+
+def _http2_available() -> bool:
+    if os.environ.get("HTTP2", "1") == "0":
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def create_client(**overrides) -> httpx.AsyncClient:
+    """Build a pooled client from the configured limits; overrides go to httpx.AsyncClient
+
+    Every request is timed into outbound_request_duration_seconds (see metrics).
+    """
+    transport = overrides.pop("transport", None) or httpx.AsyncHTTPTransport(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        verify=overrides.pop("verify", True),
+    )
+    return httpx.AsyncClient(
+        transport=InstrumentedTransport(transport),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        **overrides,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide client, creating it if the lifespan has not run yet"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def start():
+    get_client()
+    logger.info(f"Shared HTTP client ready (http2={_http2_available()}, "
+                f"max_connections={HTTP_MAX_CONNECTIONS})")
+
+
+async def stop():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """FastAPI lifespan that owns the shared client"""
+    await start()
+    try:
+        yield
+    finally:
+        await stop()
+
+
+async def aiohttp_startup(app):
+    await start()
+
+
+async def aiohttp_cleanup(app):
+    await stop()
@@ -0,0 +1,400 @@
+"""
+Durable outbound job queue
+Persists outbound work (Discord webhook posts, bot role assignments) in a
+local SQLite table and drains it with a small pool of asyncio workers, so a
+process restart or a Discord outage no longer loses notifications.
+
+Failed jobs are retried with exponential backoff and full jitter, or after
+exactly the delay the remote asked for (429 Retry-After). Jobs that keep
+failing, or fail permanently, are parked in a dead-letter list that admins
+can inspect and requeue. JOB_QUEUE_RATE caps how many jobs per second start
+across all workers, so a burst of approvals drains at a controlled pace.
+
+Kinds registered with batch_size > 1 are claimed together: a worker takes up
+to that many due jobs of the kind at once and hands all their payloads to
+one handler call, which reports success or an exception per job.
+
+Jobs enqueued with a dedup_key are single-flight: while a job of the same
+kind and key is queued or running, enqueueing another returns that job
+instead, so e.g. repeated approvals of one user share one role assignment.
+
+Several processes can drain the same database. A claimed job holds a lease
+(JOB_LEASE_SECONDS); if its process dies, any process picks the job up again
+once the lease has expired, and a clean shutdown hands its jobs back at once.
+"""
+
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_DB = os.environ.get("JOB_QUEUE_DB", "jobs.db")
+JOB_QUEUE_WORKERS = int(os.environ.get("JOB_QUEUE_WORKERS", "10"))
+JOB_QUEUE_RATE = float(os.environ.get("JOB_QUEUE_RATE", "5"))  # job starts per second, 0 = unlimited
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "8"))
+JOB_BACKOFF_BASE = float(os.environ.get("JOB_BACKOFF_BASE", "1"))
+JOB_BACKOFF_CAP = float(os.environ.get("JOB_BACKOFF_CAP", "300"))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "300"))
+POLL_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_run_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT,
+    owner TEXT,
+    lease_until REAL,
+    dedup_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, next_run_at);
+"""
+
+# Columns added after the first release, created on older databases at startup
+MIGRATIONS = {
+    "owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+    "lease_until": "ALTER TABLE jobs ADD COLUMN lease_until REAL",
+    "dedup_key": "ALTER TABLE jobs ADD COLUMN dedup_key TEXT",
+}
+
+JobHandler = Callable[[dict], Awaitable[None]]
+# Batch handlers return one entry per payload: None on success or the exception
+BatchJobHandler = Callable[[List[dict]], Awaitable[List[Optional[Exception]]]]
+
+
+class JobError(Exception):
+    """Raised by a handler to request a retry, optionally after a fixed delay"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job is dead-lettered at once"""
+
+
+class JobQueue:
+    """SQLite-backed job queue drained by a pool of asyncio workers"""
+
+    def __init__(self, path: str = JOB_QUEUE_DB, workers: int = JOB_QUEUE_WORKERS,
+                 rate: float = JOB_QUEUE_RATE, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.workers = workers
+        self.rate = rate
+        self.max_attempts = max_attempts
+        self.handlers: Dict[str, Union[JobHandler, BatchJobHandler]] = {}
+        self.batch_sizes: Dict[str, int] = {}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # busy_timeout first: other worker processes may be opening the same file
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                try:
+                    self._conn.execute(statement)
+                except sqlite3.OperationalError as e:
+                    if "duplicate column" not in str(e):  # another process migrated first
+                        raise
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs (kind, dedup_key)")
+        self._owner = uuid.uuid4().hex  # marks the jobs this process has claimed
+
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._next_start = 0.0
+        self._throttle_lock: Optional[asyncio.Lock] = None
+
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+        self.coalesced = 0
+        self._latencies = deque(maxlen=1000)  # enqueue -> completion, seconds
+
+    def register(self, kind: str, handler: Union[JobHandler, BatchJobHandler], batch_size: int = 1):
+        """Register a handler; with batch_size > 1 it receives a list of payloads"""
+        self.handlers[kind] = handler
+        self.batch_sizes[kind] = batch_size
+
+    def enqueue(self, kind: str, payload: dict, delay: float = 0.0, dedup_key: Optional[str] = None) -> int:
+        """Persist a job; it survives restarts until a worker completes it
+
+        With dedup_key, a queued or running job of the same kind and key
+        absorbs this one: its id is returned and nothing new is stored
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = None
+                if dedup_key is not None:
+                    existing = self._conn.execute(
+                        "SELECT id FROM jobs WHERE kind = ? AND dedup_key = ? AND status IN ('queued', 'running') "
+                        "LIMIT 1",
+                        (kind, dedup_key),
+                    ).fetchone()
+                if existing is None:
+                    job_id = self._conn.execute(
+                        "INSERT INTO jobs (kind, payload, next_run_at, created_at, updated_at, dedup_key) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (kind, json.dumps(payload, separators=(",", ":")), now + delay, now, now, dedup_key),
+                    ).lastrowid
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if existing is not None:
+            self.coalesced += 1
+            return existing[0]
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    # Worker pool
+
+    async def start(self):
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._throttle_lock = asyncio.Lock()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers ({self.depth()} jobs queued)")
+
+    async def stop(self):
+        # Workers also check the flag: on Python < 3.12 wait_for can swallow a
+        # cancellation that races its timeout, leaving the worker looping
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        with self._lock:
+            # Hand back this process's unfinished jobs; other processes keep theirs
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, lease_until = NULL "
+                "WHERE status = 'running' AND owner = ?",
+                (self._owner,),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _claim(self) -> List[dict]:
+        """Claim the next due job, plus more due jobs of its kind if it is batched"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose process died mid-flight run again once their lease is up
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', owner = NULL, lease_until = NULL "
+                    "WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)",
+                    (now,),
+                )
+                rows = self._conn.execute(
+                    "SELECT id, kind, payload, attempts, created_at FROM jobs "
+                    "WHERE status = 'queued' AND next_run_at <= ? ORDER BY next_run_at, id LIMIT 1",
+                    (now,),
+                ).fetchall()
+                batch_size = self.batch_sizes.get(rows[0][1], 1) if rows else 1
+                if batch_size > 1:
+                    rows += self._conn.execute(
+                        "SELECT id, kind, payload, attempts, created_at FROM jobs "
+                        "WHERE status = 'queued' AND next_run_at <= ? AND kind = ? AND id != ? "
+                        "ORDER BY next_run_at, id LIMIT ?",
+                        (now, rows[0][1], rows[0][0], batch_size - 1),
+                    ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+                        [(self._owner, now + JOB_LEASE_SECONDS, now, row[0]) for row in rows],
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            {"id": row[0], "kind": row[1], "payload": json.loads(row[2]),
+             "attempts": row[3], "created_at": row[4]}
+            for row in rows
+        ]
+
+    def _seconds_until_due(self) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_run_at) FROM jobs WHERE status = 'queued'"
+            ).fetchone()
+        if row[0] is None:
+            return POLL_INTERVAL
+        return max(0.0, min(row[0] - time.time(), POLL_INTERVAL))
+
+    async def _throttle(self):
+        if self.rate <= 0:
+            return
+        async with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + 1.0 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _worker(self, n: int):
+        while not self._stopping:
+            try:
+                jobs = self._claim()
+                if not jobs:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self._seconds_until_due())
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._throttle()
+                await self._run(jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {n} error: {e}", exc_info=True)
+                await asyncio.sleep(POLL_INTERVAL)
+
+    async def _run(self, jobs: List[dict]):
+        kind = jobs[0]["kind"]
+        handler = self.handlers.get(kind)
+        try:
+            if handler is None:
+                raise PermanentJobError(f"No handler registered for job kind '{kind}'")
+            if self.batch_sizes.get(kind, 1) > 1:
+                errors = await handler([job["payload"] for job in jobs])
+            else:
+                await handler(jobs[0]["payload"])
+                errors = [None]
+        except Exception as e:
+            errors = [e] * len(jobs)
+        for job, error in zip(jobs, errors):
+            self._settle(job, error)
+
+    def _settle(self, job: dict, error: Optional[Exception]):
+        attempts = job["attempts"] + 1
+        if error is None:
+            with self._lock:
+                self._conn.execute("DELETE FROM jobs WHERE id = ?", (job["id"],))
+            self.completed += 1
+            self._latencies.append(time.time() - job["created_at"])
+        elif isinstance(error, PermanentJobError) or attempts >= self.max_attempts:
+            self._bury(job["id"], attempts, str(error))
+        else:
+            retry_after = getattr(error, "retry_after", None)
+            if retry_after is None:
+                # Exponential backoff with full jitter
+                retry_after = random.uniform(0, min(JOB_BACKOFF_CAP, JOB_BACKOFF_BASE * 2 ** attempts))
+            self._reschedule(job["id"], attempts, retry_after, str(error))
+            logger.warning(f"Job {job['id']} ({job['kind']}) failed, retry {attempts} in {retry_after:.1f}s: {error}")
+
+    def _reschedule(self, job_id: int, attempts: int, delay: float, error: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = ?, next_run_at = ?, updated_at = ?, last_error = ? "
+                "WHERE id = ?",
+                (attempts, now + delay, now, error, job_id),
+            )
+        self.retried += 1
+
+    def _bury(self, job_id: int, attempts: int, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'dead', attempts = ?, updated_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time(), error, job_id),
+            )
+        self.dead += 1
+        logger.error(f"Job {job_id} moved to dead-letter list after {attempts} attempts: {error}")
+
+    # Introspection
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status != 'dead'").fetchone()[0]
+
+    def dead_letters(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, payload, attempts, created_at, updated_at, last_error FROM jobs "
+                "WHERE status = 'dead' ORDER BY updated_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {"id": r[0], "kind": r[1], "payload": json.loads(r[2]), "attempts": r[3],
+             "created_at": r[4], "failed_at": r[5], "last_error": r[6]}
+            for r in rows
+        ]
+
+    def retry_dead(self, job_id: int) -> bool:
+        """Move a dead-lettered job back onto the queue with a fresh attempt budget"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, next_run_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'dead'",
+                (now, now, job_id),
+            )
+        if cursor.rowcount and self._wakeup is not None:
+            self._wakeup.set()
+        return bool(cursor.rowcount)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            by_status = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall())
+            oldest = self._conn.execute(
+                "SELECT MIN(created_at) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+        latencies = sorted(self._latencies)
+        return {
+            "queued": by_status.get("queued", 0),
+            "running": by_status.get("running", 0),
+            "dead": by_status.get("dead", 0),
+            "completed_total": self.completed,
+            "retried_total": self.retried,
+            "dead_lettered_total": self.dead,
+            "coalesced_total": self.coalesced,
+            "oldest_queued_age_seconds": round(time.time() - oldest, 3) if oldest else 0,
+            "latency_seconds": {
+                "avg": round(sum(latencies) / len(latencies), 3) if latencies else 0,
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else 0,
+                "max": round(latencies[-1], 3) if latencies else 0,
+            },
+        }
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Delay requested by a 429 response (Retry-After header or Discord's JSON body)"""
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        return float(response.json().get("retry_after"))
+    except Exception:
+        return None
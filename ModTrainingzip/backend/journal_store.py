@@ -0,0 +1,215 @@
+"""
+Journaled in-memory submission store
+Keeps the indexed SubmissionStore in memory and makes it durable with an
+append-only journal of put/update/delete events instead of rewriting the
+whole dataset on every change. Request handlers only append an event to a
+buffer; a background thread writes buffered events in batches with a single
+fsync per batch (group commit), and periodically compacts the journal into a
+snapshot so startup only has to load the snapshot and replay a short tail.
+
+Files (for path="submissions"):
+    submissions.snapshot.json  compact snapshot of all submissions
+    submissions.journal        JSON-lines events written after the snapshot
+"""
+
+from typing import Iterable, List, Optional
+import atexit
+import json
+import logging
+import os
+import threading
+
+from submission_store import SubmissionStore
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.environ.get("JOURNAL_FLUSH_INTERVAL", "0.05"))
+COMPACT_EVERY = int(os.environ.get("JOURNAL_COMPACT_EVERY", "10000"))
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _fsync_dir(path: str):
+    # Make the rename of a snapshot/journal durable as well as its contents
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class JournaledSubmissionStore(SubmissionStore):
+    """SubmissionStore persisted through an append-only journal plus snapshots"""
+
+    persistent = True
+
+    def __init__(self, path: str = "submissions", flush_interval: float = FLUSH_INTERVAL,
+                 compact_every: int = COMPACT_EVERY):
+        super().__init__()
+        self.snapshot_path = f"{path}.snapshot.json"
+        self.journal_path = f"{path}.journal"
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._pending: List[str] = []
+        self._io_lock = threading.Lock()  # serialises journal/snapshot file access
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+
+        self._recover()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # Recovery
+
+    def _recover(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            for submission in snapshot.get("submissions", []):
+                super().add(submission)
+            self._seq = self._snapshot_seq = snapshot.get("seq", 0)
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-write; everything before it is intact
+                        logger.warning(f"Ignoring truncated journal entry in {self.journal_path}")
+                        break
+                    if event["seq"] <= self._snapshot_seq:
+                        continue
+                    self._apply(event)
+                    self._seq = event["seq"]
+                    replayed += 1
+        logger.info(f"Recovered {len(self)} submissions ({replayed} journal events replayed)")
+
+    def _apply(self, event: dict):
+        op = event["op"]
+        if op == "put":
+            super().add(event["data"])
+        elif op == "update":
+            super().update(event["id"], **event["fields"])
+        elif op == "delete":
+            super().delete(event["id"])
+
+    # Writes: mutate memory, then queue the event for the flusher
+
+    def _log(self, event: dict):
+        self._seq += 1
+        event["seq"] = self._seq
+        self._pending.append(_dumps(event))
+
+    def add(self, submission: dict) -> dict:
+        with self._lock:
+            super().add(submission)
+            self._log({"op": "put", "data": submission})
+            return submission
+
+    def update(self, submission_id: str, **fields) -> Optional[dict]:
+        with self._lock:
+            submission = super().update(submission_id, **fields)
+            if submission is not None:
+                self._log({"op": "update", "id": submission_id, "fields": fields})
+            return submission
+
+    def delete(self, submission_id: str) -> Optional[dict]:
+        with self._lock:
+            submission = super().delete(submission_id)
+            if submission is not None:
+                self._log({"op": "delete", "id": submission_id})
+            return submission
+
+    def add_many(self, submissions: Iterable[dict]) -> int:
+        added = 0
+        with self._lock:
+            for submission in submissions:
+                if submission["id"] not in self:
+                    self.add(submission)
+                    added += 1
+        return added
+
+    def import_json(self, path: str) -> int:
+        """Import submissions from an api_server submissions_data.json dump"""
+        with open(path, "r") as f:
+            data = json.load(f)
+        submissions = data.get("submissions", []) if isinstance(data, dict) else data
+        imported = self.add_many(submissions)
+        logger.info(f"Imported {imported} of {len(submissions)} submissions from {path}")
+        return imported
+
+    # Background flushing and compaction
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                if not self._pending and not self._closed:
+                    self._wakeup.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+                if self._seq - self._snapshot_seq >= self.compact_every:
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Journal flush failed: {e}", exc_info=True)
+
+    def flush(self):
+        """Write all buffered events with a single fsync"""
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            self._journal.write("\n".join(batch) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+    def compact(self):
+        """Write a snapshot of the current state and drop the journal entries it covers"""
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                seq = self._seq
+                submissions = [dict(s) for s in self.list()]
+            if batch:
+                self._journal.write("\n".join(batch) + "\n")
+
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(_dumps({"seq": seq, "submissions": submissions}))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            _fsync_dir(self.snapshot_path)
+
+            # Every event up to seq is in the snapshot, so start a fresh journal
+            self._journal.close()
+            self._journal = open(self.journal_path, "w", encoding="utf-8")
+            os.fsync(self._journal.fileno())
+            self._snapshot_seq = seq
+        logger.info(f"Compacted journal into snapshot at seq {seq} ({len(submissions)} submissions)")
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify_all()
+        self._flusher.join()
+        self.flush()
+        self._journal.close()
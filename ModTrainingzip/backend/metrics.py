@@ -0,0 +1,271 @@
+"""
+Prometheus metrics for the backend, the Discord bot and the interactions service
+Each service serves its own /metrics. What is measured:
+
+    http_request_duration_seconds      inbound requests by method, route template and status
+    outbound_request_duration_seconds  calls to Discord and the bot API by host, method and status
+                                       ("error" when no response came back)
+    task_duration_seconds              anything wrapped in @timed / with track(), by task name
+    submission_guard_total             submission POSTs answered by the duplicate / rate guard,
+                                       by outcome ("replayed", "rate_limited")
+    plus the gauges services register with register_gauge (store size, queue depth, ...)
+
+Instrumenting a new hot path is one line: decorate it with @timed("name")
+(sync or async), or wrap a block in `with track("name"):`. Web apps get the
+request histogram from PrometheusMiddleware (ASGI) or aiohttp_middleware,
+outbound httpx clients from InstrumentedTransport and aiohttp sessions
+(discord.py's) from aiohttp_trace().
+
+When the API runs several worker processes, serve.py points
+PROMETHEUS_MULTIPROC_DIR at a shared directory and /metrics adds up the
+counters and histograms of every worker. Gauges registered with
+register_gauge are read when /metrics is scraped, so they must report
+shared state (the SQLite store and job queue), not per-process state.
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+import functools
+import inspect
+import logging
+import os
+import time
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Request latencies from a cached read (~1 ms) to a slow Discord call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts, by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+OUTBOUND_REQUEST_SECONDS = Histogram(
+    "outbound_request_duration_seconds",
+    "Outbound calls to Discord and the bot API, until the response headers arrive",
+    ["host", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+TASK_SECONDS = Histogram(
+    "task_duration_seconds",
+    "Time spent in instrumented functions and blocks",
+    ["task"],
+    buckets=LATENCY_BUCKETS,
+)
+TASK_ERRORS = Counter(
+    "task_errors_total",
+    "Instrumented functions and blocks that raised",
+    ["task"],
+)
+
+SUBMISSION_GUARD = Counter(
+    "submission_guard_total",
+    "Submission requests answered without creating a submission",
+    ["outcome"],
+)
+
+GaugeValue = Union[float, Dict[Tuple[str, ...], float]]
+_gauges: List[Tuple[str, str, Tuple[str, ...], Callable[[], GaugeValue]]] = []
+
+
+def register_gauge(name: str, documentation: str, read: Callable[[], GaugeValue], labelnames: Tuple[str, ...] = ()):
+    """Expose a value that is read at scrape time
+
+    read returns a number, or with labelnames a dict of label-value tuples
+    to numbers. A failing read is logged and the gauge left out of that scrape.
+    """
+    _gauges.append((name, documentation, tuple(labelnames), read))
+
+
+class _GaugeCollector:
+    def collect(self):
+        for name, documentation, labelnames, read in _gauges:
+            try:
+                value = read()
+            except Exception as e:
+                logger.warning(f"Could not read gauge {name}: {e}")
+                continue
+            family = GaugeMetricFamily(name, documentation, labels=labelnames)
+            if labelnames:
+                for labels, sample in value.items():
+                    family.add_metric(list(labels), sample)
+            else:
+                family.add_metric([], value)
+            yield family
+
+
+_gauge_collector = _GaugeCollector()
+if not MULTIPROCESS:
+    REGISTRY.register(_gauge_collector)
+
+
+def render() -> bytes:
+    """The current metrics in the Prometheus text format"""
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_gauge_collector)
+    return generate_latest(registry)
+
+
+def process_exit():
+    """Call when a worker shuts down so its live gauges stop counting"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+@contextmanager
+def track(task: str) -> Iterator[None]:
+    """Time a block as task_duration_seconds{task=...}"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        TASK_ERRORS.labels(task).inc()
+        raise
+    finally:
+        TASK_SECONDS.labels(task).observe(time.perf_counter() - start)
+
+
+def timed(task: str):
+    """Decorator: time every call of a sync or async function under task"""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with track(task):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with track(task):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording http_request_duration_seconds
+
+    Routes are labelled by their template (/api/submissions/{submission_id}),
+    never the raw path, so ids do not multiply the series; requests that
+    match no route share "unmatched". Latency is measured to the start of
+    the response, which keeps long-lived streams (the SSE feed) meaningful.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        observed = False
+
+        def observe(status: int):
+            nonlocal observed
+            observed = True
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - start)
+
+        async def send_observed(message):
+            if message["type"] == "http.response.start" and not observed:
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_observed)
+        finally:
+            if not observed:
+                observe(500)
+
+
+def aiohttp_middleware():
+    """aiohttp middleware recording http_request_duration_seconds"""
+    from aiohttp import web
+
+    @web.middleware
+    async def middleware(request, handler):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            resource = request.match_info.route.resource
+            route = resource.canonical if resource is not None else "unmatched"
+            HTTP_REQUEST_SECONDS.labels(request.method, route, str(status)).observe(time.perf_counter() - start)
+
+    return middleware
+
+
+async def aiohttp_handler(request):
+    """aiohttp handler for /metrics"""
+    from aiohttp import web
+    return web.Response(body=render(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+def aiohttp_trace():
+    """aiohttp TraceConfig recording outbound_request_duration_seconds for a session
+
+    For discord.py: commands.Bot(..., http_trace=aiohttp_trace())
+    """
+    import aiohttp
+
+    async def on_start(session, context, params):
+        context.start = time.perf_counter()
+
+    async def on_end(session, context, params):
+        OUTBOUND_REQUEST_SECONDS.labels(
+            params.url.host or "", params.method, str(params.response.status)
+        ).observe(time.perf_counter() - context.start)
+
+    async def on_exception(session, context, params):
+        OUTBOUND_REQUEST_SECONDS.labels(
+            params.url.host or "", params.method, "error"
+        ).observe(time.perf_counter() - context.start)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    trace.on_request_exception.append(on_exception)
+    return trace
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Wraps an httpx transport to record outbound_request_duration_seconds"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            OUTBOUND_REQUEST_SECONDS.labels(
+                request.url.host, request.method, status
+            ).observe(time.perf_counter() - start)
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,254 @@
+"""
+Batch re-grading of stored submissions
+Re-applies the current question bank to every stored submission, e.g. after
+keywords in testQuestions.json changed. Submissions are streamed from the
+store in keyset pages and graded a batch at a time: per question, each
+keyword is searched for across the whole batch and the hits counted per
+submission. Large archives are spread over a process pool; with the SQLite
+store each worker reads and decodes its own batches. Changed records are
+written back with one store.update_many call per batch, and the report
+lists every submission whose pass/fail verdict flipped.
+
+Usage:
+    python regrade.py [--dry-run] [--workers N] [--batch-size 1000] [--report report.json]
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+
+from grading import Grader
+from submission_store import create_store
+
+logger = logging.getLogger(__name__)
+
+REGRADE_BATCH_SIZE = 1000
+PARALLEL_THRESHOLD = 20000  # below this, process startup costs more than it saves
+
+BatchResult = Tuple[List[List[bool]], List[float], List[bool]]
+
+
+def grade_batch(grader: Grader, rows: List[List[str]]) -> BatchResult:
+    """Grade many submissions at once; rows[i][q] is submission i's answer to question q
+
+    Returns per-submission verdict lists, scores and passed flags
+    """
+    n = len(rows)
+    verdict_columns = []
+    for q, question in enumerate(grader.questions):
+        matcher = grader.matchers[question["id"]]
+        texts = [row[q].lower() for row in rows]
+        counts = [0] * n
+        for keyword in matcher.keywords:
+            for i, text in enumerate(texts):
+                if keyword in text:
+                    counts[i] += 1
+        verdict_columns.append([count >= matcher.needed for count in counts])
+
+    verdicts = [list(row) for row in zip(*verdict_columns)] if verdict_columns else [[] for _ in rows]
+    scores = [grader.score(sum(row)) for row in verdicts]
+    return verdicts, scores, [score >= grader.pass_score for score in scores]
+
+
+def diff_batch(grader: Grader, batch: List[dict]) -> dict:
+    """Grade a batch and compare with what is stored
+
+    Returns the field changes to write, the flipped pass/fail verdicts and
+    per-question answer flip counts
+    """
+    rows = [grader.answer_texts(s.get("answers") or []) for s in batch]
+    verdicts, scores, passed = grade_batch(grader, rows)
+    now = datetime.utcnow().isoformat()
+    diff = {"scanned": len(batch), "changes": {}, "flips": [], "answers_flipped": 0,
+            "per_question": [[0, 0] for _ in grader.questions]}
+    for submission, texts, new_verdicts, score, new_passed in zip(batch, rows, verdicts, scores, passed):
+        old_verdicts = {a.get("question_number"): bool(a.get("is_correct")) for a in submission.get("answers") or []}
+        answer_flips = 0
+        for q, verdict in enumerate(new_verdicts):
+            if old_verdicts.get(q + 1, False) != verdict:
+                answer_flips += 1
+                diff["per_question"][q][0 if verdict else 1] += 1
+        old_passed = bool(submission.get("passed"))
+        old_score = float(submission.get("score") or 0)
+        if not answer_flips and old_passed == new_passed and abs(old_score - score) < 1e-9:
+            continue
+
+        diff["answers_flipped"] += answer_flips
+        if old_passed != new_passed:
+            diff["flips"].append({
+                "id": submission["id"],
+                "username": submission.get("username"),
+                "status": submission.get("status"),
+                "old_score": old_score,
+                "new_score": score,
+                "old_passed": old_passed,
+                "new_passed": new_passed,
+            })
+        graded = grader.result(texts, new_verdicts)
+        diff["changes"][submission["id"]] = {"answers": graded["answers"], "score": score,
+                                             "passed": new_passed, "updated_at": now}
+    return diff
+
+
+class RegradeReport:
+    """Counts of changed records and the list of flipped verdicts"""
+
+    def __init__(self, grader: Grader, dry_run: bool):
+        self.dry_run = dry_run
+        self.scanned = 0
+        self.changed = 0
+        self.answers_flipped = 0
+        self.per_question = [
+            {"question_number": n, "now_correct": 0, "now_incorrect": 0}
+            for n in range(1, len(grader.questions) + 1)
+        ]
+        self.flips: List[dict] = []
+
+    def merge(self, diff: dict):
+        self.scanned += diff["scanned"]
+        self.changed += len(diff["changes"])
+        self.answers_flipped += diff["answers_flipped"]
+        self.flips.extend(diff["flips"])
+        for totals, (now_correct, now_incorrect) in zip(self.per_question, diff["per_question"]):
+            totals["now_correct"] += now_correct
+            totals["now_incorrect"] += now_incorrect
+
+    def to_dict(self, flip_limit: Optional[int] = None) -> dict:
+        flips = self.flips if flip_limit is None else self.flips[:flip_limit]
+        return {
+            "dry_run": self.dry_run,
+            "scanned": self.scanned,
+            "changed": self.changed,
+            "verdicts_flipped": len(self.flips),
+            "newly_passed": sum(1 for f in self.flips if f["new_passed"]),
+            "newly_failed": sum(1 for f in self.flips if not f["new_passed"]),
+            "answers_flipped": self.answers_flipped,
+            "per_question": self.per_question,
+            "flips": flips,
+        }
+
+
+def _read_batches(store, batch_size: int) -> Iterator[List[dict]]:
+    cursor = None
+    while True:
+        submissions, cursor = store.page(limit=batch_size, cursor=cursor)
+        if submissions:
+            yield submissions
+        if cursor is None:
+            return
+
+
+def _batch_cursors(store, batch_size: int) -> Iterator[Optional[str]]:
+    """Start cursor of every batch, found by paging over ids only"""
+    cursor = None
+    while True:
+        yield cursor
+        _, cursor = store.page(limit=batch_size, cursor=cursor, fields=["id"])
+        if cursor is None:
+            return
+
+
+# Process pool workers build their own grader once. For a SQLite store they
+# also open their own connection and read their batch themselves, so
+# decoding the stored answers is spread over the pool too.
+
+_worker_grader: Optional[Grader] = None
+_worker_store = None
+
+
+def _init_worker(questions: List[dict], match_threshold: float, pass_score: float,
+                 db_path: Optional[str]):
+    global _worker_grader, _worker_store
+    _worker_grader = Grader(questions, match_threshold, pass_score)
+    if db_path is not None:
+        from sqlite_store import SQLiteSubmissionStore
+        _worker_store = SQLiteSubmissionStore(db_path)
+
+
+def _diff_in_worker(task: Tuple[Optional[str], int, Optional[List[dict]]]) -> dict:
+    cursor, batch_size, batch = task
+    if batch is None:
+        batch, _ = _worker_store.page(limit=batch_size, cursor=cursor)
+    return diff_batch(_worker_grader, batch)
+
+
+def regrade(store, grader: Optional[Grader] = None, batch_size: int = REGRADE_BATCH_SIZE,
+            workers: Optional[int] = None, dry_run: bool = False) -> RegradeReport:
+    """Re-grade every stored submission with the current question bank
+
+    workers=None picks a process pool for archives of PARALLEL_THRESHOLD or
+    more submissions; 0 or 1 grades in this process
+    """
+    grader = grader or Grader.from_file()
+    report = RegradeReport(grader, dry_run)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(store) >= PARALLEL_THRESHOLD else 0
+
+    def apply(diff: dict):
+        report.merge(diff)
+        if diff["changes"] and not dry_run:
+            store.update_many(diff["changes"])
+
+    if workers <= 1:
+        for batch in _read_batches(store, batch_size):
+            apply(diff_batch(grader, batch))
+        return report
+
+    from sqlite_store import SQLiteSubmissionStore
+    db_path = store.path if isinstance(store, SQLiteSubmissionStore) else None
+    if db_path is not None:
+        tasks = ((cursor, batch_size, None) for cursor in _batch_cursors(store, batch_size))
+    else:
+        tasks = ((None, batch_size, batch) for batch in _read_batches(store, batch_size))
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(grader.questions, grader.match_threshold, grader.pass_score, db_path)) as pool:
+        # A bounded window of batches in flight keeps memory flat on big archives
+        in_flight = deque()
+        for task in tasks:
+            in_flight.append(pool.submit(_diff_in_worker, task))
+            if len(in_flight) >= workers * 2:
+                apply(in_flight.popleft().result())
+        while in_flight:
+            apply(in_flight.popleft().result())
+    return report
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Re-grade stored submissions with the current question bank")
+    parser.add_argument("--store", help="sqlite, journal or memory (default: SUBMISSION_STORE)")
+    parser.add_argument("--path", help="database / journal path (default: from the environment)")
+    parser.add_argument("--batch-size", type=int, default=REGRADE_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, help="process pool size (default: automatic)")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing them")
+    parser.add_argument("--report", help="write the full diff report to this JSON file")
+    args = parser.parse_args()
+
+    store = create_store(args.store, args.path)
+    report = regrade(store, batch_size=args.batch_size, workers=args.workers, dry_run=args.dry_run).to_dict()
+    if hasattr(store, "close"):
+        store.close()
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"Scanned {report['scanned']} submissions, {report['changed']} changed"
+          f"{' (dry run, nothing written)' if args.dry_run else ''}")
+    print(f"  {report['answers_flipped']} answer verdicts flipped; "
+          f"{report['newly_passed']} now pass, {report['newly_failed']} now fail")
+    for flip in report["flips"][:20]:
+        print(f"  {flip['id']} {flip['username']!s:20} [{flip['status']}] "
+              f"{flip['old_score']:.1f}% -> {flip['new_score']:.1f}% "
+              f"{'PASS' if flip['new_passed'] else 'FAIL'}")
+    if len(report["flips"]) > 20:
+        print(f"  ... {len(report['flips']) - 20} more (see --report)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Client for the bot's role assignment API
+Approvals are sent to the bot's bulk /api/assign-roles endpoint in batches,
+so the bot resolves the guild and role once per batch instead of once per
+user. Each user's outcome comes back as an httpx.Response carrying the
+status code and body the single-user endpoint would have returned, so
+callers can keep their existing per-response error handling. The job queue
+claims approved users' assign_role jobs in batches and hands each batch to
+assign_roles.
+"""
+
+from typing import Dict, Iterable
+
+import httpx
+
+ROLE_NAME = "Verified Staff"
+
+
+async def assign_roles(client: httpx.AsyncClient, bot_url: str, user_ids: Iterable[str],
+                       role_name: str = ROLE_NAME, timeout: float = 30.0) -> Dict[str, httpx.Response]:
+    """Assign role_name to every user in one bulk call; returns user_id -> response"""
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    response = await client.post(
+        f"{bot_url}/api/assign-roles",
+        json={"user_ids": user_ids, "role_name": role_name},
+        timeout=timeout,
+    )
+    if response.status_code != 200:
+        # The whole batch failed (bot down, guild missing, rate limited...)
+        return {user_id: response for user_id in user_ids}
+
+    results = {}
+    for result in response.json().get("results", []):
+        user_id = str(result.pop("user_id"))
+        results[user_id] = httpx.Response(result.pop("status"), json=result, request=response.request)
+    for user_id in user_ids:
+        if user_id not in results:
+            results[user_id] = httpx.Response(500, json={"error": "Missing from bulk response"},
+                                              request=response.request)
+    return results
+
@@ -0,0 +1,130 @@
+"""
+Production entry point
+Runs the backend API (unified_server:app) in WEB_CONCURRENCY uvicorn worker
+processes, with the Discord bot as a supervised sibling process that is
+restarted (with backoff) whenever it exits.
+
+The workers share their state through the SQLite submission store and job
+queue, so any worker can serve any request. The memory and journal stores
+cannot be shared between processes, so with those the API runs one worker.
+With several workers, PROMETHEUS_MULTIPROC_DIR (a fresh temporary directory
+unless set) lets /metrics on any worker report the totals of all of them.
+
+Environment:
+    PORT             listen port (default 10000)
+    WEB_CONCURRENCY  API worker processes (default 2, sized for small instances)
+    RUN_DISCORD_BOT  set to 0 when the bot runs somewhere else
+    PROMETHEUS_MULTIPROC_DIR  where workers share metrics (emptied at start)
+
+The app also runs under gunicorn, with the bot started separately:
+    gunicorn unified_server:app -k uvicorn.workers.UvicornWorker -w 4
+"""
+
+from typing import List, Optional
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from submission_store import SUBMISSION_STORE  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("serve")
+
+BOT_RESTART_DELAY = 1.0
+BOT_RESTART_DELAY_MAX = 60.0
+BOT_STABLE_AFTER = 60.0  # a bot that ran at least this long is restarted without backoff
+DEFAULT_WORKERS = 2
+
+
+def worker_count() -> int:
+    if SUBMISSION_STORE.lower() != "sqlite":
+        return 1
+    return max(1, int(os.environ.get("WEB_CONCURRENCY") or DEFAULT_WORKERS))
+
+
+def prepare_metrics_dir(workers: int):
+    """Give the workers an empty shared directory for their metrics"""
+    if workers <= 1:
+        return
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or tempfile.mkdtemp(prefix="prometheus-")
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):  # left over from a previous run
+            os.remove(os.path.join(path, name))
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+
+class BotSupervisor:
+    """Keeps discord_bot.py running next to the API workers"""
+
+    def __init__(self, command: Optional[List[str]] = None):
+        self.command = command or [sys.executable, "discord_bot.py"]
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bot-supervisor", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        with self._lock:
+            self._stopping.set()
+            process = self.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._thread.join(timeout)
+
+    def _run(self):
+        delay = BOT_RESTART_DELAY
+        while True:
+            with self._lock:
+                if self._stopping.is_set():
+                    return
+                logger.info("Starting Discord bot")
+                # The bot serves its own /metrics; keep it out of the workers' totals
+                env = {k: v for k, v in os.environ.items() if k != "PROMETHEUS_MULTIPROC_DIR"}
+                self.process = subprocess.Popen(self.command, env=env)
+            started = time.monotonic()
+            code = self.process.wait()
+            if self._stopping.is_set():
+                return
+            if time.monotonic() - started >= BOT_STABLE_AFTER:
+                delay = BOT_RESTART_DELAY
+            self.restarts += 1
+            logger.error(f"Discord bot exited with code {code}; restarting in {delay:.0f}s")
+            self._stopping.wait(delay)
+            delay = min(delay * 2, BOT_RESTART_DELAY_MAX)
+
+
+def main():
+    port = int(os.environ.get("PORT", 10000))
+    workers = worker_count()
+    prepare_metrics_dir(workers)
+    bot = BotSupervisor() if os.environ.get("RUN_DISCORD_BOT", "1") != "0" else None
+    if bot is not None:
+        bot.start()
+    try:
+        logger.info(f"Starting API on port {port} with {workers} worker(s)")
+        uvicorn.run("unified_server:app", host="0.0.0.0", port=port, workers=workers, log_level="info")
+    finally:
+        if bot is not None:
+            bot.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,588 @@
+"""
+SQLite persistence backend for submissions
+Drop-in replacement for SubmissionStore that survives restarts. Runs in WAL
+mode so readers never block the writer, keeps the hot queries as fixed SQL
+strings so sqlite3's statement cache reuses their prepared form, and indexes
+every column the servers filter or sort on. Each write touches only the
+affected row, so its cost does not grow with the size of the dataset.
+
+Several server processes can share one database. Every write also appends
+its change (all fields but answers) to a submission_changes log in the same
+transaction; sync() replays the entries other processes wrote through the
+store's change events, so per-process views such as the stats counters and
+the live event feed see every worker's writes.
+
+The change log's sequence number doubles as the store version: each row
+keeps the seq of its last change in its version column, so conditional
+requests and since=<version> deltas are answered from indexed reads that
+every process agrees on. A new database starts the sequence at the current
+time in microseconds (see submission_store.initial_version).
+
+Full-text search (see submission_search) runs on an FTS5 table over each
+row's username, email and user_answer texts. Triggers on the submissions
+table keep it in step inside the writing transaction, whichever process
+writes; it is created and filled from the existing rows on first start.
+
+Answers are stored as JSON text, and the *_json reads splice that text into
+the response as it is, so serving a submission never decodes and re-encodes
+its answers.
+
+Import an existing api_server JSON dump with:
+    python sqlite_store.py import submissions_data.json [--db submissions.db]
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+
+import fast_json
+from submission_store import (
+    DEFAULT_PAGE_SIZE,
+    SUBMISSION_FIELDS as COLUMNS,
+    Changes,
+    StoreEvents,
+    decode_cursor,
+    encode_cursor,
+    decode_search_cursor,
+    initial_version,
+    project,
+    sort_key,
+)
+from submission_search import Term, fts_expression
+
+logger = logging.getLogger(__name__)
+
+UPDATABLE_COLUMNS = set(COLUMNS) - {"id"}
+CHANGE_FIELDS = tuple(column for column in COLUMNS if column != "answers")
+CHANGE_LOG_RETENTION = 10000  # entries kept for processes that are catching up
+CHANGE_LOG_TRIM_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    user_email TEXT NOT NULL,
+    username TEXT NOT NULL,
+    answers TEXT NOT NULL,
+    score REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_created_at ON submissions (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_submissions_user_id ON submissions (user_id, created_at, id);
+CREATE TABLE IF NOT EXISTS submission_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    writer TEXT NOT NULL,
+    event TEXT NOT NULL,
+    submission TEXT NOT NULL,
+    previous TEXT
+);
+"""
+
+# Columns added after the first release, created on older databases at startup
+MIGRATIONS = {
+    "version": "ALTER TABLE submissions ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+}
+
+# The user_answer texts of a row's answers, as indexed for search
+ANSWER_TEXT = (
+    "(SELECT group_concat(json_extract(answer.value, '$.user_answer'), ' ') "
+    "FROM json_each({row}.answers) AS answer WHERE answer.type = 'object')"
+)
+
+# Index rows share the submission's rowid. VACUUM may renumber those, so drop
+# submission_text after one; it is rebuilt on the next start
+SEARCH_COLUMNS = "rowid, username, user_email, answers"
+INDEX_ROW = (
+    f"INSERT INTO submission_text ({SEARCH_COLUMNS}) "
+    f"VALUES (new.rowid, new.username, new.user_email, {ANSWER_TEXT.format(row='new')});"
+)
+SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS submission_text USING fts5("
+    "username, user_email, answers, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS submission_text_insert AFTER INSERT ON submissions BEGIN {INDEX_ROW} END",
+    "CREATE TRIGGER IF NOT EXISTS submission_text_delete AFTER DELETE ON submissions BEGIN "
+    "DELETE FROM submission_text WHERE rowid = old.rowid; END",
+    "CREATE TRIGGER IF NOT EXISTS submission_text_update "
+    "AFTER UPDATE OF username, user_email, answers ON submissions BEGIN "
+    f"DELETE FROM submission_text WHERE rowid = old.rowid; {INDEX_ROW} END",
+    f"INSERT INTO submission_text ({SEARCH_COLUMNS}) "
+    f"SELECT rowid, username, user_email, {ANSWER_TEXT.format(row='submissions')} FROM submissions",
+)
+
+SELECT_COLUMNS = ", ".join(COLUMNS)
+SQL_INSERT = (
+    f"INSERT OR REPLACE INTO submissions ({SELECT_COLUMNS}, version) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)}, ?)"
+)
+SQL_GET = f"SELECT {SELECT_COLUMNS} FROM submissions WHERE id = ?"
+SQL_DELETE = "DELETE FROM submissions WHERE id = ?"
+SQL_LIST = f"SELECT {SELECT_COLUMNS} FROM submissions ORDER BY created_at, id"
+SQL_LIST_STATUS = f"SELECT {SELECT_COLUMNS} FROM submissions WHERE status = ? ORDER BY created_at, id"
+SQL_LIST_USER = f"SELECT {SELECT_COLUMNS} FROM submissions WHERE user_id = ? ORDER BY created_at, id"
+SQL_LIST_STATUS_USER = (
+    f"SELECT {SELECT_COLUMNS} FROM submissions "
+    "WHERE status = ? AND user_id = ? ORDER BY created_at, id"
+)
+SQL_COUNT = "SELECT COUNT(*) FROM submissions"
+SQL_COUNT_STATUS = "SELECT COUNT(*) FROM submissions WHERE status = ?"
+SQL_VERSION = "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'submission_changes'), 0)"
+SQL_SEED_VERSION = (
+    "INSERT INTO sqlite_sequence (name, seq) SELECT 'submission_changes', ? "
+    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'submission_changes')"
+)
+SQL_VERSION_OF = "SELECT version FROM submissions WHERE id = ?"
+SQL_DELETED_SINCE = "SELECT submission FROM submission_changes WHERE seq > ? AND event = 'deleted' ORDER BY seq"
+SQL_FIRST_CHANGE = "SELECT MIN(seq) FROM submission_changes"
+SQL_HAS_SEARCH = "SELECT 1 FROM sqlite_master WHERE name = 'submission_text'"
+SQL_LOG_CHANGE = (
+    "INSERT INTO submission_changes (seq, writer, event, submission, previous) VALUES (?, ?, ?, ?, ?)"
+)
+SQL_CHANGES_SINCE = "SELECT seq, writer, event, submission, previous FROM submission_changes WHERE seq > ? ORDER BY seq"
+SQL_TRIM_CHANGES = "DELETE FROM submission_changes WHERE seq <= ?"
+
+
+def _to_row(submission: dict) -> tuple:
+    return (
+        submission["id"],
+        submission["user_id"],
+        submission["user_email"],
+        submission["username"],
+        json.dumps(submission.get("answers", []), separators=(",", ":")),
+        float(submission["score"]),
+        int(bool(submission["passed"])),
+        submission.get("status", "pending"),
+        submission["created_at"],
+        submission.get("updated_at", submission["created_at"]),
+    )
+
+
+def _change_json(submission: Optional[dict]) -> Optional[str]:
+    if submission is None:
+        return None
+    return json.dumps({field: submission.get(field) for field in CHANGE_FIELDS}, separators=(",", ":"))
+
+
+def _from_row(row: tuple, columns=COLUMNS) -> dict:
+    submission = dict(zip(columns, row))
+    if "answers" in submission:
+        submission["answers"] = json.loads(submission["answers"])
+    if "passed" in submission:
+        submission["passed"] = bool(submission["passed"])
+    return submission
+
+
+def _row_json(row: tuple, columns=COLUMNS, fields: Optional[List[str]] = None) -> bytes:
+    submission = dict(zip(columns, row))
+    if "answers" in submission:
+        submission["answers"] = fast_json.fragment(submission["answers"])
+    if "passed" in submission:
+        submission["passed"] = bool(submission["passed"])
+    if fields is not None:
+        submission = {name: submission[name] for name in fields if name in submission}
+    return fast_json.dumps(submission)
+
+
+class SQLiteSubmissionStore(StoreEvents):
+    """SubmissionStore-compatible repository persisted in a SQLite database"""
+
+    persistent = True
+    shared = True
+
+    def __init__(self, path: str = "submissions.db"):
+        self._init_events()
+        self.path = path
+        self._writer = uuid.uuid4().hex  # tags this connection's entries in the change log
+        self._logged = 0
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path,
+            check_same_thread=False,
+            isolation_level=None,  # autocommit; explicit transactions for bulk work
+            cached_statements=256,
+        )
+        # busy_timeout first: other worker processes may be opening the same file
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # INSERT OR REPLACE must fire the delete trigger for the row it replaces
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(submissions)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                try:
+                    self._conn.execute(statement)
+                except sqlite3.OperationalError as e:
+                    if "duplicate column" not in str(e):  # another process migrated first
+                        raise
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_version ON submissions (version)")
+        self._conn.execute(SQL_SEED_VERSION, (initial_version(),))
+        with self._transaction():
+            if self._conn.execute(SQL_HAS_SEARCH).fetchone() is None:
+                for statement in SEARCH_SCHEMA:
+                    self._conn.execute(statement)
+        # Earlier changes are already reflected in the rows this process reads
+        self._synced = self.version
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __contains__(self, submission_id: str) -> bool:
+        return self.get(submission_id) is not None
+
+    @property
+    def version(self) -> int:
+        """Seq of the last change any process committed"""
+        with self._lock:
+            return self._conn.execute(SQL_VERSION).fetchone()[0]
+
+    def version_of(self, submission_id: str) -> Optional[int]:
+        """Version at which the submission last changed, None if it does not exist"""
+        with self._lock:
+            row = self._conn.execute(SQL_VERSION_OF, (submission_id,)).fetchone()
+        return row[0] if row else None
+
+    def add(self, submission: dict) -> dict:
+        with self._lock:
+            with self._transaction():
+                previous = self.get(submission["id"])
+                version = self._next_version()
+                self._conn.execute(SQL_INSERT, _to_row(submission) + (version,))
+                event = "created" if previous is None else "updated"
+                self._log(version, event, submission, previous)
+            self._emit(event, submission, previous)
+        return submission
+
+    def get(self, submission_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(SQL_GET, (submission_id,)).fetchone()
+        return _from_row(row) if row else None
+
+    @staticmethod
+    def _update_statement(submission_id: str, fields: dict) -> Tuple[str, list]:
+        unknown = set(fields) - UPDATABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update unknown submission fields: {sorted(unknown)}")
+        fields = dict(fields)
+        if "answers" in fields:
+            fields["answers"] = json.dumps(fields["answers"], separators=(",", ":"))
+        if "passed" in fields:
+            fields["passed"] = int(bool(fields["passed"]))
+        # Sorted so the same field set always produces the same (cached) statement;
+        # the version is bound first, once the change's seq is known
+        names = sorted(fields)
+        sql = f"UPDATE submissions SET version = ?, {', '.join(f'{n} = ?' for n in names)} WHERE id = ?"
+        return sql, [fields[n] for n in names] + [submission_id]
+
+    def update(self, submission_id: str, **fields) -> Optional[dict]:
+        sql, params = self._update_statement(submission_id, fields)
+        with self._lock:
+            with self._transaction():
+                previous = self.get(submission_id)
+                if previous is None:
+                    return None
+                version = self._next_version()
+                self._conn.execute(sql, (version, *params))
+                submission = self.get(submission_id)
+                self._log(version, "updated", submission, previous)
+            self._emit("updated", submission, previous)
+            return submission
+
+    def compare_and_set(self, submission_id: str, expected: dict, **fields) -> Tuple[Optional[dict], bool]:
+        """Update only if the submission still has the expected values
+
+        The check and the write share one write transaction, so concurrent
+        callers (in any process) cannot both apply a change from the same state
+        """
+        sql, params = self._update_statement(submission_id, fields)
+        with self._lock:
+            with self._transaction():
+                previous = self.get(submission_id)
+                if previous is None or any(previous.get(k) != v for k, v in expected.items()):
+                    return previous, False
+                version = self._next_version()
+                self._conn.execute(sql, (version, *params))
+                submission = self.get(submission_id)
+                self._log(version, "updated", submission, previous)
+            self._emit("updated", submission, previous)
+            return submission, True
+
+    def update_many(self, changes: Dict[str, dict]) -> int:
+        """Apply {id: fields} updates in a single transaction; returns the rows changed"""
+        statements = [(sid, *self._update_statement(sid, fields)) for sid, fields in changes.items()]
+        updated = []
+        with self._lock:
+            with self._transaction():
+                for submission_id, sql, params in statements:
+                    previous = self.get(submission_id)
+                    if previous is None:
+                        continue
+                    version = self._next_version()
+                    self._conn.execute(sql, (version, *params))
+                    submission = self.get(submission_id)
+                    self._log(version, "updated", submission, previous)
+                    updated.append((submission, previous))
+            for submission, previous in updated:
+                self._emit("updated", submission, previous)
+        return len(updated)
+
+    def delete(self, submission_id: str) -> Optional[dict]:
+        with self._lock:
+            with self._transaction():
+                submission = self.get(submission_id)
+                if submission is None:
+                    return None
+                self._conn.execute(SQL_DELETE, (submission_id,))
+                self._log(self._next_version(), "deleted", submission)
+            self._emit("deleted", submission)
+            return submission
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction; callers hold self._lock
+
+        BEGIN IMMEDIATE takes the database write lock up front, so a record
+        read inside the transaction is still current when the change to it
+        is logged, whichever process writes next
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _next_version(self) -> int:
+        """Seq the next logged change gets; callers are inside a write transaction"""
+        return self._conn.execute(SQL_VERSION).fetchone()[0] + 1
+
+    def _log(self, version: int, event: str, submission: dict, previous: Optional[dict] = None):
+        self._conn.execute(SQL_LOG_CHANGE, (version, self._writer, event, _change_json(submission),
+                                            _change_json(previous)))
+        self._logged += 1
+        if self._logged % CHANGE_LOG_TRIM_EVERY == 0:
+            self._conn.execute(SQL_TRIM_CHANGES, (version - CHANGE_LOG_RETENTION,))
+
+    def sync(self) -> int:
+        """Emit events for changes other processes committed since the last sync"""
+        emitted = 0
+        with self._lock:
+            rows = self._conn.execute(SQL_CHANGES_SINCE, (self._synced,)).fetchall()
+            if rows and rows[0][0] > self._synced + 1:
+                logger.warning(f"Submission change log was trimmed past this process: "
+                               f"{rows[0][0] - self._synced - 1} changes missed")
+            for seq, writer, event, submission, previous in rows:
+                if writer != self._writer:
+                    self._emit(event, json.loads(submission), json.loads(previous) if previous else None)
+                    emitted += 1
+                self._synced = seq
+        return emitted
+
+    @staticmethod
+    def _list_statement(status: Optional[str], user_id: Optional[str]) -> Tuple[str, tuple]:
+        if status is not None and user_id is not None:
+            sql, params = SQL_LIST_STATUS_USER, (status, user_id)
+        elif status is not None:
+            sql, params = SQL_LIST_STATUS, (status,)
+        elif user_id is not None:
+            sql, params = SQL_LIST_USER, (user_id,)
+        else:
+            sql, params = SQL_LIST, ()
+        return sql, params
+
+    def list(self, status: Optional[str] = None, user_id: Optional[str] = None) -> List[dict]:
+        """Return submissions ordered by created_at, optionally filtered by status and/or user"""
+        sql, params = self._list_statement(status, user_id)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_from_row(row) for row in rows]
+
+    def _page_rows(self, limit: int, cursor: Optional[str], status: Optional[str], user_id: Optional[str],
+                   fields: Optional[List[str]]) -> Tuple[List[str], List[tuple], Optional[str]]:
+        """(columns, rows, next_cursor) of a keyset page
+
+        Only the projected columns are read, so list views that leave out
+        answers never pay for decoding them
+        """
+        columns = list(COLUMNS) if fields is None else list(dict.fromkeys(["id", "created_at", *fields]))
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if cursor:
+            clauses.append("(created_at, id) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        sql = f"SELECT {', '.join(columns)} FROM submissions {where}ORDER BY created_at, id LIMIT ?"
+        # Fetch one extra row to know whether another page follows
+        params.append(limit + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = dict(zip(columns, rows[-1]))
+            next_cursor = encode_cursor(sort_key(last))
+        return columns, rows, next_cursor
+
+    def page(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+             status: Optional[str] = None, user_id: Optional[str] = None,
+             fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[str]]:
+        """Keyset page ordered by (created_at, id); returns (submissions, next_cursor)"""
+        columns, rows, next_cursor = self._page_rows(limit, cursor, status, user_id, fields)
+        submissions = [_from_row(row, columns) for row in rows]
+        if fields is not None:
+            submissions = project(submissions, fields)
+        return submissions, next_cursor
+
+    # Encoded variants of the reads above, for responses assembled from bytes
+
+    def get_json(self, submission_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(SQL_GET, (submission_id,)).fetchone()
+        return _row_json(row) if row else None
+
+    def list_json(self, status: Optional[str] = None, fields: Optional[List[str]] = None) -> bytes:
+        if fields is None:
+            columns = COLUMNS
+            sql, params = self._list_statement(status, None)
+        else:
+            columns = fields  # only the projected columns are read
+            where = "WHERE status = ? " if status is not None else ""
+            sql = f"SELECT {', '.join(columns)} FROM submissions {where}ORDER BY created_at, id"
+            params = (status,) if status is not None else ()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return fast_json.array([_row_json(row, columns) for row in rows])
+
+    def page_json(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                  status: Optional[str] = None, user_id: Optional[str] = None,
+                  fields: Optional[List[str]] = None) -> Tuple[List[bytes], Optional[str]]:
+        columns, rows, next_cursor = self._page_rows(limit, cursor, status, user_id, fields)
+        return [_row_json(row, columns, fields) for row in rows], next_cursor
+
+    def changes_json(self, since: int, fields: Optional[List[str]] = None) -> Optional[Changes]:
+        """Submissions changed and ids deleted after version since, or None when that is no longer known
+
+        Deletes are read from the change log, so a since older than the
+        trimmed log cannot be answered. Reads share one transaction, so the
+        returned version matches the rows.
+        """
+        columns = COLUMNS if fields is None else fields
+        sql = f"SELECT {', '.join(columns)} FROM submissions WHERE version > ? ORDER BY version"
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                version = self._conn.execute(SQL_VERSION).fetchone()[0]
+                first = self._conn.execute(SQL_FIRST_CHANGE).fetchone()[0]
+                if since > version or since < (version if first is None else first - 1):
+                    return None
+                rows = self._conn.execute(sql, (since,)).fetchall()
+                deleted = [json.loads(row[0])["id"] for row in self._conn.execute(SQL_DELETED_SINCE, (since,))]
+            finally:
+                self._conn.execute("COMMIT")
+        id_index = columns.index("id")
+        changed = {row[id_index] for row in rows}
+        deleted = [sid for sid in dict.fromkeys(deleted) if sid not in changed]
+        return [_row_json(row, columns) for row in rows], deleted, version
+
+    def search_json(self, terms: List[Term], status: Optional[str] = None, passed: Optional[bool] = None,
+                    limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                    fields: Optional[List[str]] = None) -> Tuple[List[bytes], Optional[str]]:
+        """Submissions matching the search terms, newest first; returns (encoded submissions, next_cursor)
+
+        FTS5 walks the matches in descending rowid order and stops at the
+        limit, so a page costs about the same however many rows match
+        """
+        columns = COLUMNS if fields is None else fields
+        clauses, params = ["submission_text MATCH ?"], [fts_expression(terms)]
+        if status is not None:
+            clauses.append("s.status = ?")
+            params.append(status)
+        if passed is not None:
+            clauses.append("s.passed = ?")
+            params.append(int(passed))
+        if cursor:
+            clauses.append("submission_text.rowid < ?")
+            params.append(decode_search_cursor(cursor))
+        sql = (
+            f"SELECT submission_text.rowid, {', '.join(f's.{c}' for c in columns)} "
+            "FROM submission_text CROSS JOIN submissions s ON s.rowid = submission_text.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY submission_text.rowid DESC LIMIT ?"
+        )
+        params.append(limit + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+        return [_row_json(row[1:], columns) for row in rows[:limit]], next_cursor
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status is None:
+                return self._conn.execute(SQL_COUNT).fetchone()[0]
+            return self._conn.execute(SQL_COUNT_STATUS, (status,)).fetchone()[0]
+
+    def add_many(self, submissions: Iterable[dict], replace: bool = False) -> int:
+        """Bulk insert in a single transaction; returns the number of rows written"""
+        written = []
+        with self._lock:
+            with self._transaction():
+                for submission in submissions:
+                    previous = self.get(submission["id"])
+                    if previous is not None and not replace:
+                        continue
+                    version = self._next_version()
+                    self._conn.execute(SQL_INSERT, _to_row(submission) + (version,))
+                    event = "created" if previous is None else "updated"
+                    self._log(version, event, submission, previous)
+                    written.append((event, submission, previous))
+            for event, submission, previous in written:
+                self._emit(event, submission, previous)
+        return len(written)
+
+    def import_json(self, path: str) -> int:
+        """Import submissions from an api_server submissions_data.json dump"""
+        with open(path, "r") as f:
+            data = json.load(f)
+        submissions = data.get("submissions", []) if isinstance(data, dict) else data
+        imported = self.add_many(submissions)
+        logger.info(f"Imported {imported} of {len(submissions)} submissions from {path}")
+        return imported
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage the SQLite submission store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Import a submissions_data.json file")
+    import_parser.add_argument("json_file")
+    import_parser.add_argument("--db", default="submissions.db")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = SQLiteSubmissionStore(args.db)
+        imported = store.import_json(args.json_file)
+        print(f"Imported {imported} submissions into {args.db} ({len(store)} total)")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
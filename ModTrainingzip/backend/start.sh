@@ -1,6 +1,6 @@
 #!/bin/bash
 # Unified startup script for Render.com deployment
-# This script starts both the Discord bot and the API server
+# This script starts the API server and the Discord bot via serve.py
 
 set -e  # Exit on error
 
@@ -23,20 +23,8 @@ if [ -z "$DISCORD_SERVER_ID" ]; then
     echo "⚠️  WARNING: DISCORD_SERVER_ID not set"
 fi
 
-# Start Discord bot in background
-echo "🤖 Starting Discord bot on port 8003..."
-python3 discord_bot.py &
-BOT_PID=$!
-echo "Bot started with PID: $BOT_PID"
-
-# Give bot a moment to initialize
-sleep 3
-
-# Start API server on port specified by Render (or 10000)
+# Start the API server and the Discord bot (supervised, restarted if it exits)
 PORT=${PORT:-10000}
-echo "🌐 Starting API server on port $PORT..."
-python3 api_server.py
-
-# This will only execute if api_server stops
-echo "⚠️  API server stopped, killing bot..."
-kill $BOT_PID 2>/dev/null || true
+export PORT
+echo "🌐 Starting API server on port $PORT with the Discord bot..."
+exec python3 serve.py
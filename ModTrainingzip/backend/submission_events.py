@@ -0,0 +1,158 @@
+"""
+Submission change feed for live admin views
+Turns the store's change events into small deltas (the list-view fields of
+the changed submission, never its answers) and fans them out to every
+connected Server-Sent Events client from one in-process broker.
+
+Recent deltas are kept in a ring buffer, so a client that reconnects with
+Last-Event-ID gets exactly what it missed. Event ids are "<epoch>-<seq>";
+when the id is from another process lifetime or already evicted from the
+buffer, the client is told to reset (reload the list) instead. Sequence
+numbers are assigned on the event loop, when a delta is buffered and
+published, so every subscriber sees them in order whichever thread wrote
+to the store.
+"""
+
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fields pushed with each delta, matching the admin list view
+DELTA_FIELDS = ("id", "user_id", "user_email", "username", "score", "passed", "status", "created_at", "updated_at")
+EVENT_BUFFER_SIZE = 1000
+SUBSCRIBER_QUEUE_SIZE = 500
+KEEPALIVE_INTERVAL = 15.0
+
+Event = Tuple[int, str]  # (sequence number, encoded SSE frame)
+
+
+class SubmissionEventBroker:
+    """One per process; store listener on one side, SSE subscribers on the other"""
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self.epoch = format(int(time.time() * 1000), "x")
+        self._seq = 0
+        self._buffer: Deque[Event] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def attach(cls, store) -> "SubmissionEventBroker":
+        broker = cls()
+        store.subscribe(broker.on_change)
+        return broker
+
+    def on_change(self, event: str, submission: dict, previous: Optional[dict]):
+        if event == "updated" and previous is not None and all(
+            previous.get(field) == submission.get(field) for field in DELTA_FIELDS
+        ):
+            return  # nothing the list view shows has changed
+        delta = {field: submission.get(field) for field in DELTA_FIELDS}
+        with self._lock:
+            loop = self._loop
+            if loop is None or loop.is_closed():
+                # Nobody has subscribed yet, so there is no one to publish to
+                self._append(event, delta)
+                return
+        # Store writes may happen on worker threads; hand off to the event loop,
+        # which numbers the deltas in the order it publishes them
+        if _running_loop() is loop:
+            self._emit(event, delta)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._emit, event, delta)
+            except RuntimeError:
+                pass  # loop shutting down
+
+    def _append(self, event: str, delta: dict) -> Event:
+        """Number and buffer a delta; called with the lock held"""
+        self._seq += 1
+        frame = (f"id: {self.epoch}-{self._seq}\nevent: {event}\n"
+                 f"data: {json.dumps(delta, separators=(',', ':'))}\n\n")
+        item = (self._seq, frame)
+        self._buffer.append(item)
+        return item
+
+    def _emit(self, event: str, delta: dict):
+        with self._lock:
+            item = self._append(event, delta)
+        self._publish(item)
+
+    def _publish(self, item: Event):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Too slow to keep up: end its stream; the browser reconnects
+                # with Last-Event-ID and catches up from the buffer
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                logger.warning("Dropped a slow submission event subscriber")
+
+    def _replay(self, last_event_id: Optional[str]) -> Optional[List[Event]]:
+        """Buffered events after last_event_id, or None when the client must reset
+
+        Called with the lock held
+        """
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self._seq:
+            return None
+        if seq < self._seq and (not self._buffer or self._buffer[0][0] > seq + 1):
+            return None  # the gap was evicted
+        return [event for event in self._buffer if event[0] > seq]
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """SSE frames for one client: a replay or reset, then live deltas"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.add(queue)
+            replay = self._replay(last_event_id)
+            current = self._seq
+        try:
+            yield "retry: 3000\n\n"
+            if replay is None:
+                yield f"id: {self.epoch}-{current}\nevent: reset\ndata: {{}}\n\n"
+                seen = current
+            else:
+                seen = int(last_event_id.rsplit("-", 1)[1]) if last_event_id else current
+                for seq, frame in replay:
+                    seen = seq
+                    yield frame
+                if not last_event_id:
+                    yield f"id: {self.epoch}-{current}\nevent: ready\ndata: {{}}\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    return
+                seq, frame = item
+                if seq > seen:  # already sent as part of the replay
+                    seen = seq
+                    yield frame
+        finally:
+            self._subscribers.discard(queue)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
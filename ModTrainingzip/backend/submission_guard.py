@@ -0,0 +1,162 @@
+"""
+Duplicate and rate guards for submission ingestion
+A client retry or a double-click must not create a second submission (and a
+second Discord embed and role job). Each POST is keyed by its
+Idempotency-Key header, or by a hash of the user and their answers when the
+client sends none; the first request to claim a key creates the submission
+and later requests with the same key get that submission back. Keys expire
+after SUBMISSION_DEDUP_TTL seconds.
+
+Users are also limited to SUBMISSION_RATE_BURST new submissions, refilled at
+SUBMISSION_RATE_PER_HOUR (token bucket). Replayed duplicates do not count.
+
+Both live in a small SQLite database so every worker process sees the same
+keys and buckets. Every PURGE_EVERY claims, expired keys and buckets that
+have refilled completely (the same as having no row) are deleted.
+"""
+
+from typing import Iterable, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_GUARD_DB = os.environ.get("SUBMISSION_GUARD_DB", "guard.db")
+SUBMISSION_DEDUP_TTL = float(os.environ.get("SUBMISSION_DEDUP_TTL", "3600"))
+SUBMISSION_RATE_BURST = float(os.environ.get("SUBMISSION_RATE_BURST", "3"))
+SUBMISSION_RATE_PER_HOUR = float(os.environ.get("SUBMISSION_RATE_PER_HOUR", "6"))  # 0 disables the limit
+PURGE_EVERY = 1000  # claims between sweeps of expired keys
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submission_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    submission_id TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submission_keys_expires ON submission_keys (expires_at);
+CREATE TABLE IF NOT EXISTS submission_rate (
+    user_id TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submission_rate_updated ON submission_rate (updated_at);
+"""
+
+
+def fingerprint(user_id: str, answers: Iterable[dict]) -> str:
+    """Content hash of a submission: the user and each answer's text by question number"""
+    texts = sorted((int(a["question_number"]), (a.get("user_answer") or "").strip()) for a in answers)
+    raw = json.dumps([str(user_id), texts], separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class SubmissionGuard:
+    """Idempotency keys and per-user token buckets shared by all worker processes"""
+
+    def __init__(self, path: str = SUBMISSION_GUARD_DB, ttl: float = SUBMISSION_DEDUP_TTL,
+                 burst: float = SUBMISSION_RATE_BURST, per_hour: float = SUBMISSION_RATE_PER_HOUR):
+        self.ttl = ttl
+        self.burst = burst
+        self.refill_per_second = per_hour / 3600
+        self._claims = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, key: str) -> Optional[Tuple[str, str]]:
+        """(submission_id, fingerprint) already recorded for an unexpired key"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT submission_id, fingerprint FROM submission_keys WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def claim(self, key: str, content: str, submission_id: str) -> Optional[Tuple[str, str]]:
+        """Reserve key for a new submission
+
+        Returns None when the caller now owns the key, or the (submission_id,
+        fingerprint) of the request that got there first
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM submission_keys WHERE key = ? AND expires_at <= ?", (key, now))
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO submission_keys (key, fingerprint, submission_id, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, content, submission_id, now + self.ttl),
+                )
+                existing = None
+                if not cursor.rowcount:
+                    existing = self._conn.execute(
+                        "SELECT submission_id, fingerprint FROM submission_keys WHERE key = ?", (key,)
+                    ).fetchone()
+                self._claims += 1
+                if self._claims % PURGE_EVERY == 0:
+                    self._purge(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return tuple(existing) if existing else None
+
+    def purge(self):
+        """Delete expired keys and full rate buckets now"""
+        with self._lock:
+            self._purge(time.time())
+
+    def _purge(self, now: float):
+        self._conn.execute("DELETE FROM submission_keys WHERE expires_at <= ?", (now,))
+        if self.refill_per_second > 0:
+            # A bucket untouched this long has refilled to burst whatever it held
+            self._conn.execute("DELETE FROM submission_rate WHERE updated_at < ?",
+                               (now - self.burst / self.refill_per_second,))
+
+    def release(self, key: str, submission_id: str):
+        """Drop a claim whose submission could not be created, so a retry can succeed"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM submission_keys WHERE key = ? AND submission_id = ?", (key, submission_id)
+            )
+
+    def acquire(self, user_id: str) -> float:
+        """Take one submission token for the user; returns 0, or seconds until one is available"""
+        if self.refill_per_second <= 0:
+            return 0.0
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM submission_rate WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                tokens = self.burst if row is None else min(
+                    self.burst, row[0] + (now - row[1]) * self.refill_per_second
+                )
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / self.refill_per_second
+                if not wait:
+                    tokens -= 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO submission_rate (user_id, tokens, updated_at) VALUES (?, ?, ?)",
+                    (user_id, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
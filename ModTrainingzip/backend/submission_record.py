@@ -0,0 +1,197 @@
+"""
+Compact in-memory submission records
+A submission dict carries its answers as a list of dicts that each repeat
+the full question text, so every stored submission held its own copies of
+the same few question strings plus a dict per answer. A SubmissionRecord
+keeps the scalar fields in slots, the answer texts in one tuple and the
+per-answer is_correct flags as bits of an int. The questions themselves
+(question_number and text) live once in the QuestionTable and every record
+with the same questions points at the same shared layout. The table keeps
+the QUESTION_LAYOUTS most recently used layouts, so old question bank
+revisions and odd answer sets from clients do not pile up in it; records
+keep whatever layout they were given either way.
+
+Records expand back into the usual submission dict on demand (to_dict),
+optionally only for the fields a view asks for, so list views never build
+answers. Answers that do not have the usual four keys are kept as given.
+
+A record also caches its encoded JSON for list views (projections without
+answers, at most JSON_CACHE_FORMS of them) until it is next updated, so
+polling the list re-encodes only what changed. Full records are encoded on
+each request; caching them would cost more memory than the records.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import threading
+
+from fast_json import dumps
+
+# The question_number and question text of each answer, in answer order
+Layout = Tuple[Tuple[int, str], ...]
+
+ANSWER_KEYS = frozenset(("question_number", "question", "user_answer", "is_correct"))
+RECORD_FIELDS = (
+    "id", "user_id", "user_email", "username",
+    "score", "passed", "status", "created_at", "updated_at",
+)
+JSON_CACHE_FORMS = 2
+QUESTION_LAYOUTS = 64
+_MISSING = object()
+
+
+class QuestionTable:
+    """Interns question layouts so identical ones are stored once; an LRU of maxsize layouts"""
+
+    def __init__(self, maxsize: int = QUESTION_LAYOUTS):
+        self.maxsize = maxsize
+        self._layouts: "OrderedDict[Layout, Layout]" = OrderedDict()
+        self._lock = threading.Lock()  # records are built by several stores and threads
+
+    def __len__(self) -> int:
+        return len(self._layouts)
+
+    def intern(self, layout: Layout) -> Layout:
+        with self._lock:
+            interned = self._layouts.get(layout)
+            if interned is not None:
+                self._layouts.move_to_end(layout)
+                return interned
+            self._layouts[layout] = layout
+            if len(self._layouts) > self.maxsize:
+                self._layouts.popitem(last=False)
+            return layout
+
+
+# Shared by every store in the process
+question_table = QuestionTable()
+
+
+def pack_answers(answers: Any, table: QuestionTable = question_table):
+    """(layout, texts, correct bits) for a list of answer dicts, or None when they are not packable"""
+    if not isinstance(answers, list):
+        return None
+    layout, texts, correct = [], [], 0
+    for i, answer in enumerate(answers):
+        if (not isinstance(answer, dict) or answer.keys() != ANSWER_KEYS
+                or type(answer["question_number"]) is not int or type(answer["is_correct"]) is not bool
+                or not isinstance(answer["question"], str) or not isinstance(answer["user_answer"], str)):
+            return None
+        layout.append((answer["question_number"], answer["question"]))
+        texts.append(answer["user_answer"])
+        if answer["is_correct"]:
+            correct |= 1 << i
+    return table.intern(tuple(layout)), tuple(texts), correct
+
+
+class SubmissionRecord:
+    """One stored submission; field access mirrors the submission dict"""
+
+    __slots__ = RECORD_FIELDS + ("_layout", "_answers", "_correct", "_extra", "_json")
+
+    def __init__(self, submission: dict):
+        self._extra: Optional[Dict[str, Any]] = None
+        self._layout: Optional[Layout] = None
+        self._answers: Any = _MISSING
+        self._correct = 0
+        self._json: Optional[Dict[Tuple[str, ...], bytes]] = None
+        self.update(submission)
+
+    def update(self, fields: dict):
+        self._json = None
+        for name, value in fields.items():
+            if name == "answers":
+                self._set_answers(value)
+            elif name in RECORD_FIELDS:
+                setattr(self, name, value)
+            else:
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[name] = value
+
+    def _set_answers(self, answers: Any):
+        packed = pack_answers(answers)
+        if packed is None:
+            self._layout, self._answers, self._correct = None, answers, 0
+        else:
+            self._layout, self._answers, self._correct = packed
+
+    def answers(self) -> Any:
+        """The answers as the list of dicts they were stored from"""
+        if self._layout is None:
+            return self._answers
+        correct = self._correct
+        return [
+            {"question_number": number, "question": question, "user_answer": text,
+             "is_correct": bool(correct >> i & 1)}
+            for i, ((number, question), text) in enumerate(zip(self._layout, self._answers))
+        ]
+
+    def search_fields(self) -> Tuple[str, str, str]:
+        """The text search looks at: username, email and the user_answer texts"""
+        if self._layout is not None:
+            texts = self._answers
+        elif isinstance(self._answers, list):
+            texts = [a.get("user_answer") for a in self._answers if isinstance(a, dict)]
+        else:
+            texts = ()
+        return (str(getattr(self, "username", "") or ""), str(getattr(self, "user_email", "") or ""),
+                " ".join(text for text in texts if isinstance(text, str)))
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name in RECORD_FIELDS:
+            return getattr(self, name, default)
+        if name == "answers":
+            return default if self._answers is _MISSING else self.answers()
+        return self._extra.get(name, default) if self._extra else default
+
+    def __getitem__(self, name: str) -> Any:
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> dict:
+        """The submission dict, or only the given fields of it"""
+        if fields is not None:
+            submission = {}
+            for name in fields:
+                value = self.get(name, _MISSING)
+                if value is not _MISSING:
+                    submission[name] = value
+            return submission
+        submission = {}
+        for name in RECORD_FIELDS[:4]:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                submission[name] = value
+        if self._answers is not _MISSING:
+            submission["answers"] = self.answers()
+        for name in RECORD_FIELDS[4:]:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                submission[name] = value
+        if self._extra:
+            submission.update(self._extra)
+        return submission
+
+    def json(self, fields: Optional[Iterable[str]] = None) -> bytes:
+        """to_dict(fields) encoded as JSON; call with the store's lock held"""
+        if fields is None:
+            return dumps(self.to_dict())
+        key = tuple(fields)
+        if self._json is not None:
+            encoded = self._json.get(key)
+            if encoded is not None:
+                return encoded
+        encoded = dumps(self.to_dict(key))
+        if "answers" not in key:
+            if self._json is None:
+                self._json = {}
+            if len(self._json) < JSON_CACHE_FORMS:
+                self._json[key] = encoded
+        return encoded
+
+
+def expand(records: Iterable[SubmissionRecord], fields: Optional[List[str]] = None) -> List[dict]:
+    return [record.to_dict(fields) for record in records]
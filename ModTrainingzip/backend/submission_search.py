@@ -0,0 +1,221 @@
+"""
+Full-text search over submissions
+Reviewers search by username, email and the free-text user_answer fields.
+A query is a list of terms that must all match:
+
+    word        a word, anywhere in those fields
+    word*       a word starting with "word" (at least MIN_PREFIX characters)
+    "a b c"     the words in this order; "a b c"* makes the last one a prefix
+
+Words are case- and accent-insensitive runs of letters and digits, the way
+SQLite's unicode61 tokenizer splits them, so both backends agree on what
+matches. The SQLite store searches an FTS5 table kept in step by triggers.
+The in-memory stores keep a SearchIndex: one ascending array of document
+numbers per word, updated as submissions are stored, changed and deleted.
+Results come newest first.
+"""
+
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Pattern, Sequence, Tuple
+import bisect
+import heapq
+import re
+import unicodedata
+
+MIN_PREFIX = 2
+MAX_TERMS = 16
+
+# (words, whether the last one is a prefix)
+Term = Tuple[Tuple[str, ...], bool]
+
+_WORD = re.compile(r"[^\W_]+")
+_QUERY_PART = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+
+
+def normalize(text: str) -> str:
+    text = text.lower()
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+def parse_query(query: str) -> List[Term]:
+    """Terms of a search query; raises ValueError when there is nothing to search for"""
+    terms: List[Term] = []
+    for phrase, star, word in _QUERY_PART.findall(query or ""):
+        if word:
+            prefix = word.endswith("*")
+            words = tokenize(word)
+        else:
+            prefix = star == "*"
+            words = tokenize(phrase)
+        if not words:
+            continue
+        if prefix and len(words[-1]) < MIN_PREFIX:
+            raise ValueError(f"Prefix searches need at least {MIN_PREFIX} characters")
+        terms.append((tuple(words), prefix))
+    if not terms:
+        raise ValueError("Search query has no words")
+    if len(terms) > MAX_TERMS:
+        raise ValueError(f"Search queries can have at most {MAX_TERMS} terms")
+    return terms
+
+
+def fts_expression(terms: List[Term]) -> str:
+    """The terms as an FTS5 MATCH expression (words are letters and digits, so quoting is safe)"""
+    return " ".join(f'"{" ".join(words)}"{" *" if prefix else ""}' for words, prefix in terms)
+
+
+def term_pattern(term: Term) -> Pattern:
+    """Regex finding a term in normalized text: its words in order, only separators between them"""
+    words, prefix = term
+    first = re.escape(words[0])
+    # The word-start check follows the first word, so the regex engine can scan for it as a literal
+    body = rf"{first}(?<![^\W_]{first})" + "".join(rf"[\W_]+{re.escape(word)}" for word in words[1:])
+    return re.compile(body if prefix else rf"{body}(?![^\W_])")
+
+
+def matches(terms: List[Term], fields: Sequence[str], patterns: Optional[List[Pattern]] = None) -> bool:
+    """Whether every term occurs in one of the fields"""
+    texts = [normalize(field) for field in fields]
+    return all(any(pattern.search(text) for text in texts)
+               for pattern in (patterns or [term_pattern(term) for term in terms]))
+
+
+class SearchIndex:
+    """Inverted index for the in-memory stores; callers serialise access
+
+    Each submission gets a document number when first indexed (so numbers
+    follow insertion order) and keeps it across updates. A word maps to the
+    ascending array of the documents containing it, so new submissions are
+    appends and a query walks its rarest word newest first and stops once
+    it has enough matches.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, array] = {}
+        self._doc_of: Dict[str, int] = {}
+        self._id_of: Dict[int, str] = {}
+        self._next_doc = 1
+        # Sorted words for prefix terms, built on the first prefix search
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def add(self, submission_id: str, fields: Sequence[str]):
+        doc = self._doc_of.get(submission_id)
+        if doc is None:
+            doc = self._next_doc
+            self._next_doc += 1
+            self._doc_of[submission_id] = doc
+            self._id_of[doc] = submission_id
+        for word in {word for field in fields for word in tokenize(field)}:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = array("I")
+                if self._vocabulary is not None:
+                    bisect.insort(self._vocabulary, word)
+            if not postings or postings[-1] < doc:
+                postings.append(doc)
+            else:
+                i = bisect.bisect_left(postings, doc)
+                if i == len(postings) or postings[i] != doc:
+                    postings.insert(i, doc)
+
+    def remove(self, submission_id: str, fields: Sequence[str], forget: bool = True):
+        """Drop a submission's words; fields are the ones it was indexed with"""
+        doc = self._doc_of.get(submission_id)
+        if doc is None:
+            return
+        for word in {word for field in fields for word in tokenize(field)}:
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            i = bisect.bisect_left(postings, doc)
+            if i < len(postings) and postings[i] == doc:
+                del postings[i]
+            if not postings:
+                del self._postings[word]
+                if self._vocabulary is not None:
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+        if forget:
+            del self._doc_of[submission_id]
+            del self._id_of[doc]
+
+    def update(self, submission_id: str, old_fields: Sequence[str], new_fields: Sequence[str]):
+        if tuple(old_fields) != tuple(new_fields):
+            self.remove(submission_id, old_fields, forget=False)
+            self.add(submission_id, new_fields)
+
+    def _expand(self, prefix: str) -> List[array]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        return [self._postings[word] for word in self._vocabulary[start:end]]
+
+    @staticmethod
+    def _descending(postings: array, before: Optional[int]) -> Iterator[int]:
+        end = len(postings) if before is None else bisect.bisect_left(postings, before)
+        return (postings[i] for i in range(end - 1, -1, -1))
+
+    def search(self, terms: List[Term], accept: Callable[[str], bool], fields_of: Callable[[str], Sequence[str]],
+               limit: int, before: Optional[int] = None) -> List[Tuple[int, str]]:
+        """Up to limit (document, id) matches, newest first, below document number before
+
+        accept filters candidates (status, passed); fields_of gives the text
+        to check phrases and prefixes against
+        """
+        exact = {word for words, prefix in terms for word in (words[:-1] if prefix else words)}
+        lists = []
+        for word in exact:
+            postings = self._postings.get(word)
+            if postings is None:
+                return []
+            lists.append(postings)
+        if lists:
+            lists.sort(key=len)
+            candidates = self._descending(lists[0], before)
+            others = lists[1:]
+        else:
+            # Only prefix terms: walk the expansions of the most selective one
+            expansions = min((self._expand(words[-1]) for words, _ in terms),
+                             key=lambda arrays: sum(len(postings) for postings in arrays))
+            if not expansions:
+                return []
+            candidates = _unique(heapq.merge(*(self._descending(p, before) for p in expansions), reverse=True))
+            others = []
+        # Single exact words are settled by the postings; the rest is checked against the text
+        patterns = [term_pattern(term) for term in terms if term[1] or len(term[0]) > 1]
+
+        found = []
+        for doc in candidates:
+            if any(not _contains(postings, doc) for postings in others):
+                continue
+            submission_id = self._id_of[doc]
+            if not accept(submission_id):
+                continue
+            if patterns and not matches(terms, fields_of(submission_id), patterns):
+                continue
+            found.append((doc, submission_id))
+            if len(found) == limit:
+                break
+        return found
+
+
+def _contains(postings: array, doc: int) -> bool:
+    i = bisect.bisect_left(postings, doc)
+    return i < len(postings) and postings[i] == doc
+
+
+def _unique(docs: Iterator[int]) -> Iterator[int]:
+    last = None
+    for doc in docs:
+        if doc != last:
+            yield doc
+            last = doc
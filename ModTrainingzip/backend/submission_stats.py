@@ -0,0 +1,135 @@
+"""
+Incremental submission statistics
+Status counters, per-day buckets and score histograms kept up to date from the
+submission store's change events, so the admin stats endpoint never has to
+scan the dataset. Days are keyed by the date a submission was created, so a
+day's pass rate reflects how that day's applicants were eventually judged.
+"""
+
+from typing import Dict, List, Optional
+import bisect
+import threading
+
+STATUSES = ("pending", "accepted", "denied")
+HISTOGRAM_BUCKETS = 10  # 0-9%, 10-19%, ..., 90-100%
+
+
+def _day(submission: dict) -> str:
+    return (submission.get("created_at") or "")[:10]
+
+
+def _score_bucket(submission: dict) -> int:
+    try:
+        score = float(submission.get("score") or 0)
+    except (TypeError, ValueError):
+        score = 0.0
+    return max(0, min(int(score // (100 / HISTOGRAM_BUCKETS)), HISTOGRAM_BUCKETS - 1))
+
+
+def _pass_rate(accepted: int, denied: int) -> float:
+    decided = accepted + denied
+    return round(accepted / decided * 100, 2) if decided else 0
+
+
+class _Bucket:
+    __slots__ = ("submitted", "passed", "statuses", "histogram")
+
+    def __init__(self):
+        self.submitted = 0
+        self.passed = 0
+        self.statuses = dict.fromkeys(STATUSES, 0)
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def apply(self, submission: dict, sign: int):
+        self.submitted += sign
+        if submission.get("passed"):
+            self.passed += sign
+        status = submission.get("status")
+        self.statuses[status] = self.statuses.get(status, 0) + sign
+        self.histogram[_score_bucket(submission)] += sign
+
+    def merge(self, other: "_Bucket"):
+        self.submitted += other.submitted
+        self.passed += other.passed
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        for i, count in enumerate(other.histogram):
+            self.histogram[i] += count
+
+
+class SubmissionStats:
+    """Counters maintained at every create, status change and delete"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total = _Bucket()
+        self._days: Dict[str, _Bucket] = {}
+        self._day_keys: List[str] = []  # sorted, for windowed queries
+
+    @classmethod
+    def attach(cls, store) -> "SubmissionStats":
+        """Build counters from the store's current contents, then follow its changes"""
+        stats = cls()
+        for submission in store.list():
+            stats._apply(submission, 1)
+        store.subscribe(stats.on_change)
+        return stats
+
+    def _apply(self, submission: dict, sign: int):
+        day = _day(submission)
+        bucket = self._days.get(day)
+        if bucket is None:
+            bucket = self._days[day] = _Bucket()
+            bisect.insort(self._day_keys, day)
+        bucket.apply(submission, sign)
+        self._total.apply(submission, sign)
+
+    def on_change(self, event: str, submission: dict, previous: Optional[dict]):
+        with self._lock:
+            if event == "created":
+                self._apply(submission, 1)
+            elif event == "updated":
+                self._apply(previous, -1)
+                self._apply(submission, 1)
+            elif event == "deleted":
+                self._apply(submission, -1)
+
+    def summary(self, since: Optional[str] = None, until: Optional[str] = None) -> dict:
+        """Stats for all time, or for submissions created between since and until (inclusive dates)"""
+        with self._lock:
+            if since is None and until is None:
+                total, days = self._total, None
+            else:
+                lo = bisect.bisect_left(self._day_keys, since) if since else 0
+                hi = bisect.bisect_right(self._day_keys, until) if until else len(self._day_keys)
+                total, days = _Bucket(), []
+                for day in self._day_keys[lo:hi]:
+                    bucket = self._days[day]
+                    if bucket.submitted == 0:
+                        continue
+                    total.merge(bucket)
+                    days.append({
+                        "date": day,
+                        "submitted": bucket.submitted,
+                        "passed": bucket.passed,
+                        **bucket.statuses,
+                        "pass_rate": _pass_rate(bucket.statuses["accepted"], bucket.statuses["denied"]),
+                    })
+
+            result = {
+                "total_submissions": total.submitted,
+                "pending": total.statuses["pending"],
+                "accepted": total.statuses["accepted"],
+                "denied": total.statuses["denied"],
+                "pass_rate": _pass_rate(total.statuses["accepted"], total.statuses["denied"]),
+                "test_passed": total.passed,
+                "score_histogram": [
+                    {"range": f"{i * 10}-{i * 10 + 9 if i < HISTOGRAM_BUCKETS - 1 else 100}", "count": count}
+                    for i, count in enumerate(total.histogram)
+                ],
+            }
+            if days is not None:
+                result["since"] = since
+                result["until"] = until
+                result["daily"] = days
+            return result
@@ -0,0 +1,497 @@
+"""
+Submission store shared by the backend servers
+Keeps submissions behind an id hash index, with secondary indexes on status
+and user_id and a (created_at, id) ordering so lookups, status filters,
+deletes and keyset pagination do not have to scan the whole dataset
+
+The in-memory stores hold compact SubmissionRecords (see submission_record)
+and hand out plain submission dicts built from them, and keep a full-text
+SearchIndex over them (see submission_search).
+
+Every store keeps a monotonic version, bumped by each change and remembered
+per submission, so the API can answer conditional requests (ETags) without
+building a response and serve "what changed since version N" deltas.
+Versions start from the current time in microseconds rather than zero, so a
+restarted process never hands out a version a client saw before the restart.
+
+create_store() picks the backend from SUBMISSION_STORE ("sqlite", "journal" or "memory")
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import base64
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+import fast_json
+from submission_record import SubmissionRecord, expand
+from submission_search import SearchIndex, Term, parse_query
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_STORE = os.environ.get("SUBMISSION_STORE", "sqlite")
+SUBMISSION_DB_PATH = os.environ.get("SUBMISSION_DB_PATH", "submissions.db")
+SUBMISSION_JOURNAL_PATH = os.environ.get("SUBMISSION_JOURNAL_PATH", "submissions")
+
+SUBMISSION_FIELDS = (
+    "id", "user_id", "user_email", "username", "answers",
+    "score", "passed", "status", "created_at", "updated_at",
+)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_TOMBSTONES = 10000  # deleted ids remembered for change deltas
+
+SortKey = Tuple[str, str]
+# (encoded changed submissions, deleted ids, version they bring a client up to)
+Changes = Tuple[List[bytes], List[str], int]
+SEARCH_TEXT_FIELDS = frozenset(("username", "user_email", "answers"))
+
+
+def initial_version() -> int:
+    """First version of a new store: later than any version handed out before"""
+    return time.time_ns() // 1000
+
+
+def sort_key(submission: dict) -> SortKey:
+    return (submission.get("created_at") or "", submission["id"])
+
+
+def encode_cursor(key: SortKey) -> str:
+    """Opaque keyset cursor pointing just after the given (created_at, id)"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, submission_id = json.loads(raw)
+        return (str(created_at), str(submission_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma separated fields= projection; None means every field"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SUBMISSION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return names
+
+
+def project(submissions: Iterable[dict], fields: Optional[List[str]]) -> List[dict]:
+    if fields is None:
+        return list(submissions)
+    return [{name: s[name] for name in fields if name in s} for s in submissions]
+
+
+# listener(event, submission, previous) with event one of "created", "updated", "deleted";
+# previous is the record as it was before an update (None otherwise). Changes made
+# by other processes (see StoreEvents.sync) carry every field except answers.
+StoreListener = Callable[[str, dict, Optional[dict]], None]
+
+
+class StoreEvents:
+    """Change notifications shared by every store backend
+
+    Derived views (stats counters, caches, indexes) subscribe here so they are
+    updated at each state transition instead of rescanning the dataset
+    """
+
+    # True when several processes can share the store (and sync() follows them)
+    shared = False
+
+    def _init_events(self):
+        self._listeners: List[StoreListener] = []
+
+    def subscribe(self, listener: StoreListener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: StoreListener):
+        self._listeners.remove(listener)
+
+    def _emit(self, event: str, submission: dict, previous: Optional[dict] = None):
+        for listener in self._listeners:
+            try:
+                listener(event, submission, previous)
+            except Exception as e:
+                logger.error(f"Submission store listener failed on {event}: {e}", exc_info=True)
+
+    def sync(self) -> int:
+        """Emit events for changes other processes made; returns how many were emitted"""
+        return 0
+
+
+class SubmissionStore(StoreEvents):
+    """In-memory submission repository with id, status and user_id indexes
+
+    Records are stored compactly and every read returns a fresh dict, so
+    callers can keep or change what they get without touching the store.
+    """
+
+    persistent = False
+
+    def __init__(self, submissions: Optional[List[dict]] = None):
+        self._init_events()
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, SubmissionRecord] = {}
+        self._by_status: Dict[str, Dict[str, SubmissionRecord]] = {}
+        self._by_user: Dict[str, Dict[str, SubmissionRecord]] = {}
+        # (created_at, id) keys kept sorted for ordered listing and keyset pagination;
+        # new submissions almost always sort last, so inserts are appends
+        self._keys: List[SortKey] = []
+        self._status_keys: Dict[str, List[SortKey]] = {}
+        self._version = initial_version()
+        # id -> version of its last change, least recently changed first;
+        # deleted ids stay in it as tombstones until there are too many
+        self._changed: "OrderedDict[str, int]" = OrderedDict()
+        self._tombstones = 0
+        # Deltas from before this version are unknown (deletes were forgotten)
+        self._horizon = self._version
+        self._search = SearchIndex()
+        for submission in submissions or []:
+            self.add(submission)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, submission_id: str) -> bool:
+        return submission_id in self._by_id
+
+    @staticmethod
+    def _insort(keys: List[SortKey], key: SortKey):
+        if not keys or keys[-1] < key:
+            keys.append(key)
+        else:
+            bisect.insort(keys, key)
+
+    @staticmethod
+    def _remove_key(keys: List[SortKey], key: SortKey):
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def version_of(self, submission_id: str) -> Optional[int]:
+        """Version at which the submission last changed, None if it does not exist"""
+        with self._lock:
+            return self._changed.get(submission_id) if submission_id in self._by_id else None
+
+    def _touch(self, submission_id: str, deleted: bool = False):
+        """Record a change to a submission; called with the lock held"""
+        self._version += 1
+        if deleted:
+            self._tombstones += 1
+        elif submission_id in self._changed and submission_id not in self._by_id:
+            self._tombstones -= 1  # re-added after a delete
+        self._changed[submission_id] = self._version
+        self._changed.move_to_end(submission_id)
+        if self._tombstones > MAX_TOMBSTONES:
+            self._forget_tombstones(MAX_TOMBSTONES // 2)
+
+    def _forget_tombstones(self, keep: int):
+        expired = []
+        for sid, version in self._changed.items():
+            if self._tombstones - len(expired) <= keep:
+                break
+            if sid not in self._by_id:
+                expired.append((sid, version))
+        for sid, version in expired:
+            del self._changed[sid]
+            self._horizon = version
+        self._tombstones -= len(expired)
+
+    def _index(self, submission: SubmissionRecord):
+        sid = submission["id"]
+        status = submission.get("status")
+        self._by_status.setdefault(status, {})[sid] = submission
+        self._by_user.setdefault(submission.get("user_id"), {})[sid] = submission
+        key = sort_key(submission)
+        self._insort(self._keys, key)
+        self._insort(self._status_keys.setdefault(status, []), key)
+
+    def _unindex(self, submission: SubmissionRecord):
+        sid = submission["id"]
+        for index, key in ((self._by_status, submission.get("status")),
+                           (self._by_user, submission.get("user_id"))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(sid, None)
+                if not bucket:
+                    del index[key]
+        key = sort_key(submission)
+        self._remove_key(self._keys, key)
+        self._remove_key(self._status_keys.get(submission.get("status"), []), key)
+
+    def add(self, submission: dict) -> dict:
+        """Insert a submission, replacing any existing record with the same id"""
+        record = SubmissionRecord(submission)
+        with self._lock:
+            existing = self._by_id.get(submission["id"])
+            if existing is not None:
+                self._unindex(existing)
+                self._search.update(submission["id"], existing.search_fields(), record.search_fields())
+            else:
+                self._search.add(submission["id"], record.search_fields())
+            self._touch(submission["id"])
+            self._by_id[submission["id"]] = record
+            self._index(record)
+            if self._listeners:
+                if existing is None:
+                    self._emit("created", record.to_dict())
+                else:
+                    self._emit("updated", record.to_dict(), existing.to_dict())
+            return submission
+
+    def get(self, submission_id: str) -> Optional[dict]:
+        record = self._by_id.get(submission_id)
+        return record.to_dict() if record is not None else None
+
+    def update(self, submission_id: str, **fields) -> Optional[dict]:
+        """Update fields on a submission, touching only the indexes whose key changed"""
+        with self._lock:
+            submission = self._by_id.get(submission_id)
+            if submission is None:
+                return None
+            previous = submission.to_dict() if self._listeners else None
+            self._touch(submission_id)
+            old_status, old_user, old_key = submission.get("status"), submission.get("user_id"), sort_key(submission)
+            old_text = submission.search_fields() if SEARCH_TEXT_FIELDS.intersection(fields) else None
+            submission.update(fields)
+            if old_text is not None:
+                self._search.update(submission_id, old_text, submission.search_fields())
+            status, user_id, key = submission.get("status"), submission.get("user_id"), sort_key(submission)
+
+            for index, old, new in ((self._by_status, old_status, status), (self._by_user, old_user, user_id)):
+                if old != new:
+                    bucket = index[old]
+                    del bucket[submission_id]
+                    if not bucket:
+                        del index[old]
+                    index.setdefault(new, {})[submission_id] = submission
+            if old_key != key:
+                self._remove_key(self._keys, old_key)
+                self._insort(self._keys, key)
+            if old_key != key or old_status != status:
+                self._remove_key(self._status_keys.get(old_status, []), old_key)
+                self._insort(self._status_keys.setdefault(status, []), key)
+            updated = submission.to_dict()
+            if previous is not None:
+                self._emit("updated", updated, previous)
+            return updated
+
+    def update_many(self, changes: Dict[str, dict]) -> int:
+        """Apply {id: fields} updates; returns the number of submissions changed"""
+        with self._lock:
+            return sum(1 for sid, fields in changes.items() if self.update(sid, **fields) is not None)
+
+    def compare_and_set(self, submission_id: str, expected: dict, **fields) -> Tuple[Optional[dict], bool]:
+        """Update only if the submission still has the expected values
+
+        Returns (submission, applied): the updated record, or the current one
+        (None if missing) when it did not match
+        """
+        with self._lock:
+            submission = self._by_id.get(submission_id)
+            if submission is None or any(submission.get(k) != v for k, v in expected.items()):
+                return (submission.to_dict() if submission is not None else None), False
+            return self.update(submission_id, **fields), True
+
+    def delete(self, submission_id: str) -> Optional[dict]:
+        with self._lock:
+            record = self._by_id.pop(submission_id, None)
+            if record is None:
+                return None
+            self._unindex(record)
+            self._search.remove(submission_id, record.search_fields())
+            self._touch(submission_id, deleted=True)
+            submission = record.to_dict()
+            self._emit("deleted", submission)
+            return submission
+
+    def _ordered(self, status: Optional[str], user_id: Optional[str]) -> Tuple[List[SortKey], bool]:
+        """Sorted candidate keys for a filter, and whether they still need a status check"""
+        if user_id is not None:
+            bucket = self._by_user.get(user_id, {})
+            return sorted(sort_key(s) for s in bucket.values()), status is not None
+        if status is not None:
+            return self._status_keys.get(status, []), False
+        return self._keys, False
+
+    def _list_records(self, status: Optional[str], user_id: Optional[str]) -> List[SubmissionRecord]:
+        with self._lock:
+            keys, check_status = self._ordered(status, user_id)
+            records = [self._by_id[sid] for _, sid in keys]
+        if check_status:
+            records = [r for r in records if r.get("status") == status]
+        return records
+
+    def list(self, status: Optional[str] = None, user_id: Optional[str] = None) -> List[dict]:
+        """Return submissions ordered by created_at, optionally filtered by status and/or user"""
+        return expand(self._list_records(status, user_id))
+
+    def _page_records(self, limit: int, cursor: Optional[str], status: Optional[str],
+                      user_id: Optional[str]) -> Tuple[List[SubmissionRecord], Optional[str]]:
+        after = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            keys, check_status = self._ordered(status, user_id)
+            start = bisect.bisect_right(keys, after) if after else 0
+            records = []
+            for i in range(start, len(keys)):
+                record = self._by_id[keys[i][1]]
+                if check_status and record.get("status") != status:
+                    continue
+                if len(records) == limit:
+                    return records, encode_cursor(sort_key(records[-1]))
+                records.append(record)
+            return records, None
+
+    def page(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+             status: Optional[str] = None, user_id: Optional[str] = None,
+             fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[str]]:
+        """Keyset page ordered by (created_at, id); returns (submissions, next_cursor)"""
+        records, next_cursor = self._page_records(limit, cursor, status, user_id)
+        return expand(records, fields), next_cursor
+
+    # Encoded variants of the reads above, for responses assembled from bytes.
+    # Encoding happens under the lock, so a record's cached JSON cannot be
+    # filled in from a state an update has already replaced
+
+    def get_json(self, submission_id: str) -> Optional[bytes]:
+        with self._lock:
+            record = self._by_id.get(submission_id)
+            return record.json() if record is not None else None
+
+    def list_json(self, status: Optional[str] = None, fields: Optional[List[str]] = None) -> bytes:
+        with self._lock:
+            return fast_json.array([record.json(fields) for record in self._list_records(status, None)])
+
+    def page_json(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                  status: Optional[str] = None, user_id: Optional[str] = None,
+                  fields: Optional[List[str]] = None) -> Tuple[List[bytes], Optional[str]]:
+        with self._lock:
+            records, next_cursor = self._page_records(limit, cursor, status, user_id)
+            return [record.json(fields) for record in records], next_cursor
+
+    def changes_json(self, since: int, fields: Optional[List[str]] = None) -> Optional[Changes]:
+        """Submissions changed and ids deleted after version since, or None when that is no longer known"""
+        with self._lock:
+            if since < self._horizon or since > self._version:
+                return None
+            items, deleted = [], []
+            for sid in reversed(self._changed):
+                if self._changed[sid] <= since:
+                    break
+                record = self._by_id.get(sid)
+                if record is None:
+                    deleted.append(sid)
+                else:
+                    items.append(record.json(fields))
+            items.reverse()
+            deleted.reverse()
+            return items, deleted, self._version
+
+    def search_json(self, terms: List[Term], status: Optional[str] = None, passed: Optional[bool] = None,
+                    limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                    fields: Optional[List[str]] = None) -> Tuple[List[bytes], Optional[str]]:
+        """Submissions matching the search terms, newest first; returns (encoded submissions, next_cursor)"""
+        before = decode_search_cursor(cursor) if cursor else None
+
+        def accept(submission_id: str) -> bool:
+            record = self._by_id[submission_id]
+            return ((status is None or record.get("status") == status)
+                    and (passed is None or bool(record.get("passed")) == passed))
+
+        with self._lock:
+            found = self._search.search(terms, accept, lambda sid: self._by_id[sid].search_fields(),
+                                        limit + 1, before)
+            items = [self._by_id[sid].json(fields) for _, sid in found[:limit]]
+        next_cursor = str(found[limit - 1][0]) if len(found) > limit else None
+        return items, next_cursor
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status is None:
+            return len(self._by_id)
+        return len(self._by_status.get(status, ()))
+
+
+def query_submissions_json(store, status: Optional[str] = None, limit: Optional[int] = None,
+                           cursor: Optional[str] = None, fields: Optional[str] = None) -> bytes:
+    """Shared GET /api/submissions logic, returning the encoded response body
+
+    Without limit/cursor the whole (projected) list is returned, as older
+    clients expect. With either one the result is a keyset page:
+    {"submissions": [...], "next_cursor": str | None}. Bodies are built
+    from the store's encoded records.
+    Raises ValueError for bad cursors or unknown fields.
+    """
+    projection = parse_fields(fields)
+    if limit is None and cursor is None:
+        return store.list_json(status=status, fields=projection)
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    items, next_cursor = store.page_json(limit, cursor, status=status, fields=projection)
+    return fast_json.page(items, next_cursor)
+
+
+def query_changes_json(store, since: int, fields: Optional[str] = None) -> bytes:
+    """GET /api/submissions?since=<version>: what changed after a version the client has
+
+    {"version": int, "reset": false, "submissions": [...], "deleted": [ids]}
+    in change order, or {"version": int, "reset": true} when the store cannot
+    tell any more (the client reloads the list). Raises ValueError for
+    unknown fields.
+    """
+    projection = parse_fields(fields)
+    changes = store.changes_json(since, projection)
+    if changes is None:
+        return fast_json.changes(store.version, None, None)
+    items, deleted, version = changes
+    return fast_json.changes(version, items, deleted)
+
+
+def decode_search_cursor(cursor: str) -> int:
+    """Search pages continue below a document number (a rowid for SQLite)"""
+    if not cursor.isdigit():
+        raise ValueError("Invalid cursor")
+    return int(cursor)
+
+
+def query_search_json(store, q: str, status: Optional[str] = None, passed: Optional[bool] = None,
+                      limit: Optional[int] = None, cursor: Optional[str] = None,
+                      fields: Optional[str] = None) -> bytes:
+    """GET /api/submissions/search: {"submissions": [...], "next_cursor": str | None}, newest first
+
+    Raises ValueError for empty or malformed queries, bad cursors or unknown fields
+    """
+    terms = parse_query(q)
+    projection = parse_fields(fields)
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    items, next_cursor = store.search_json(terms, status=status, passed=passed, limit=limit,
+                                           cursor=cursor, fields=projection)
+    return fast_json.page(items, next_cursor)
+
+
+def create_store(backend: Optional[str] = None, path: Optional[str] = None):
+    """Create the submission store configured for this process"""
+    backend = (backend or SUBMISSION_STORE).lower()
+    if backend == "memory":
+        return SubmissionStore()
+    if backend == "sqlite":
+        from sqlite_store import SQLiteSubmissionStore
+        return SQLiteSubmissionStore(path or SUBMISSION_DB_PATH)
+    if backend == "journal":
+        from journal_store import JournaledSubmissionStore
+        return JournaledSubmissionStore(path or SUBMISSION_JOURNAL_PATH)
+    raise ValueError(f"Unknown SUBMISSION_STORE backend: {backend}")
@@ -0,0 +1,42 @@
+"""
+Shared pytest setup for the backend tests
+The backend modules are flat files in the directory above, imported the way
+the servers import them. Their databases go to a temporary directory and
+outbound Discord URLs point nowhere, so tests never touch real data or
+Discord. unified_server is imported lazily (the server fixture) and its
+lifespan is not run, so no job queue workers start.
+
+Usage (from backend/, with pytest installed): python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+DATA_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+for name, value in {
+    "SUBMISSION_STORE": "memory",
+    "SUBMISSION_DB_PATH": os.path.join(DATA_DIR, "submissions.db"),
+    "SUBMISSION_JOURNAL_PATH": os.path.join(DATA_DIR, "submissions"),
+    "SUBMISSION_GUARD_DB": os.path.join(DATA_DIR, "guard.db"),
+    "JOB_QUEUE_DB": os.path.join(DATA_DIR, "jobs.db"),
+    "DISCORD_WEBHOOK_URL": "http://discord.invalid/api/webhooks/1/token",
+    "DISCORD_BOT_URL": "http://bot.invalid",
+}.items():
+    os.environ[name] = value
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture(scope="session")
+def server():
+    import unified_server
+    return unified_server
+
+
+@pytest.fixture
+def client(server):
+    from fastapi.testclient import TestClient
+    return TestClient(server.app)
@@ -0,0 +1,155 @@
+"""
+WebhookDispatcher: batching, 429 retries, rejected batches and cancelled senders
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from discord_dispatcher import MAX_429_RETRIES, WebhookDeliveryError, WebhookDispatcher, embed_field
+
+URL = "https://discord.test/api/webhooks/1/token"
+
+
+class FakeDiscord:
+    """MockTransport handler answering with the status codes it is told to"""
+
+    def __init__(self, status=204):
+        self.status = status
+        self.posts = []
+        self.in_flight = asyncio.Event()
+        self.release = None  # an asyncio.Event holding each response until set
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = httpx.Response(200, content=request.content).json()
+        self.posts.append(body)
+        self.in_flight.set()
+        if self.release is not None:
+            await self.release.wait()
+        status = self.status(body) if callable(self.status) else self.status
+        if status == 429:
+            return httpx.Response(429, headers={"Retry-After": "0.001"}, json={"retry_after": 0.001})
+        return httpx.Response(status, text="" if status < 300 else "rejected")
+
+
+def dispatcher(discord: FakeDiscord) -> WebhookDispatcher:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(discord))
+    return WebhookDispatcher(URL, lambda: client, linger=0.001)
+
+
+def embed(value="v"):
+    return {"fields": [embed_field("Username", value)]}
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+def test_burst_is_batched_into_one_message():
+    async def main():
+        discord = FakeDiscord()
+        d = dispatcher(discord)
+        await asyncio.gather(*(d.send(embed(str(i)), label=str(i)) for i in range(5)))
+        await d.stop()
+        return discord.posts
+
+    posts = run(main())
+    assert [len(post["embeds"]) for post in posts] == [5]
+
+
+def test_rejected_batch_fails_only_the_bad_embed():
+    async def main():
+        discord = FakeDiscord(status=lambda body: 400 if any(
+            f["value"] == "bad" for e in body["embeds"] for f in e["fields"]) else 204)
+        d = dispatcher(discord)
+        values = ["a", "b", "bad", "c"]
+        results = await asyncio.gather(*(d.send(embed(v), label=v) for v in values), return_exceptions=True)
+        await d.stop()
+        return results, discord.posts
+
+    results, posts = run(main())
+    assert [type(r).__name__ for r in results] == ["NoneType", "NoneType", "WebhookDeliveryError", "NoneType"]
+    assert [len(post["embeds"]) for post in posts] == [4, 1, 1, 1, 1]
+
+
+def test_429s_give_up_after_max_retries():
+    async def main():
+        discord = FakeDiscord(status=429)
+        d = dispatcher(discord)
+        with pytest.raises(WebhookDeliveryError):
+            await d.send(embed())
+        await d.stop()
+        return discord.posts
+
+    assert len(run(main())) == MAX_429_RETRIES
+
+
+def test_cancelled_sender_on_last_429_keeps_the_dispatcher_running(caplog):
+    async def main():
+        discord = FakeDiscord(status=429)
+        discord.release = asyncio.Event()
+        d = dispatcher(discord)
+        sender = asyncio.create_task(d.send(embed()))
+        # Let the first MAX_429_RETRIES - 1 posts through, then cancel the sender
+        # while its last attempt is in flight
+        for _ in range(MAX_429_RETRIES):
+            await discord.in_flight.wait()
+            discord.in_flight.clear()
+            if len(discord.posts) == MAX_429_RETRIES:
+                break
+            discord.release.set()
+            await asyncio.sleep(0)
+            discord.release.clear()
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        # Its last attempt is rate limited too, with nobody left waiting for it
+        discord.release.set()
+        await asyncio.sleep(0.01)
+        discord.status = 204
+
+        assert not d._task.done()
+        await d.send(embed("later"))
+        await d.stop()
+        return discord.posts
+
+    posts = run(main())
+    assert posts[-1]["embeds"][0]["fields"][0]["value"] == "later"
+    assert not [r for r in caplog.records if r.levelname == "ERROR"]
+
+
+def test_cancelled_sender_is_not_posted_and_later_sends_succeed():
+    async def main():
+        discord = FakeDiscord(status=429)
+        d = dispatcher(discord)
+        sender = asyncio.create_task(d.send(embed("gone")))
+        await discord.in_flight.wait()
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        discord.status = 204
+        await d.send(embed("later"))
+        await d.stop()
+        return discord.posts
+
+    posts = run(main())
+    assert [post["embeds"][0]["fields"][0]["value"] for post in posts] == ["gone", "later"]
+
+
+def test_dead_loop_is_restarted_by_send():
+    async def main():
+        discord = FakeDiscord()
+        d = dispatcher(discord)
+        await d.start()
+        d._task.cancel()
+        await asyncio.gather(d._task, return_exceptions=True)
+        await d.send(embed())
+        await d.stop()
+        return discord.posts
+
+    assert len(run(main())) == 1
+
+
+def test_embed_field_values_are_never_empty_or_too_long():
+    assert embed_field("Email", "")["value"] == "—"
+    assert embed_field("Email", None)["value"] == "—"
+    assert len(embed_field("Email", "x" * 5000)["value"]) == 1024
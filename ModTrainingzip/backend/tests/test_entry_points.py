@@ -0,0 +1,40 @@
+"""
+Entry points: the compatibility shims re-export the ASGI app, app.py refuses
+gunicorn's sync worker, and serve.py's default worker count
+"""
+
+import sys
+
+import pytest
+
+
+def test_shims_export_the_unified_app(server):
+    import api_server
+    import app
+    import server as legacy_server
+    assert app.app is legacy_server.app is api_server.app is server.app
+
+
+@pytest.mark.parametrize("argv, sync", [
+    (["/usr/bin/gunicorn", "app:app"], True),
+    (["/usr/bin/gunicorn", "app:app", "-k", "uvicorn.workers.UvicornWorker"], False),
+    (["/usr/bin/gunicorn", "-c", "gunicorn.conf.py", "app:app"], False),
+    (["/usr/bin/uvicorn", "app:app"], False),
+])
+def test_sync_gunicorn_is_detected(server, monkeypatch, tmp_path, argv, sync):
+    import app
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", argv)
+    monkeypatch.delenv("GUNICORN_CMD_ARGS", raising=False)
+    assert app._sync_gunicorn() is sync
+
+
+def test_serve_defaults_to_two_workers(monkeypatch):
+    import serve
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(serve, "SUBMISSION_STORE", "sqlite")
+    assert serve.worker_count() == serve.DEFAULT_WORKERS == 2
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert serve.worker_count() == 4
+    monkeypatch.setattr(serve, "SUBMISSION_STORE", "memory")
+    assert serve.worker_count() == 1
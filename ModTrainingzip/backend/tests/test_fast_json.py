@@ -0,0 +1,50 @@
+"""
+fast_json: orjson and standard json paths give the same bodies
+"""
+
+import json
+
+import pytest
+
+import fast_json
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson 3.9+ is not installed")
+    return fast_json
+
+
+def test_dumps_and_fragment(encoder):
+    raw = '[{"question_number":1,"user_answer":"ticket ✅"}]'
+    body = encoder.dumps({"id": "a", "answers": encoder.fragment(raw), 1: None})
+    assert json.loads(body) == {"id": "a", "answers": json.loads(raw), "1": None}
+
+
+def test_page_and_changes(encoder):
+    items = [encoder.dumps({"id": "a"}), encoder.dumps({"id": "b"})]
+    assert json.loads(encoder.page(items, "c1")) == {"submissions": [{"id": "a"}, {"id": "b"}], "next_cursor": "c1"}
+    assert json.loads(encoder.page([], None)) == {"submissions": [], "next_cursor": None}
+    assert json.loads(encoder.changes(7, None, None)) == {"version": 7, "reset": True}
+    assert json.loads(encoder.changes(8, items[:1], ["x"])) == {
+        "version": 8, "reset": False, "submissions": [{"id": "a"}], "deleted": ["x"]}
+
+
+def test_orjson_without_fragment_falls_back_to_json(monkeypatch):
+    import importlib
+    import sys
+    import types
+
+    old = types.ModuleType("orjson")
+    old.dumps = lambda *args, **kwargs: b"null"
+    monkeypatch.setitem(sys.modules, "orjson", old)
+    try:
+        reloaded = importlib.reload(fast_json)
+        assert reloaded.orjson is None
+        assert json.loads(reloaded.dumps({"answers": reloaded.fragment("[1]")})) == {"answers": [1]}
+    finally:
+        monkeypatch.undo()
+        importlib.reload(fast_json)
@@ -0,0 +1,115 @@
+"""
+Server-side grading: Grader gives the verdicts of the frontend's checkAnswer
+on the real question bank, and batch re-grading agrees with grading one
+submission at a time
+"""
+
+import random
+
+import pytest
+
+from grading import Grader, QuestionMatcher
+from regrade import diff_batch, grade_batch, regrade
+from submission_store import SubmissionStore
+
+
+@pytest.fixture(scope="module")
+def grader():
+    return Grader.from_file()
+
+
+def check_answer(question, answer, match_threshold):
+    """frontend/src/lib/testQuestions.js checkAnswer, transcribed"""
+    normalized = answer.lower()
+    matched = [k for k in question["keywords"] if k.lower() in normalized]
+    return len(matched) / len(question["keywords"]) * 100 >= match_threshold
+
+
+def random_answers(grader, count, seed=7):
+    """Answers built from each question's keywords plus filler, hitting both sides of the threshold"""
+    rng = random.Random(seed)
+    vocabulary = [k for q in grader.questions for k in q["keywords"]] + ["the", "ticket", "please", "OK"]
+    rows = []
+    for _ in range(count):
+        row = []
+        for question in grader.questions:
+            words = rng.sample(question["keywords"], rng.randint(0, len(question["keywords"])))
+            words += rng.sample(vocabulary, 3)
+            rng.shuffle(words)
+            row.append(" ".join(w.upper() if rng.random() < 0.2 else w for w in words))
+        rows.append(row)
+    return rows
+
+
+def test_bank_loads(grader):
+    assert grader.questions
+    assert grader.match_threshold == 30 and grader.pass_score == 80
+    assert all(q["keywords"] for q in grader.questions)
+
+
+def test_check_answer_matches_the_frontend(grader):
+    for row in random_answers(grader, 200):
+        for question, answer in zip(grader.questions, row):
+            assert grader.check_answer(question["id"], answer) == \
+                check_answer(question, answer, grader.match_threshold), answer
+
+
+@pytest.mark.parametrize("keywords,threshold,needed", [
+    (["a", "b", "c"], 30, 1),
+    (["a", "b", "c"], 34, 2),
+    (["a", "b", "c", "d", "e", "f", "g", "h", "i", "j"], 30, 3),
+    (["a"], 100, 1),
+    ([], 30, 1),
+])
+def test_needed_hits_use_the_frontend_arithmetic(keywords, threshold, needed):
+    assert QuestionMatcher(keywords, threshold).needed == needed
+
+
+def test_unknown_question_and_missing_answer_are_wrong(grader):
+    assert not grader.check_answer(-1, grader.questions[0]["keywords"][0])
+    result = grader.grade([])
+    assert result["score"] == 0 and not result["passed"]
+    assert [a["user_answer"] for a in result["answers"]] == [""] * len(grader.questions)
+
+
+def test_grade_takes_questions_from_the_bank(grader):
+    first = grader.questions[0]
+    result = grader.grade([{"question_number": 1, "question": "forged", "user_answer": " ".join(first["keywords"]),
+                            "is_correct": False}])
+    assert result["answers"][0]["question"] == first["question"]
+    assert result["answers"][0]["is_correct"]
+    assert result["score"] == pytest.approx(100 / len(grader.questions))
+
+
+def test_grade_batch_matches_grade(grader):
+    rows = random_answers(grader, 300)
+    verdicts, scores, passed = grade_batch(grader, rows)
+    for row, row_verdicts, score, row_passed in zip(rows, verdicts, scores, passed):
+        expected = grader.grade([{"question_number": n, "user_answer": text} for n, text in enumerate(row, start=1)])
+        assert row_verdicts == [a["is_correct"] for a in expected["answers"]]
+        assert score == expected["score"] and row_passed == expected["passed"]
+    assert any(passed) and not all(passed)
+    assert grade_batch(grader, []) == ([], [], [])
+
+
+def test_regrade_fixes_stale_grades(grader):
+    rows = random_answers(grader, 40)
+    store = SubmissionStore()
+    for i, row in enumerate(rows):
+        graded = grader.grade([{"question_number": n, "user_answer": text} for n, text in enumerate(row, start=1)])
+        if i % 4 == 0:  # graded by an older bank: every verdict inverted
+            graded["answers"] = [dict(a, is_correct=not a["is_correct"]) for a in graded["answers"]]
+            graded["passed"] = not graded["passed"]
+        store.add({"id": f"s{i:02d}", "status": "pending", "created_at": f"2026-01-01T00:00:{i:02d}", **graded})
+
+    assert diff_batch(grader, [store.get("s01")])["changes"] == {}
+    report = regrade(store, grader, batch_size=7, workers=0, dry_run=True).to_dict()
+    assert report["scanned"] == 40 and report["changed"] == 10 and report["verdicts_flipped"] == 10
+    stale = store.get("s00")
+    assert stale["passed"] != grader.grade(stale["answers"])["passed"]  # a dry run writes nothing
+
+    regrade(store, grader, batch_size=7, workers=0)
+    for submission in store.list():
+        expected = grader.grade(submission["answers"])
+        assert submission["answers"] == expected["answers"] and submission["passed"] == expected["passed"]
+    assert regrade(store, grader, workers=0).changed == 0
@@ -0,0 +1,146 @@
+"""
+JobQueue: jobs run through their handlers, dedup keys are single-flight,
+leases hand a dead process's jobs to another one, and failing jobs retry
+and end up in the dead-letter list
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import job_queue
+from job_queue import JobError, JobQueue, PermanentJobError
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+@pytest.fixture
+def queue(db):
+    queue = JobQueue(db, workers=2, rate=0, max_attempts=3)
+    yield queue
+    queue.close()
+
+
+async def drain(queue, until, timeout=5.0):
+    await queue.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while not until():
+            assert time.monotonic() < deadline, "queue did not drain"
+            await asyncio.sleep(0.01)
+    finally:
+        await queue.stop()
+
+
+def test_jobs_run_and_are_removed(queue):
+    seen = []
+
+    async def handler(payload):
+        seen.append(payload["n"])
+
+    queue.register("ping", handler)
+    for n in range(3):
+        queue.enqueue("ping", {"n": n})
+    asyncio.run(drain(queue, lambda: queue.completed == 3))
+    assert sorted(seen) == [0, 1, 2]
+    assert queue.depth() == 0
+
+
+def test_batched_kind_gets_one_call(queue):
+    calls = []
+
+    async def handler(payloads):
+        calls.append([p["n"] for p in payloads])
+        return [None if p["n"] != 1 else JobError("later", retry_after=60) for p in payloads]
+
+    queue.register("roles", handler, batch_size=10)
+    for n in range(3):
+        queue.enqueue("roles", {"n": n})
+    asyncio.run(drain(queue, lambda: queue.completed == 2))
+    assert calls == [[0, 1, 2]]
+    assert queue.metrics()["queued"] == 1  # only the failed one is retried
+
+
+def test_dedup_key_is_single_flight(queue):
+    first = queue.enqueue("roles", {"user": "1"}, dedup_key="1")
+    assert queue.enqueue("roles", {"user": "1"}, dedup_key="1") == first
+    assert queue.enqueue("webhook", {"user": "1"}, dedup_key="1") != first  # keys are per kind
+    assert queue.enqueue("roles", {"user": "2"}, dedup_key="2") != first
+    assert queue.coalesced == 1
+    assert queue.depth() == 3
+
+    # Once the job has run, the same key queues new work again
+    queue.register("roles", lambda payload: asyncio.sleep(0))
+    queue.register("webhook", lambda payload: asyncio.sleep(0))
+    asyncio.run(drain(queue, lambda: queue.depth() == 0))
+    assert queue.enqueue("roles", {"user": "1"}, dedup_key="1") != first
+
+
+def test_dedup_key_joins_a_running_job(queue):
+    first = queue.enqueue("roles", {"user": "1"}, dedup_key="1")
+    assert [job["id"] for job in queue._claim()] == [first]
+    assert queue.enqueue("roles", {"user": "1"}, dedup_key="1") == first
+
+
+def test_expired_lease_is_claimed_by_another_process(db, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_LEASE_SECONDS", 0.05)
+    crashed, survivor = JobQueue(db, rate=0), JobQueue(db, rate=0)
+    try:
+        job_id = crashed.enqueue("ping", {})
+        assert [job["id"] for job in crashed._claim()] == [job_id]
+        assert survivor._claim() == []  # still leased
+        time.sleep(0.1)
+        assert [job["id"] for job in survivor._claim()] == [job_id]
+    finally:
+        crashed.close()
+        survivor.close()
+
+
+def test_clean_stop_hands_jobs_back(db):
+    stopping, other = JobQueue(db, rate=0), JobQueue(db, rate=0)
+    try:
+        job_id = stopping.enqueue("ping", {})
+        stopping._claim()
+        assert other._claim() == []
+        asyncio.run(stopping.stop())
+        assert [job["id"] for job in other._claim()] == [job_id]
+    finally:
+        stopping.close()
+        other.close()
+
+
+def test_failures_retry_then_dead_letter(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_BACKOFF_BASE", 0)
+    attempts = []
+
+    async def handler(payload):
+        attempts.append(payload)
+        raise RuntimeError("bot is down")
+
+    queue.register("ping", handler)
+    job_id = queue.enqueue("ping", {"n": 1})
+    asyncio.run(drain(queue, lambda: queue.dead == 1))
+    assert len(attempts) == 3
+    assert queue.retried == 2
+    [dead] = queue.dead_letters()
+    assert dead["id"] == job_id and dead["attempts"] == 3 and dead["last_error"] == "bot is down"
+
+    assert queue.retry_dead(job_id)
+    assert not queue.retry_dead(job_id)  # no longer dead
+    assert queue.metrics()["queued"] == 1
+
+
+def test_permanent_error_skips_retries(queue):
+    async def handler(payload):
+        raise PermanentJobError("unknown user")
+
+    queue.register("ping", handler)
+    queue.enqueue("ping", {})
+    queue.enqueue("unregistered", {})
+    asyncio.run(drain(queue, lambda: queue.dead == 2))
+    assert queue.retried == 0
+    assert {dead["kind"] for dead in queue.dead_letters()} == {"ping", "unregistered"}
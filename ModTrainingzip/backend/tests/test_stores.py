@@ -0,0 +1,199 @@
+"""
+Submission store backends: memory, journal and SQLite answer the same reads
+the same way, the journal recovers its state on reopen, and SQLite stores on
+one file see each other's changes through the change log (sync)
+"""
+
+import json
+
+import pytest
+
+from journal_store import JournaledSubmissionStore
+from sqlite_store import SQLiteSubmissionStore
+from submission_search import parse_query
+from submission_store import SubmissionStore, create_store
+
+
+def submission(n, **fields):
+    data = {
+        "id": f"s{n}",
+        "user_id": str(100 + n % 3),
+        "user_email": f"user{n}@example.com",
+        "username": f"user{n}",
+        "answers": [{"question_number": 1, "question": "q", "user_answer": f"open a ticket {n}",
+                     "is_correct": n % 2 == 0}],
+        "score": n * 10,
+        "passed": n % 2 == 0,
+        "status": "pending",
+        "created_at": f"2026-01-01T00:00:{n:02d}",
+        "updated_at": f"2026-01-01T00:00:{n:02d}",
+    }
+    data.update(fields)
+    return data
+
+
+@pytest.fixture(params=["memory", "journal", "sqlite"])
+def store(request, tmp_path):
+    store = create_store(request.param, str(tmp_path / "submissions"))
+    yield store
+    if hasattr(store, "close"):
+        store.close()
+
+
+def ids(encoded):
+    return [json.loads(item)["id"] for item in encoded]
+
+
+def test_crud(store):
+    for n in range(5):
+        store.add(submission(n))
+    assert len(store) == 5 and "s3" in store
+    assert store.get("s3")["answers"][0]["user_answer"] == "open a ticket 3"
+
+    assert store.update("s3", status="accepted")["status"] == "accepted"
+    assert store.update("missing", status="accepted") is None
+    assert store.count("accepted") == 1 and store.count("pending") == 4
+
+    assert store.compare_and_set("s1", {"status": "accepted"}, status="denied") == (store.get("s1"), False)
+    updated, applied = store.compare_and_set("s1", {"status": "pending"}, status="denied")
+    assert applied and updated["status"] == "denied"
+
+    assert store.delete("s0")["id"] == "s0"
+    assert store.delete("s0") is None
+    assert [s["id"] for s in store.list()] == ["s1", "s2", "s3", "s4"]
+    assert [s["id"] for s in store.list(status="pending")] == ["s2", "s4"]
+    assert [s["id"] for s in store.list(user_id="101")] == ["s1", "s4"]
+
+
+def test_pages_and_projection(store):
+    for n in (3, 1, 4, 0, 2):
+        store.add(submission(n))
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.page_json(limit=2, cursor=cursor, fields=["id", "score"])
+        seen += [json.loads(item) for item in page]
+        if cursor is None:
+            break
+    assert seen == [{"id": f"s{n}", "score": n * 10} for n in range(5)]
+    assert ids(store.page_json(limit=10, status="pending", user_id="100")[0]) == ["s0", "s3"]
+    assert json.loads(store.get_json("s2")) == store.get("s2")
+    assert [s["id"] for s in json.loads(store.list_json(fields=["id"]))] == [f"s{n}" for n in range(5)]
+
+
+def test_versions_and_changes(store):
+    store.add(submission(0))
+    store.add(submission(1))
+    since = store.version
+    assert store.version_of("s0") <= since
+
+    store.update("s1", status="accepted")
+    store.add(submission(2))
+    store.delete("s0")
+    assert store.version > since
+    assert store.version_of("s0") is None
+    assert store.version_of("s1") > since
+
+    items, deleted, version = store.changes_json(since, fields=["id", "status"])
+    assert [json.loads(item) for item in items] == [{"id": "s1", "status": "accepted"}, {"id": "s2", "status": "pending"}]
+    assert deleted == ["s0"]
+    assert version == store.version
+    assert store.changes_json(version) == ([], [], version)
+    assert store.changes_json(version + 1) is None  # from the future
+
+
+def test_search(store):
+    store.add(submission(1, username="alice"))
+    store.add(submission(2, username="bob", answers=[{"question_number": 1, "user_answer": "ban the roster"}]))
+    store.add(submission(3, username="alicia", status="accepted"))
+
+    assert ids(store.search_json(parse_query("ali*"))[0]) == ["s3", "s1"]
+    assert ids(store.search_json(parse_query("ali*"), status="pending")[0]) == ["s1"]
+    assert ids(store.search_json(parse_query('"the roster"'))[0]) == ["s2"]
+
+    page, cursor = store.search_json(parse_query("ticket"), limit=1)
+    assert ids(page) == ["s3"]
+    assert ids(store.search_json(parse_query("ticket"), limit=5, cursor=cursor)[0]) == ["s1"]
+
+    store.update("s1", username="zed")
+    assert ids(store.search_json(parse_query("alice"))[0]) == []
+
+
+def test_listeners_see_every_change(store):
+    events = []
+    store.subscribe(lambda event, s, previous: events.append((event, s["id"], previous and previous["status"])))
+    store.add(submission(1))
+    store.update("s1", status="accepted")
+    store.delete("s1")
+    assert events == [("created", "s1", None), ("updated", "s1", "pending"), ("deleted", "s1", None)]
+
+
+def test_journal_recovers_writes_and_compactions(tmp_path):
+    path = str(tmp_path / "submissions")
+    store = JournaledSubmissionStore(path, flush_interval=60)
+    for n in range(4):
+        store.add(submission(n))
+    store.compact()
+    store.update("s1", status="accepted")
+    store.delete("s2")
+    store.add(submission(4))
+    store.close()  # flushes the tail written after the snapshot
+
+    reopened = JournaledSubmissionStore(path, flush_interval=60)
+    try:
+        assert [s["id"] for s in reopened.list()] == ["s0", "s1", "s3", "s4"]
+        assert reopened.get("s1")["status"] == "accepted"
+        assert reopened.get("s4") == submission(4)
+    finally:
+        reopened.close()
+
+
+def test_journal_ignores_a_torn_last_line(tmp_path):
+    path = str(tmp_path / "submissions")
+    store = JournaledSubmissionStore(path, flush_interval=60)
+    store.add(submission(1))
+    store.add(submission(2))
+    store.close()
+    with open(f"{path}.journal", "a", encoding="utf-8") as f:
+        f.write('{"op":"delete","id":"s1","se')  # crashed mid-write
+
+    reopened = JournaledSubmissionStore(path, flush_interval=60)
+    try:
+        assert [s["id"] for s in reopened.list()] == ["s1", "s2"]
+    finally:
+        reopened.close()
+
+
+def test_sqlite_sync_replays_other_processes_changes(tmp_path):
+    path = str(tmp_path / "submissions.db")
+    here, there = SQLiteSubmissionStore(path), SQLiteSubmissionStore(path)
+    events = []
+    here.subscribe(lambda event, s, previous: events.append((event, s["id"], previous and previous["status"])))
+    try:
+        here.add(submission(1))
+        assert there.get("s1")["username"] == "user1"  # rows are shared straight away
+        assert here.sync() == 0  # its own change was emitted when it was made
+
+        there.update("s1", status="accepted")
+        there.add(submission(2))
+        there.delete("s2")
+        assert here.get("s1")["status"] == "accepted"
+        assert len(events) == 1
+
+        assert here.sync() == 3
+        assert events[1:] == [("updated", "s1", "pending"), ("created", "s2", None), ("deleted", "s2", None)]
+        assert here.sync() == 0
+        assert there.sync() == 1  # the add made by the other store
+    finally:
+        here.close()
+        there.close()
+
+
+def test_sqlite_imports_a_json_dump(tmp_path):
+    dump = tmp_path / "submissions_data.json"
+    dump.write_text(json.dumps({"submissions": [submission(1), submission(2)]}))
+    store = SQLiteSubmissionStore(str(tmp_path / "submissions.db"))
+    try:
+        assert store.import_json(str(dump)) == 2
+        assert store.get("s2") == SubmissionStore([submission(2)]).get("s2")
+    finally:
+        store.close()
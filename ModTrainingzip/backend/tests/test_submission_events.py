@@ -0,0 +1,101 @@
+"""
+SubmissionEventBroker: ordering across threads, Last-Event-ID replay and resets
+"""
+
+import asyncio
+import threading
+
+from submission_events import SubmissionEventBroker
+
+
+def submission(i, status="pending"):
+    return {"id": f"s{i}", "user_id": "1", "status": status, "answers": ["not sent"]}
+
+
+def seq_of(frame):
+    return int(frame.split("\n", 1)[0].rsplit("-", 1)[1])
+
+
+async def frames(stream, n):
+    got = []
+    async for frame in stream:
+        if frame.startswith("id:") and "event: ready" not in frame and "event: reset" not in frame:
+            got.append(frame)
+            if len(got) == n:
+                return got
+
+
+class ReorderingLoop:
+    """Runs the first call_soon_threadsafe callback after the second, as a busy loop may"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.held = None
+
+    def is_closed(self):
+        return self.loop.is_closed()
+
+    def call_soon_threadsafe(self, callback, *args):
+        if self.held is None:
+            self.held = (callback, args)
+            return
+        self.loop.call_soon_threadsafe(callback, *args)
+        self.loop.call_soon_threadsafe(self.held[0], *self.held[1])
+
+
+def test_deltas_from_threads_arrive_in_sequence_order():
+    async def main():
+        broker = SubmissionEventBroker()
+        stream = broker.stream()
+        assert await stream.__anext__() == "retry: 3000\n\n"
+        assert "event: ready" in await stream.__anext__()
+        broker._loop = ReorderingLoop(asyncio.get_running_loop())
+        for i in range(2):
+            thread = threading.Thread(target=broker.on_change, args=("created", submission(i), None))
+            thread.start()
+            thread.join()
+        live = await asyncio.wait_for(frames(stream, 2), 5)
+        await stream.aclose()
+        return broker, live
+
+    broker, live = asyncio.run(main())
+    assert [seq_of(frame) for frame in live] == [1, 2]
+    assert [seq for seq, _ in broker._buffer] == [1, 2]
+    assert '"answers"' not in live[0]
+
+
+def test_reconnect_replays_what_was_missed():
+    async def main():
+        broker = SubmissionEventBroker()
+        for i in range(3):
+            broker.on_change("created", submission(i), None)
+        stream = broker.stream(f"{broker.epoch}-1")
+        replayed = await asyncio.wait_for(frames(stream, 2), 5)
+        await stream.aclose()
+        return replayed
+
+    assert [seq_of(frame) for frame in asyncio.run(main())] == [2, 3]
+
+
+def test_unknown_or_evicted_ids_reset():
+    async def first_frames(broker, last_event_id):
+        stream = broker.stream(last_event_id)
+        await stream.__anext__()
+        frame = await stream.__anext__()
+        await stream.aclose()
+        return frame
+
+    broker = SubmissionEventBroker(buffer_size=2)
+    for i in range(5):
+        broker.on_change("created", submission(i), None)
+    assert "event: reset" in asyncio.run(first_frames(broker, "other-1"))
+    assert "event: reset" in asyncio.run(first_frames(broker, f"{broker.epoch}-1"))
+    assert "event: created" in asyncio.run(first_frames(broker, f"{broker.epoch}-3"))
+
+
+def test_updates_the_list_view_cannot_see_are_skipped():
+    broker = SubmissionEventBroker()
+    broker.on_change("updated", submission(1), submission(1))
+    assert broker._seq == 0
+    broker.on_change("updated", submission(1, "accepted"), submission(1))
+    assert broker._seq == 1
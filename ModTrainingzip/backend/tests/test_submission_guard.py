@@ -0,0 +1,147 @@
+"""
+SubmissionGuard and POST /api/submissions: duplicates are replayed, new
+submissions are rate limited per user, and replays never spend tokens
+"""
+
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from submission_guard import SubmissionGuard, fingerprint
+
+
+@pytest.fixture
+def guard(tmp_path):
+    guard = SubmissionGuard(str(tmp_path / "guard.db"), ttl=60, burst=2, per_hour=3600)
+    yield guard
+    guard.close()
+
+
+def answers(text="open a ticket"):
+    return [{"question_number": 1, "question": "q", "user_answer": text, "is_correct": False}]
+
+
+def test_fingerprint_ignores_order_and_padding():
+    a = [{"question_number": 2, "user_answer": "b"}, {"question_number": 1, "user_answer": " a "}]
+    b = [{"question_number": 1, "user_answer": "a"}, {"question_number": 2, "user_answer": "b"}]
+    assert fingerprint("1", a) == fingerprint("1", b)
+    assert fingerprint("1", a) != fingerprint("2", a)
+
+
+def test_first_claim_wins(guard):
+    assert guard.claim("k", "fp", "s1") is None
+    assert guard.claim("k", "fp", "s2") == ("s1", "fp")
+    assert guard.lookup("k") == ("s1", "fp")
+
+
+def test_release_lets_a_retry_claim(guard):
+    guard.claim("k", "fp", "s1")
+    guard.release("k", "other")  # someone else's claim is left alone
+    assert guard.lookup("k") == ("s1", "fp")
+    guard.release("k", "s1")
+    assert guard.claim("k", "fp", "s2") is None
+
+
+def test_expired_keys_can_be_claimed_again(tmp_path):
+    guard = SubmissionGuard(str(tmp_path / "guard.db"), ttl=0.01)
+    guard.claim("k", "fp", "s1")
+    time.sleep(0.02)
+    assert guard.lookup("k") is None
+    assert guard.claim("k", "fp", "s2") is None
+    guard.close()
+
+
+def test_token_bucket(guard):
+    assert guard.acquire("u") == 0
+    assert guard.acquire("u") == 0
+    wait = guard.acquire("u")
+    assert 0 < wait <= 1
+    assert guard.acquire("other") == 0
+
+
+def test_purge_drops_expired_keys_and_full_buckets(guard):
+    guard.claim("old", "fp", "s1")
+    guard.acquire("idle")
+    guard.acquire("busy")
+    now = time.time()
+    with guard._lock:
+        guard._conn.execute("UPDATE submission_keys SET expires_at = ? WHERE key = 'old'", (now - 1,))
+        # burst / refill = 2 s to refill completely
+        guard._conn.execute("UPDATE submission_rate SET updated_at = ? WHERE user_id = 'idle'", (now - 3,))
+    guard.purge()
+    with guard._lock:
+        keys = guard._conn.execute("SELECT key FROM submission_keys").fetchall()
+        users = guard._conn.execute("SELECT user_id FROM submission_rate").fetchall()
+    assert keys == []
+    assert users == [("busy",)]
+    # A purged bucket behaves as a full one
+    assert guard.acquire("idle") == 0
+
+
+def guarded(outcome):
+    return REGISTRY.get_sample_value("submission_guard_total", {"outcome": outcome}) or 0
+
+
+@pytest.fixture
+def api(client, server, guard, monkeypatch):
+    monkeypatch.setattr(server, "submission_guard", guard)
+    monkeypatch.setattr(server.job_queue, "enqueue", lambda *args, **kwargs: None)
+    return client
+
+
+def submit(api, user, text, key=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    return api.post("/api/submissions", headers=headers, json={
+        "user_id": user, "user_email": f"{user}@example.com", "username": user, "answers": answers(text)})
+
+
+def test_duplicate_post_is_replayed_without_spending_a_token(api):
+    replayed = guarded("replayed")
+    first = submit(api, "dup", "same")
+    again = submit(api, "dup", "same")
+    assert first.status_code == again.status_code == 200
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert again.json()["submission"]["id"] == first.json()["submission"]["id"]
+    assert guarded("replayed") == replayed + 1
+    # One token spent, one left
+    assert submit(api, "dup", "different").status_code == 200
+
+
+def test_rate_limited_post_releases_its_key(api):
+    limited = guarded("rate_limited")
+    assert submit(api, "busy", "a").status_code == 200
+    assert submit(api, "busy", "b").status_code == 200
+    response = submit(api, "busy", "c")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert guarded("rate_limited") == limited + 1
+    # Not replayed as a phantom submission: the same request is limited again
+    assert submit(api, "busy", "c").status_code == 429
+
+
+def test_idempotency_key_reused_for_other_answers_is_rejected(api):
+    assert submit(api, "keyed", "a", key="k1").status_code == 200
+    assert submit(api, "keyed", "b", key="k1").status_code == 422
+
+
+def test_concurrent_claim_loser_spends_no_token(api, guard, server):
+    # Another worker claimed the key between this request's lookup and claim
+    content = fingerprint("race", answers("x"))
+    lookup = guard.lookup
+    calls = []
+
+    def racing_lookup(key):
+        if not calls:
+            calls.append(key)
+            guard.claim(key, content, "winner")
+            return None
+        return lookup(key)
+
+    guard.lookup = racing_lookup
+    server.submissions_db.add({"id": "winner", "user_id": "race", "user_email": "", "username": "race",
+                               "answers": answers("x"), "score": 0.0, "passed": False, "status": "pending",
+                               "created_at": "2026-01-01T00:00:00", "updated_at": "2026-01-01T00:00:00"})
+    response = submit(api, "race", "x")
+    assert response.json()["submission"]["id"] == "winner"
+    assert guard.acquire("race") == 0 and guard.acquire("race") == 0
@@ -0,0 +1,38 @@
+"""
+SubmissionRecord round trips and the bounded QuestionTable
+"""
+
+from submission_record import QuestionTable, SubmissionRecord, pack_answers
+
+
+def submission(answers):
+    return {"id": "s1", "user_id": "1", "user_email": "a@example.com", "username": "a", "answers": answers,
+            "score": 50.0, "passed": False, "status": "pending", "created_at": "t0", "updated_at": "t0"}
+
+
+def answers(*texts, question="Q"):
+    return [{"question_number": i, "question": f"{question}{i}", "user_answer": text, "is_correct": i % 2 == 0}
+            for i, text in enumerate(texts, start=1)]
+
+
+def test_record_round_trips_packed_and_odd_answers():
+    for given in (answers("a", "b", "c"), [{"question_number": 1, "user_answer": "no question"}], None):
+        record = SubmissionRecord(submission(given))
+        assert record.to_dict() == submission(given)
+        assert record.to_dict(["id", "answers"]) == {"id": "s1", "answers": given}
+
+
+def test_identical_layouts_are_shared():
+    first = SubmissionRecord(submission(answers("a", "b")))
+    second = SubmissionRecord(submission(answers("c", "d")))
+    assert first._layout is second._layout
+
+
+def test_question_table_is_bounded_and_keeps_recent_layouts():
+    table = QuestionTable(maxsize=3)
+    current = pack_answers(answers("x", question="current"), table)[0]
+    for revision in range(10):
+        pack_answers(answers("x", question=f"old{revision}"), table)
+        # The layout in use stays interned while odd ones come and go
+        assert pack_answers(answers("y", question="current"), table)[0] is current
+    assert len(table) == 3
@@ -1,29 +1,86 @@
 """
 Unified Backend Server for Mod Training VOID
 Handles test submissions, admin actions, Discord webhook notifications, and bot role assignment
+
+This is the one backend application (server.py, api_server.py and app.py
+only re-export it). All state lives in shared stores (SQLite submissions and
+job queue), so it can run under several uvicorn workers; see serve.py, which
+also supervises the Discord bot.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+from datetime import date, datetime
+import asyncio
+import math
 import uuid
 import os
-import httpx
 import logging
+import zlib
+
+import http_client
+import metrics
+from compression import CompressionMiddleware
+from fast_json import FastJSONResponse, JSONBytes
+from discord_dispatcher import WebhookDeliveryError, WebhookDispatcher, embed_field
+from job_queue import JobError, JobQueue, PermanentJobError, retry_after_seconds
+from role_client import assign_roles
+
+from submission_events import SubmissionEventBroker
+from submission_guard import SubmissionGuard, fingerprint
+from submission_stats import SubmissionStats
+from grading import QUESTIONS_PATH, Grader, get_grader, grade_answers, reload_grader
+from regrade import regrade
+from submission_store import create_store, query_changes_json, query_search_json, query_submissions_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Submissions are graded on arrival: without the question bank, fail at boot rather than on every POST
+    try:
+        get_grader()
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Cannot load the question bank from QUESTIONS_PATH={QUESTIONS_PATH}: {e}")
+        raise
+    async with http_client.lifespan(app):
+        await webhook_dispatcher.start()
+        await job_queue.start()
+        follower = asyncio.create_task(follow_other_workers()) if submissions_db.shared else None
+        try:
+            yield
+        finally:
+            if follower is not None:
+                follower.cancel()
+            await job_queue.stop()
+            await webhook_dispatcher.stop()
+            metrics.process_exit()
+
 # Create the FastAPI app
-app = FastAPI(title="Mod Training VOID API", version="2.0.0")
+# Responses are rendered with orjson; the submission reads return pre-encoded bytes
+app = FastAPI(title="Mod Training VOID API", version="2.0.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 # Environment variables
 DISCORD_WEBHOOK_URL = os.environ.get('DISCORD_WEBHOOK_URL', 'https://discord.com/api/webhooks/1469965044178747464/tsd8g35ohlBhmaQci6lou-ieZ9EoXZhqSuh-aZ8yyu-j2mfsQymdvPUzV84_bQu9KYBG')
 DISCORD_BOT_URL = os.environ.get('DISCORD_BOT_URL', 'http://localhost:8003')
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'https://mod-training-void.onrender.com')
+ROLE_BATCH_SIZE = int(os.environ.get('ROLE_BATCH_SIZE', '25'))  # approvals per bulk bot call
+DEDUP_WAIT = 2.0  # seconds a duplicate waits for the original request to store its submission
+STORE_SYNC_INTERVAL = float(os.environ.get('STORE_SYNC_INTERVAL', '0.5'))  # seconds between change log polls
+
+# Request latency per route, served with the other metrics at /metrics
+app.add_middleware(metrics.PrometheusMiddleware)
+
+# gzip/Brotli for clients that accept it; ETagged responses are compressed once per store version
+app.add_middleware(CompressionMiddleware)
 
 # CORS configuration
 app.add_middleware(
@@ -36,6 +93,7 @@ app.add_middleware(
         "*"  # For development, restrict in production
     ],
     allow_credentials=True,
+    expose_headers=["ETag", "X-Submissions-Version"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -43,17 +101,18 @@ app.add_middleware(
 # Data models
 class TestAnswer(BaseModel):
     question_number: int
-    question: str
+    question: str = ""
     user_answer: str
-    is_correct: bool
+    is_correct: bool = False  # ignored: answers are graded server-side
 
 class TestSubmissionCreate(BaseModel):
     user_id: str
     user_email: str
     username: str
     answers: List[TestAnswer]
-    score: float
-    passed: bool
+    # Accepted for older clients but recomputed by the grader
+    score: Optional[float] = None
+    passed: Optional[bool] = None
 
 class TestSubmission(BaseModel):
     id: str
@@ -70,6 +129,7 @@ class TestSubmission(BaseModel):
 class AdminAction(BaseModel):
     submission_id: str
     action: str  # "accepted" or "denied"
+    admin_user_id: Optional[str] = None
 
 class WebhookInteraction(BaseModel):
     """Discord webhook interaction (button click)"""
@@ -77,12 +137,74 @@ class WebhookInteraction(BaseModel):
     action: str
     admin_user_id: Optional[str] = None
 
-# In-memory storage (replace with database in production)
-submissions_db: List[dict] = []
+# Submission storage (SQLite by default, see SUBMISSION_STORE)
+submissions_db = create_store()
+
+# Legacy api_server JSON file, imported into the persistent store on first start
+DATA_FILE = 'submissions_data.json'
+
+def load_submissions():
+    # One-time migration: only import into an empty store
+    if not submissions_db.persistent or len(submissions_db) > 0 or not os.path.exists(DATA_FILE):
+        return
+    try:
+        imported = submissions_db.import_json(DATA_FILE)
+        logger.info(f"Imported {imported} submissions from {DATA_FILE}")
+    except Exception as e:
+        logger.error(f"Error loading submissions: {e}")
+
+load_submissions()
+
+# Counters are maintained from store events, so stats never rescan submissions
+submission_stats = SubmissionStats.attach(submissions_db)
+
+# Live deltas for admin clients, fed by the same store events
+submission_events = SubmissionEventBroker.attach(submissions_db)
+
+async def follow_other_workers():
+    """Replay submission changes made by other worker processes into this one's views"""
+    while True:
+        await asyncio.sleep(STORE_SYNC_INTERVAL)
+        try:
+            submissions_db.sync()
+        except Exception as e:
+            logger.error(f"Error following submission changes: {e}", exc_info=True)
+
+# Idempotency keys and per-user submission rate limits, shared by all workers
+submission_guard = SubmissionGuard()
+
+metrics.register_gauge(
+    "submissions_stored", "Stored submissions by status",
+    lambda: {(status,): submissions_db.count(status) for status in ("pending", "accepted", "denied")},
+    labelnames=("status",),
+)
 
 # Admin user IDs
 ADMIN_USER_IDS = ["394600108846350346", "928635423465537579"]
 
+# Browsers keep these responses but revalidate them on every use
+REVALIDATE = "private, no-cache"
+
+def store_etag(version: int, request: Request) -> str:
+    """Strong ETag for a response built from the submission store at a version
+
+    Read the version before building the response: if a change lands in
+    between, the tag is older than the body and the next request simply
+    gets a fresh copy
+    """
+    query = zlib.crc32(request.url.query.encode())
+    return f'"{version:x}-{query:08x}"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response when the client's If-None-Match already has this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = [tag.strip() for tag in header.split(",")]
+    if "*" in tags or etag in tags or f"W/{etag}" in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+    return None
+
 @app.get("/")
 async def read_root():
     return {
@@ -91,12 +213,21 @@ async def read_root():
         "timestamp": datetime.utcnow().isoformat(),
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "submissions": "/api/submissions",
+            "submission_events": "/api/submissions/events",
+            "submission_search": "/api/submissions/search",
             "admin_action": "/api/admin/action",
+            "admin_stats": "/api/admin/stats",
             "webhook_action": "/api/webhook/action"
         }
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics (all workers)"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     return {
@@ -107,127 +238,381 @@ async def health_check():
     }
 
 @app.get("/api/submissions")
-async def get_submissions():
-    """Get all submissions for admin review"""
-    return submissions_db
+async def get_submissions(
+    request: Request,
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    since: Optional[int] = None
+):
+    """Get submissions for admin review
 
-async def send_discord_webhook(submission: dict):
-    """Send notification to Discord with approve/deny buttons"""
+    Pass limit/cursor for keyset pages ordered by created_at, and fields=
+    (e.g. "id,username,status") to leave out answers in list views.
+    Responses carry the store version in X-Submissions-Version; since=<version>
+    returns only what changed after it. Unchanged data gets a 304 for
+    If-None-Match.
+    """
+    version = submissions_db.version
+    etag = store_etag(version, request)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE, "X-Submissions-Version": str(version)}
     try:
-        # Create embed for Discord
-        embed = {
-            "title": "🎯 New Mod Training Submission",
-            "color": 0x7C3AED if submission['passed'] else 0xEF4444,
-            "fields": [
-                {"name": "Username", "value": submission['username'], "inline": True},
-                {"name": "Score", "value": f"{submission['score']:.1f}%", "inline": True},
-                {"name": "Status", "value": "✅ PASSED" if submission['passed'] else "❌ FAILED", "inline": True},
-                {"name": "User ID", "value": submission['user_id'], "inline": False},
-                {"name": "Email", "value": submission['user_email'], "inline": False},
-                {"name": "Submitted", "value": f"<t:{int(datetime.fromisoformat(submission['created_at']).timestamp())}:R>", "inline": False}
-            ],
-            "footer": {"text": f"Submission ID: {submission['id']}"},
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        # Create action buttons
-        components = [
-            {
-                "type": 1,
-                "components": [
-                    {
-                        "type": 2,
-                        "style": 3,  # Green button
-                        "label": "✅ Approve",
-                        "custom_id": f"approve_{submission['id']}"
-                    },
-                    {
-                        "type": 2,
-                        "style": 4,  # Red button
-                        "label": "❌ Deny",
-                        "custom_id": f"deny_{submission['id']}"
-                    },
-                    {
-                        "type": 2,
-                        "style": 5,  # Link button
-                        "label": "View Admin Panel",
-                        "url": f"{FRONTEND_URL}/admin"
-                    }
-                ]
-            }
-        ]
-        
-        payload = {
-            "embeds": [embed],
-            "components": components
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(DISCORD_WEBHOOK_URL, json=payload, timeout=10.0)
-            
-            if response.status_code in [200, 204]:
-                logger.info(f"Discord webhook sent successfully for submission {submission['id']}")
-            else:
-                logger.error(f"Discord webhook failed: {response.status_code} - {response.text}")
-                
-    except Exception as e:
-        logger.error(f"Error sending Discord webhook: {str(e)}", exc_info=True)
+        if since is not None:
+            if status is not None or limit is not None or cursor is not None:
+                raise ValueError("since cannot be combined with status, limit or cursor")
+            return JSONBytes(query_changes_json(submissions_db, since, fields=fields), headers=headers)
+        return JSONBytes(query_submissions_json(submissions_db, status=status, limit=limit,
+                                                cursor=cursor, fields=fields), headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/submissions/events")
+async def stream_submission_events(request: Request, last_event_id: Optional[str] = None):
+    """Server-Sent Events stream of submission deltas for admin clients
 
-async def assign_discord_role(user_id: str) -> dict:
-    """Assign role to Discord user via bot API"""
+    Each created/updated/deleted event carries the submission's list fields.
+    A reconnect with Last-Event-ID (or ?last_event_id=) replays what was
+    missed; if that is no longer possible a "reset" event asks the client to
+    reload the list.
+    """
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(
+        submission_events.stream(resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/submissions/search")
+async def search_submissions(
+    request: Request,
+    q: str,
+    status: Optional[str] = None,
+    passed: Optional[bool] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Full-text search over usernames, emails and answers, newest first
+
+    q takes words, prefixes (mod*) and "quoted phrases", all of which must
+    match; status/passed filter the results. Pages like the list endpoint.
+    """
+    etag = store_etag(submissions_db.version, request)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{DISCORD_BOT_URL}/api/assign-role",
-                json={"user_id": user_id, "role_name": "Verified Staff"},
-                timeout=15.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                logger.info(f"Role assigned successfully to user {user_id}")
-                return {"success": True, "data": data}
-            else:
-                error_data = response.json()
-                logger.error(f"Role assignment failed: {response.status_code} - {error_data}")
-                return {"success": False, "error": error_data}
-                
-    except Exception as e:
-        logger.error(f"Error assigning role: {str(e)}", exc_info=True)
-        return {"success": False, "error": str(e)}
+        body = query_search_json(submissions_db, q, status=status, passed=passed, limit=limit,
+                                 cursor=cursor, fields=fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONBytes(body, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+
+@app.get("/api/submissions/{submission_id}")
+async def get_submission(submission_id: str, request: Request):
+    """Get a single submission including its answers"""
+    version = submissions_db.version_of(submission_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    etag = store_etag(version, request)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    submission = submissions_db.get_json(submission_id)
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    return JSONBytes(submission, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+
+@app.delete("/api/submissions/{submission_id}")
+async def delete_submission(submission_id: str):
+    """Delete a submission"""
+    if submissions_db.delete(submission_id) is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    return {"success": True, "message": "Submission deleted"}
+
+@app.get("/api/admin/stats")
+async def get_admin_stats(request: Request, since: Optional[str] = None, until: Optional[str] = None):
+    """Get statistics for admin dashboard
+
+    Optional since/until (YYYY-MM-DD, inclusive) restrict the stats to
+    submissions created in that window and add a per-day breakdown
+    """
+    for value in (since, until):
+        if value is not None:
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="since/until must be dates in YYYY-MM-DD format")
+    # Stats only change with the store, so an unchanged version needs no summary
+    etag = store_etag(submissions_db.version, request)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    # Include what other workers wrote since the last background sync
+    submissions_db.sync()
+    return FastJSONResponse(submission_stats.summary(since=since, until=until),
+                            headers={"ETag": etag, "Cache-Control": REVALIDATE})
+
+@app.post("/api/admin/regrade")
+async def regrade_submissions(dry_run: bool = False, flip_limit: int = 100):
+    """Re-grade every stored submission against the current question bank
+
+    Re-reads testQuestions.json, rewrites changed is_correct/score/passed
+    values (unless dry_run) and reports which pass/fail verdicts flipped
+    """
+    grader = Grader.from_file()
+    with metrics.track("regrade"):
+        report = await run_in_threadpool(regrade, submissions_db, grader, dry_run=dry_run)
+    if not dry_run:
+        # New submissions are graded with the same bank from now on
+        reload_grader()
+    return report.to_dict(flip_limit=flip_limit)
+
+def raise_for_job_retry(response, what: str):
+    """Map a failed outbound response onto the job queue's retry semantics"""
+    if response.status_code == 429:
+        raise JobError(f"{what} rate limited", retry_after=retry_after_seconds(response))
+    if 400 <= response.status_code < 500 and response.status_code not in (408, 409):
+        raise PermanentJobError(f"{what} failed: {response.status_code} - {response.text}")
+    raise JobError(f"{what} failed: {response.status_code} - {response.text}")
+
+@metrics.timed("discord_webhook")
+async def send_discord_webhook(submission: dict):
+    """Send notification to Discord with approve/deny buttons
+
+    Runs as a job: raising makes the job queue retry or dead-letter it
+    """
+    # Create embed for Discord
+    embed = {
+        "title": "🎯 New Mod Training Submission",
+        "color": 0x7C3AED if submission['passed'] else 0xEF4444,
+        "fields": [
+            embed_field("Username", submission['username'], inline=True),
+            embed_field("Score", f"{submission['score']:.1f}%", inline=True),
+            embed_field("Status", "✅ PASSED" if submission['passed'] else "❌ FAILED", inline=True),
+            embed_field("User ID", submission['user_id']),
+            embed_field("Email", submission['user_email']),
+            embed_field("Submitted", f"<t:{int(datetime.fromisoformat(submission['created_at']).timestamp())}:R>")
+        ],
+        "footer": {"text": f"Submission ID: {submission['id']}"},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    
+    # Create action buttons
+    buttons = [
+        {
+            "type": 2,
+            "style": 3,  # Green button
+            "label": "✅ Approve",
+            "custom_id": f"approve_{submission['id']}"
+        },
+        {
+            "type": 2,
+            "style": 4,  # Red button
+            "label": "❌ Deny",
+            "custom_id": f"deny_{submission['id']}"
+        }
+    ]
+    
+    # The dispatcher paces posts to Discord's rate-limit bucket and folds
+    # bursts into shared messages; this returns once Discord accepted the embed
+    try:
+        await webhook_dispatcher.send(embed, buttons, label=submission['username'])
+    except WebhookDeliveryError as e:
+        logger.error(f"Discord webhook failed: {e}")
+        raise_for_job_retry(e.response, "Discord webhook")
+    logger.info(f"Discord webhook sent successfully for submission {submission['id']}")
+
+def check_role_response(response, user_id: str) -> dict:
+    """Result of one user's role assignment; raises so the job queue retries or dead-letters it"""
+    if response.status_code == 200:
+        logger.info(f"Role assigned successfully to user {user_id}")
+        return {"success": True, "data": response.json()}
+    logger.error(f"Role assignment failed for {user_id}: {response.status_code} - {response.text}")
+    raise_for_job_retry(response, "Role assignment")
+
+@metrics.timed("assign_role")
+async def assign_discord_roles(payloads: List[dict]) -> List[Optional[Exception]]:
+    """Assign the role to a batch of approved users with one bot API call
+
+    Runs as a batched job: the returned list holds None for each user that
+    got the role and the exception for each that should be retried
+    """
+    user_ids = [payload["user_id"] for payload in payloads]
+    results = await assign_roles(http_client.get_client(), DISCORD_BOT_URL, user_ids)
+    errors = []
+    for user_id in user_ids:
+        try:
+            check_role_response(results[str(user_id)], user_id)
+            errors.append(None)
+        except Exception as e:
+            errors.append(e)
+    return errors
+
+# Rate-limit-aware sender for the notification webhook
+webhook_dispatcher = WebhookDispatcher(
+    DISCORD_WEBHOOK_URL,
+    http_client.get_client,
+    link_button={
+        "type": 2,
+        "style": 5,  # Link button
+        "label": "View Admin Panel",
+        "url": f"{FRONTEND_URL}/admin"
+    },
+)
+
+# Durable queue for outbound Discord work, drained by workers started in lifespan
+job_queue = JobQueue()
+job_queue.register("discord_webhook", lambda payload: send_discord_webhook(payload["submission"]))
+job_queue.register("assign_role", assign_discord_roles, batch_size=ROLE_BATCH_SIZE)
+
+def job_queue_depth() -> dict:
+    queue = job_queue.metrics()
+    return {(status,): queue[status] for status in ("queued", "running", "dead")}
+
+metrics.register_gauge("job_queue_jobs", "Outbound jobs by status", job_queue_depth, labelnames=("status",))
+metrics.register_gauge("job_queue_oldest_age_seconds", "Age of the oldest queued or running job",
+                       lambda: job_queue.metrics()["oldest_queued_age_seconds"])
+
+@app.get("/api/admin/jobs")
+async def get_job_queue_status(limit: int = 50):
+    """Outbound job queue depth, latency and dead-letter list"""
+    return {
+        **job_queue.metrics(),
+        "webhook": {
+            "queued": webhook_dispatcher.queue_depth(),
+            "messages_sent": webhook_dispatcher.messages_sent,
+            "embeds_sent": webhook_dispatcher.embeds_sent,
+            "rate_limited": webhook_dispatcher.rate_limited,
+        },
+        "dead_letters": job_queue.dead_letters(limit),
+    }
+
+@app.post("/api/admin/jobs/{job_id}/retry")
+async def retry_dead_job(job_id: int):
+    """Requeue a dead-lettered job"""
+    if not job_queue.retry_dead(job_id):
+        raise HTTPException(status_code=404, detail="Dead-lettered job not found")
+    return {"success": True, "message": f"Job {job_id} requeued"}
+
+async def replay_submission(key: str, content: str, submission_id: str, original_content: str,
+                            response: Response):
+    """Answer a repeated request with the submission its first attempt created"""
+    if original_content != content:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different submission")
+    deadline = asyncio.get_running_loop().time() + DEDUP_WAIT
+    existing = submissions_db.get(submission_id)
+    while existing is None and asyncio.get_running_loop().time() < deadline:
+        # The first attempt may still be storing it
+        await asyncio.sleep(0.05)
+        existing = submissions_db.get(submission_id)
+    if existing is None:
+        # Never stored, or deleted since: let the next attempt start over
+        submission_guard.release(key, submission_id)
+        raise HTTPException(status_code=409, detail="An identical submission is still being processed, please retry")
+    metrics.SUBMISSION_GUARD.labels("replayed").inc()
+    logger.info(f"Duplicate submission for user {existing['user_id']} answered with {submission_id}")
+    response.headers["Idempotent-Replayed"] = "true"
+    return {
+        "message": "Submission already received",
+        "submission": existing
+    }
 
 @app.post("/api/submissions")
-async def create_submission(submission: TestSubmissionCreate, background_tasks: BackgroundTasks):
-    """Create a new test submission and send Discord notification"""
+async def create_submission(submission: TestSubmissionCreate, response: Response,
+                            idempotency_key: Optional[str] = Header(None)):
+    """Create a new test submission and send Discord notification
+
+    Repeats (same Idempotency-Key header, or the same user and answers within
+    SUBMISSION_DEDUP_TTL) return the original submission without creating or
+    notifying anything again
+    """
+    answers = [answer.dict() for answer in submission.answers]
+    content = fingerprint(submission.user_id, answers)
+    key = f"key:{submission.user_id}:{idempotency_key}" if idempotency_key else f"content:{content}"
+    existing = submission_guard.lookup(key)
+    if existing is None:
+        submission_id = str(uuid.uuid4())
+        existing = submission_guard.claim(key, content, submission_id)
+    if existing is not None:
+        return await replay_submission(key, content, *existing, response)
+
+    # Only the request that owns the key spends a token, so concurrent replays never do
+    retry_after = submission_guard.acquire(submission.user_id)
+    if retry_after:
+        submission_guard.release(key, submission_id)
+        metrics.SUBMISSION_GUARD.labels("rate_limited").inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many submissions, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
     try:
+        # Grade on the server; the client's is_correct/score/passed are not trusted
+        graded = grade_answers(answers)
         new_submission = {
-            "id": str(uuid.uuid4()),
+            "id": submission_id,
             "user_id": submission.user_id,
             "user_email": submission.user_email,
             "username": submission.username,
-            "answers": [answer.dict() for answer in submission.answers],
-            "score": submission.score,
-            "passed": submission.passed,
+            "answers": graded["answers"],
+            "score": graded["score"],
+            "passed": graded["passed"],
             "status": "pending",
             "created_at": datetime.utcnow().isoformat(),
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        submissions_db.append(new_submission)
+        submissions_db.add(new_submission)
         
-        # Send Discord webhook notification in background
-        background_tasks.add_task(send_discord_webhook, new_submission)
+        # Queue the Discord webhook notification (retried until delivered)
+        job_queue.enqueue("discord_webhook", {"submission": new_submission})
         
         return {
             "message": "Submission received successfully",
             "submission": new_submission
         }
     except Exception as e:
+        submission_guard.release(key, submission_id)
         logger.error(f"Error creating submission: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+def transition_submission(submission_id: str, status: str) -> Tuple[Optional[dict], bool]:
+    """Move a submission to status; returns (submission, changed)
+
+    The write is a compare-and-set on the status that was read, so when two
+    admins decide the same submission at once exactly one request changes it
+    (and schedules its side effects); the other finds it already decided.
+    """
+    while True:
+        current = submissions_db.get(submission_id)
+        if current is None:
+            return None, False
+        if current["status"] == status:
+            return current, False
+        submission, applied = submissions_db.compare_and_set(
+            submission_id,
+            {"status": current["status"]},
+            status=status,
+            updated_at=datetime.utcnow().isoformat()
+        )
+        if applied:
+            return submission, True
+        # Changed under us: look again
+
+def queue_role_assignment(submission: dict):
+    # Single-flight per user: approvals that arrive while the user's role job
+    # is still queued or running share that job and its bot call
+    job_queue.enqueue("assign_role", {"user_id": submission["user_id"]},
+                      dedup_key=str(submission["user_id"]))
+
 @app.post("/api/admin/action")
-async def admin_action(action_data: AdminAction, background_tasks: BackgroundTasks):
+async def admin_action(action_data: AdminAction):
     """Handle admin actions (accept/deny) on submissions from admin panel"""
     try:
         if action_data.action not in ["accepted", "denied"]:
@@ -236,26 +621,19 @@ async def admin_action(action_data: AdminAction, background_tasks: BackgroundTas
                 detail='Action must be either "accepted" or "denied"'
             )
         
-        # Find and update submission
-        submission = None
-        for sub in submissions_db:
-            if sub["id"] == action_data.submission_id:
-                submission = sub
-                break
+        submission, changed = transition_submission(action_data.submission_id, action_data.action)
         
         if not submission:
             raise HTTPException(status_code=404, detail="Submission not found")
         
-        # Update submission status
-        submission["status"] = action_data.action
-        submission["updated_at"] = datetime.utcnow().isoformat()
-        
-        # If accepted, assign Discord role in background
-        if action_data.action == "accepted":
-            background_tasks.add_task(assign_discord_role, submission["user_id"])
+        # If newly accepted, queue the Discord role assignment
+        if changed and action_data.action == "accepted":
+            queue_role_assignment(submission)
         
         return {
-            "message": f"Submission {action_data.action} successfully",
+            "message": f"Submission {action_data.action} successfully" if changed
+                       else f"Submission was already {action_data.action}",
+            "changed": changed,
             "submission": submission
         }
     except HTTPException:
@@ -265,32 +643,26 @@ async def admin_action(action_data: AdminAction, background_tasks: BackgroundTas
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/webhook/action")
-async def webhook_action(interaction: WebhookInteraction, background_tasks: BackgroundTasks):
+async def webhook_action(interaction: WebhookInteraction):
     """Handle Discord webhook button interactions (approve/deny from Discord)"""
     try:
-        # Find submission
-        submission = None
-        for sub in submissions_db:
-            if sub["id"] == interaction.submission_id:
-                submission = sub
-                break
+        action_status = "accepted" if interaction.action == "approve" else "denied"
+        submission, changed = transition_submission(interaction.submission_id, action_status)
         
         if not submission:
             raise HTTPException(status_code=404, detail="Submission not found")
         
-        # Update submission status
-        action_status = "accepted" if interaction.action == "approve" else "denied"
-        submission["status"] = action_status
-        submission["updated_at"] = datetime.utcnow().isoformat()
-        
-        # If approved, assign Discord role in background
-        if interaction.action == "approve":
-            background_tasks.add_task(assign_discord_role, submission["user_id"])
+        # If newly approved, queue the Discord role assignment
+        if changed and interaction.action == "approve":
+            queue_role_assignment(submission)
         
-        logger.info(f"Webhook action '{interaction.action}' processed for submission {interaction.submission_id}")
+        logger.info(f"Webhook action '{interaction.action}' processed for submission {interaction.submission_id}"
+                    f"{'' if changed else ' (already ' + action_status + ')'}")
         
         return {
-            "message": f"Submission {action_status} via webhook",
+            "message": f"Submission {action_status} via webhook" if changed
+                       else f"Submission was already {action_status}",
+            "changed": changed,
             "submission": submission
         }
     except HTTPException:
@@ -302,4 +674,4 @@ async def webhook_action(interaction: WebhookInteraction, background_tasks: Back
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8080))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(app, host="0.0.0.0", port=port)  # single process; serve.py runs several workers
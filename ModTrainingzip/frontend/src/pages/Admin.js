@@ -1,18 +1,50 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { supabase } from '../lib/supabase';
 import { Button } from '../components/ui/button';
+import { Input } from '../components/ui/input';
 import { toast } from 'sonner';
 import axios from 'axios';
 
 const ADMIN_USER_IDS = ['394600108846350346', '928635423465537579']; // Hardcoded admin IDs
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || 'https://mod-training-void-backend-cbpz.onrender.com';
+// List view leaves out answers; they are loaded per submission when expanded
+const LIST_FIELDS = 'id,user_id,user_email,username,score,passed,status,created_at,updated_at';
+const PAGE_SIZE = 100;
+const SEARCH_DELAY_MS = 300;
+
+// Fold one pushed delta into the list (kept in created_at order)
+const applyDelta = (list, { type, submission }) => {
+  const index = list.findIndex((sub) => sub.id === submission.id);
+  if (type === 'deleted') {
+    return index === -1 ? list : list.filter((sub) => sub.id !== submission.id);
+  }
+  if (index === -1) {
+    return [...list, submission];
+  }
+  // Deltas held back during a load can be older than the row that was loaded
+  if (list[index].updated_at > submission.updated_at) {
+    return list;
+  }
+  const next = [...list];
+  next[index] = { ...list[index], ...submission };
+  return next;
+};
 
 export const Admin = () => {
   const navigate = useNavigate();
   const [submissions, setSubmissions] = useState([]);
   const [loading, setLoading] = useState(true);
   const [isAdmin, setIsAdmin] = useState(false);
+  // Lazily loaded answers: id -> { updatedAt, answers }, valid while the row's updated_at is not newer
+  const [answersById, setAnswersById] = useState({});
+  // Submissions whose answers are expanded, refetched when they change
+  const openAnswersRef = useRef(new Set());
+  // Store version the list is known to be current with; null until loaded
+  const versionRef = useRef(null);
+  const [query, setQuery] = useState('');
+  // Matches for the search box, or null when not searching
+  const [searchResults, setSearchResults] = useState(null);
 
   useEffect(() => {
     // Clean up URL parameters if they exist
@@ -50,7 +82,6 @@ export const Admin = () => {
 
         console.log('Admin access granted for Discord ID:', discordUserId);
         setIsAdmin(true);
-        await fetchSubmissions();
       } catch (error) {
         console.error('Error checking admin status:', error);
         toast.error('Error verifying admin status');
@@ -61,10 +92,89 @@ export const Admin = () => {
     checkAdmin();
   }, [navigate]);
 
+  useEffect(() => {
+    if (!isAdmin) return undefined;
+
+    // Subscribe first and load the list once the stream is live, so nothing
+    // created during the load is missed; deltas are held back until then
+    let loaded = false;
+    let started = false;
+    let held = [];
+    const source = new EventSource(`${BACKEND_URL}/api/submissions/events`);
+
+    const reload = async (event) => {
+      started = true;
+      loaded = false;
+      // After a reset only fetch what changed, unless the server no longer knows
+      const caughtUp = event?.type === 'reset' && versionRef.current !== null && await fetchChanges();
+      if (!caughtUp) await fetchSubmissions();
+      const pending = held;
+      held = [];
+      loaded = true;
+      setSubmissions((current) => pending.reduce(applyDelta, current));
+    };
+
+    const onDelta = (event) => {
+      const delta = { type: event.type, submission: JSON.parse(event.data) };
+      refreshAnswers([delta.submission.id], delta.type === 'deleted' ? [delta.submission.id] : []);
+      if (loaded) {
+        setSubmissions((current) => applyDelta(current, delta));
+      } else {
+        held.push(delta);
+      }
+    };
+
+    source.addEventListener('ready', reload);
+    // The server could not replay what was missed while disconnected
+    source.addEventListener('reset', reload);
+    ['created', 'updated', 'deleted'].forEach((type) => source.addEventListener(type, onDelta));
+    source.onerror = () => {
+      // No live updates available: still show the list
+      if (!started) reload();
+    };
+
+    return () => source.close();
+  }, [isAdmin]);
+
+  useEffect(() => {
+    if (!isAdmin || !query.trim()) {
+      setSearchResults(null);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${BACKEND_URL}/api/submissions/search`, {
+          params: { q: query, fields: LIST_FIELDS, limit: PAGE_SIZE }
+        });
+        if (!cancelled) setSearchResults(response.data?.submissions || []);
+      } catch (error) {
+        // 400 for queries with nothing to search for yet (e.g. a lone "a*")
+        if (!cancelled) setSearchResults([]);
+      }
+    }, SEARCH_DELAY_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [isAdmin, query]);
+
   const fetchSubmissions = async () => {
     try {
-      const response = await axios.get(`${BACKEND_URL}/api/submissions`);
-      setSubmissions(response.data || []);
+      const all = [];
+      let cursor = null;
+      let version = null;
+      do {
+        const response = await axios.get(`${BACKEND_URL}/api/submissions`, {
+          params: { limit: PAGE_SIZE, fields: LIST_FIELDS, ...(cursor && { cursor }) }
+        });
+        // Changes made while paging come after the first page's version
+        version = version ?? response.headers['x-submissions-version'] ?? null;
+        all.push(...(response.data?.submissions || []));
+        cursor = response.data?.next_cursor;
+      } while (cursor);
+      versionRef.current = version;
+      setSubmissions(all);
     } catch (error) {
       console.error('Error fetching submissions:', error);
       toast.error('Failed to fetch submissions');
@@ -74,6 +184,27 @@ export const Admin = () => {
     }
   };
 
+  // Apply what changed since the last load; false when a full reload is needed
+  const fetchChanges = async () => {
+    try {
+      const response = await axios.get(`${BACKEND_URL}/api/submissions`, {
+        params: { since: versionRef.current, fields: LIST_FIELDS }
+      });
+      const { version, reset, submissions: changed = [], deleted = [] } = response.data || {};
+      if (reset) return false;
+      refreshAnswers([...deleted, ...changed.map((submission) => submission.id)], deleted);
+      setSubmissions((current) => [
+        ...deleted.map((id) => ({ type: 'deleted', submission: { id } })),
+        ...changed.map((submission) => ({ type: 'updated', submission })),
+      ].reduce(applyDelta, current));
+      versionRef.current = String(version);
+      return true;
+    } catch (error) {
+      console.error('Error fetching submission changes:', error);
+      return false;
+    }
+  };
+
   const handleAction = async (id, action) => {
     try {
       const response = await axios.post(`${BACKEND_URL}/api/admin/action`, {
@@ -82,8 +213,18 @@ export const Admin = () => {
       });
       
       if (response.status === 200) {
-        toast.success(`Submission ${action}ed successfully`);
-        await fetchSubmissions();
+        if (response.data?.changed === false) {
+          toast.info(response.data.message);
+        } else {
+          toast.success(`Submission ${action}ed successfully`);
+        }
+        const updated = response.data?.submission;
+        const applyAction = (list) => list.map((sub) => (
+          sub.id === id ? { ...sub, status: updated?.status || action, updated_at: updated?.updated_at || sub.updated_at } : sub
+        ));
+        setSubmissions(applyAction);
+        setSearchResults((current) => current && applyAction(current));
+        refreshAnswers([id]);
       }
     } catch (error) {
       console.error('Error performing action:', error);
@@ -91,6 +232,45 @@ export const Admin = () => {
     }
   };
 
+  const loadAnswers = async (id) => {
+    try {
+      const response = await axios.get(`${BACKEND_URL}/api/submissions/${id}`);
+      const loaded = { updatedAt: response.data?.updated_at, answers: response.data?.answers || [] };
+      setAnswersById((current) => (
+        // A slower, older response must not replace a newer one
+        current[id] && current[id].updatedAt > loaded.updatedAt ? current : { ...current, [id]: loaded }
+      ));
+    } catch (error) {
+      console.error('Error fetching submission details:', error);
+      toast.error('Failed to load answers');
+    }
+  };
+
+  // Changed (e.g. re-graded) or deleted submissions: drop their answers, reload the expanded ones
+  const refreshAnswers = (ids, deleted = []) => {
+    deleted.forEach((id) => openAnswersRef.current.delete(id));
+    setAnswersById((current) => {
+      const next = { ...current };
+      ids.forEach((id) => delete next[id]);
+      return next;
+    });
+    ids.filter((id) => openAnswersRef.current.has(id)).forEach(loadAnswers);
+  };
+
+  const answersFor = (sub) => {
+    const cached = answersById[sub.id];
+    return cached && !(sub.updated_at > cached.updatedAt) ? cached.answers : null;
+  };
+
+  const toggleAnswers = (sub, open) => {
+    if (!open) {
+      openAnswersRef.current.delete(sub.id);
+      return;
+    }
+    openAnswersRef.current.add(sub.id);
+    if (!answersFor(sub)) loadAnswers(sub.id);
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-zinc-950 flex items-center justify-center">
@@ -108,6 +288,8 @@ export const Admin = () => {
     return null;
   }
 
+  const shown = searchResults ?? submissions;
+
   return (
     <div className="min-h-screen bg-zinc-950 text-zinc-100 p-8">
       <div className="max-w-6xl mx-auto">
@@ -121,13 +303,20 @@ export const Admin = () => {
           </Button>
         </div>
 
-        {submissions.length === 0 ? (
+        <Input
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+          placeholder='Search usernames, emails and answers (word, prefix*, "exact phrase")'
+          className="mb-6 bg-zinc-900 border-zinc-800 text-zinc-100"
+        />
+
+        {shown.length === 0 ? (
           <div className="bg-zinc-900 border border-zinc-800 rounded-lg p-8 text-center">
-            <p className="text-zinc-400">No submissions yet</p>
+            <p className="text-zinc-400">{searchResults ? 'No matching submissions' : 'No submissions yet'}</p>
           </div>
         ) : (
           <div className="space-y-4">
-            {submissions.map((sub) => (
+            {shown.map((sub) => (
               <div 
                 key={sub.id} 
                 className="bg-zinc-900 p-6 rounded-lg border border-zinc-800 hover:border-violet-500/50 transition-colors"
@@ -175,12 +364,15 @@ export const Admin = () => {
                 </div>
 
                 {/* Show answers */}
-                <details className="mt-4">
+                <details className="mt-4" onToggle={(e) => toggleAnswers(sub, e.currentTarget.open)}>
                   <summary className="cursor-pointer text-sm text-violet-400 hover:text-violet-300">
-                    View Answers ({sub.answers?.length || 0} questions)
+                    View Answers{answersFor(sub) ? ` (${answersFor(sub).length} questions)` : ''}
                   </summary>
                   <div className="mt-3 space-y-2">
-                    {sub.answers?.map((answer, idx) => (
+                    {!answersFor(sub) && (
+                      <p className="text-xs text-zinc-500">Loading answers...</p>
+                    )}
+                    {answersFor(sub)?.map((answer, idx) => (
                       <div 
                         key={idx} 
                         className={`p-3 rounded border ${
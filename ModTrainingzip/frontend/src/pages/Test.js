@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { supabase } from '../lib/supabase';
-import { testQuestions, checkAnswer } from '../lib/testQuestions';
+import { testQuestions, checkAnswer, PASS_SCORE } from '../lib/testQuestions';
 import { Button } from '../components/ui/button';
 import { motion } from 'framer-motion';
 import { ArrowLeft, ArrowRight, CheckCircle } from 'lucide-react';
@@ -9,6 +9,10 @@ import axios from 'axios';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || 'https://mod-training-void-backend-cbpz.onrender.com';
 
+const newIdempotencyKey = () => (
+  window.crypto?.randomUUID ? window.crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`
+);
+
 export const Test = () => {
   const navigate = useNavigate();
   const [user, setUser] = useState(null);
@@ -16,6 +20,11 @@ export const Test = () => {
   const [answers, setAnswers] = useState({});
   const [currentAnswer, setCurrentAnswer] = useState('');
   const [showProtocol, setShowProtocol] = useState(false);
+  const [submitting, setSubmitting] = useState(false);
+  // One key per set of answers: retries and double-clicks are recognised as
+  // repeats by the backend, while edited answers count as a new submission
+  const submitKey = useRef(null);
+  const inFlight = useRef(false);
 
   useEffect(() => {
     // Clean up URL parameters (like ?code=...) if they exist
@@ -52,6 +61,7 @@ export const Test = () => {
   };
 
   const handleSubmit = async () => {
+    if (inFlight.current) return;
     answers[currentQuestion] = currentAnswer;
     
     const evaluatedAnswers = testQuestions.map((q, idx) => ({
@@ -63,7 +73,14 @@ export const Test = () => {
 
     const correctCount = evaluatedAnswers.filter(a => a.is_correct).length;
     const score = (correctCount / testQuestions.length) * 100;
-    const passed = score >= 80;
+    const passed = score >= PASS_SCORE;
+
+    const answerTexts = JSON.stringify(evaluatedAnswers.map(a => a.user_answer));
+    if (!submitKey.current || submitKey.current.answers !== answerTexts) {
+      submitKey.current = { answers: answerTexts, key: newIdempotencyKey() };
+    }
+    inFlight.current = true;
+    setSubmitting(true);
 
     try {
       // Get Discord user ID from metadata
@@ -76,25 +93,36 @@ export const Test = () => {
         passed
       });
       
-      await axios.post(`${BACKEND_URL}/api/submissions`, {
+      const response = await axios.post(`${BACKEND_URL}/api/submissions`, {
         user_id: discordUserId,  // Use Discord user ID
         user_email: user.email,
         username: user.user_metadata?.full_name || user.user_metadata?.name || user.email,
         answers: evaluatedAnswers,
         score: score,
         passed: passed
+      }, {
+        headers: { 'Idempotency-Key': submitKey.current.key }
       });
 
+      // The backend re-grades the answers; show its verdict
+      const graded = response.data.submission || response.data;
       navigate('/results', { 
         state: { 
-          score, 
-          passed, 
-          answers: evaluatedAnswers 
+          score: graded.score ?? score, 
+          passed: graded.passed ?? passed, 
+          answers: graded.answers || evaluatedAnswers 
         } 
       });
     } catch (error) {
       console.error('Error submitting test:', error);
-      alert('Failed to submit test. Please try again.');
+      if (error.response?.status === 429) {
+        alert('You have submitted too many times recently. Please try again later.');
+      } else {
+        alert('Failed to submit test. Please try again.');
+      }
+    } finally {
+      inFlight.current = false;
+      setSubmitting(false);
     }
   };
 
@@ -190,11 +218,12 @@ export const Test = () => {
             ) : (
               <Button
                 onClick={handleSubmit}
+                disabled={submitting}
                 data-testid="submit-button"
                 className="bg-green-600 hover:bg-green-700 text-white font-medium py-2.5 px-6 rounded-md transition-all shadow-[0_0_20px_rgba(16,185,129,0.3)] hover:shadow-[0_0_30px_rgba(16,185,129,0.5)] flex items-center gap-2"
               >
                 <CheckCircle className="w-4 h-4" />
-                Submit Assessment
+                {submitting ? 'Submitting...' : 'Submit Assessment'}
               </Button>
             )}
           </div>